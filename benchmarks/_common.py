@@ -0,0 +1,85 @@
+from datetime import date, timedelta
+from os import getenv
+from pathlib import Path
+from tempfile import gettempdir
+from time import perf_counter
+
+from server.common.db import (
+    Base,
+    DataBaseConfiguration,
+    Service,
+    ServiceDate,
+    User
+)
+
+
+def bench_db_url(name: str) -> str:
+    '''
+    BENCH_DB_URL points the benchmarks at another database (e.g. postgres),
+    by default every benchmark gets its own throwaway sqlite file
+    '''
+    url = getenv('BENCH_DB_URL')
+    if url:
+        return url
+
+    path = Path(gettempdir()) / f'mstv2_bench_{name}.db'
+    path.unlink(missing_ok=True)
+    return f'sqlite+aiosqlite:///{path}'
+
+
+async def fresh_database(name: str) -> DataBaseConfiguration:
+    db = DataBaseConfiguration(bench_db_url(name))
+    await db.migrate()
+    return db
+
+
+async def seed_master(session, users: int = 1) -> tuple[list[User], Service]:
+    people = [
+        User(name=f'bench-{i}', password='-', email=f'bench-{i}@example.com')
+        for i in range(users + 1)
+    ]
+    session.add_all(people)
+    await session.flush()
+
+    service = Service(
+        title='bench service',
+        description='bench',
+        price=1000,
+        user_id=people[0].id
+    )
+    session.add(service)
+    await session.flush()
+    return people[1:], service
+
+
+def tomorrow() -> date:
+    return date.today() + timedelta(days=1)
+
+
+async def seed_date(session, service: Service, slots: dict) -> ServiceDate:
+    service_date = ServiceDate(
+        date=tomorrow(),
+        slots=slots,
+        service_id=service.id
+    )
+    session.add(service_date)
+    await session.flush()
+    return service_date
+
+
+class Timer:
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = perf_counter() - self.started
+
+
+def report(title: str, rows: dict) -> None:
+    print(f'\n{title}')
+    width = max(len(key) for key in rows)
+    for key, value in rows.items():
+        print(f'  {key.ljust(width)}  {value}')
+
+#demo hold mvp confirm
\ No newline at end of file
@@ -0,0 +1,162 @@
+'''
+Benchmark of the catalog list responses.
+Seeds N services with full length descriptions, photos with thumbnails
+and tags, then walks the catalog page by page three ways and reports
+the JSON bytes and the time (query + serialization) per page:
+    all   - every service as ServiceResponse, what GET /services/ returned
+            before pagination (one "page")
+    full  - keyset pages of ORM services as ServiceResponse
+    cards - keyset pages of plain card rows as ServiceCardResponse,
+            what GET /services/ returns now
+
+    python -m benchmarks.catalog_cards --rows 20000 --limit 20 --pages 50
+'''
+import argparse
+import asyncio
+import hashlib
+import logging
+from statistics import median
+from typing import List
+
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import insert
+from sqlalchemy.orm import selectinload
+
+from server.common.db import MediaVariant, Service, ServiceTagConnection, Tag, User, select
+from server.common.utils.logger import logger
+from server.services.repositories import ServiceRepository
+from server.services.repositories.service_repository import _catalog_statement, _cut_page
+from server.services.schemas import (
+    ServiceCardPageResponse,
+    ServiceCatalogQuery,
+    ServiceResponse
+)
+
+from ._common import Timer, fresh_database, report
+
+TAGS = 50
+TAGS_PER_SERVICE = 3
+CHUNK = 5_000
+DESCRIPTION = ('Стрижка, укладка и уход за волосами любой длины. ' * 20)[:896]
+
+
+class ServicePageResponse(BaseModel):
+    # what GET /services/ returned before the cards
+    items: List[ServiceResponse]
+    next_cursor: str | None
+
+
+async def orm_page(session, query: ServiceCatalogQuery) -> tuple[list, str | None]:
+    # the same filters and keyset as the cards, ORM services with their relations
+    services = (await session.scalars(
+        _catalog_statement(select(Service), query).options(
+            selectinload(Service.tag_connections).selectinload(ServiceTagConnection.tag),
+            selectinload(Service.media_variants)
+        )
+    )).all()
+    return _cut_page(services, query)
+
+
+async def _insert(session, model, rows: list[dict]) -> None:
+    for start in range(0, len(rows), CHUNK):
+        await session.execute(insert(model), rows[start:start + CHUNK])
+
+
+async def seed(db, rows: int) -> None:
+    async with db.Session() as session:
+        master = User(name='bench', password='-', email='bench@example.com')
+        session.add(master)
+        await session.flush()
+
+        hashes = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(rows)]
+        await _insert(session, Service, [
+            {'title': f'service {i}', 'description': DESCRIPTION,
+             'photo': f'/api/v1/media/{digest}.jpg', 'photo_hash': digest,
+             'certificate': f'/api/v1/media/{digest[::-1]}.jpg',
+             'price': 500 + i % 40 * 100, 'user_id': master.id}
+            for i, digest in enumerate(hashes)
+        ])
+        await _insert(session, MediaVariant, [
+            {'source_hash': digest, 'variant': variant, 'format': extension,
+             'url': f'/api/v1/media/{digest[:63]}{n}.{extension}',
+             'width': 320, 'height': 240, 'size': 10_000}
+            for digest in hashes
+            for n, (variant, extension) in enumerate(
+                (variant, extension) for variant in ('thumb', 'medium') for extension in ('webp', 'jpg'))
+        ])
+
+        await _insert(session, Tag, [
+            {'title': f'tag-{i}', 'user_id': master.id} for i in range(TAGS)])
+        tag_ids = (await session.scalars(select(Tag.id).order_by(Tag.id))).all()
+        service_ids = (await session.scalars(select(Service.id).order_by(Service.id))).all()
+        await _insert(session, ServiceTagConnection, [
+            {'service_id': service_id, 'tag_id': tag_ids[(i + n * 7) % TAGS]}
+            for i, service_id in enumerate(service_ids)
+            for n in range(TAGS_PER_SERVICE)
+        ])
+        await session.commit()
+
+
+async def walk(db, pages: int, limit: int, cards: bool) -> dict:
+    times, sizes, cursor = [], [], None
+    for _ in range(pages):
+        with Timer() as timer:
+            async with db.ReadSession() as session:
+                repository = ServiceRepository(session)
+                query = ServiceCatalogQuery(limit=limit, cursor=cursor)
+                if cards:
+                    items, cursor = await repository.get_catalog_cards(query)
+                    body = ServiceCardPageResponse(items=items, next_cursor=cursor).model_dump_json()
+                else:
+                    items, cursor = await orm_page(session, query)
+                    body = ServicePageResponse(items=items, next_cursor=cursor).model_dump_json()
+        times.append(timer.elapsed * 1000)
+        sizes.append(len(body.encode()))
+        if cursor is None:
+            break
+    return {'ms': median(times), 'bytes': median(sizes), 'pages': len(times)}
+
+
+async def whole_catalog(db) -> dict:
+    adapter = TypeAdapter(List[ServiceResponse])
+    with Timer() as timer:
+        async with db.ReadSession() as session:
+            services = await ServiceRepository(session).get_all()
+            body = adapter.dump_json(adapter.validate_python(services, from_attributes=True))
+    return {'ms': timer.elapsed * 1000, 'bytes': len(body), 'pages': 1}
+
+
+async def main(rows: int, limit: int, pages: int) -> None:
+    logger.setLevel(logging.ERROR)
+    db = await fresh_database('catalog_cards')
+    await seed(db, rows)
+
+    # the first walk warms the page cache for both
+    await walk(db, pages, limit, cards=True)
+    results = {
+        'all': await whole_catalog(db),
+        'full': await walk(db, pages, limit, cards=False),
+        'cards': await walk(db, pages, limit, cards=True),
+    }
+    await db.engine.dispose()
+
+    report('catalog list responses, median per page', {
+        'services': rows,
+        'page size': limit,
+        **{
+            name: f'{stats["bytes"] / 1024:,.1f} KiB, {stats["ms"]:.1f} ms'
+                  + (f' ({stats["pages"]} pages)' if name != 'all' else '')
+            for name, stats in results.items()
+        },
+        'cards vs full': f'{results["full"]["bytes"] / results["cards"]["bytes"]:.1f}x fewer bytes, '
+                         f'{results["full"]["ms"] / results["cards"]["ms"]:.1f}x faster',
+    })
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--pages', type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.limit, args.pages))
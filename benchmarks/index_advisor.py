@@ -0,0 +1,272 @@
+'''
+Index advisor for the repository queries.
+Seeds a database, runs the catalogue of repository lookups below with
+the slow query recorder capturing the plan of every statement and
+reports each statement whose plan still reads a whole table.
+Exits with 1 when something scans, so it can gate migrations in CI.
+
+    python -m benchmarks.index_advisor --rows 5000
+    BENCH_DB_URL=postgresql+asyncpg://... python -m benchmarks.index_advisor
+'''
+import argparse
+import asyncio
+import logging
+import re
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import insert, text
+
+from server.common.db import (
+    Dispute,
+    DisputeChat,
+    DisputeMessage,
+    Payment,
+    ScheduleTemplate,
+    Service,
+    ServiceChat,
+    ServiceDate,
+    ServiceEnroll,
+    ServiceMessage,
+    ServiceTagConnection,
+    SupportChat,
+    SupportMessage,
+    Tag,
+    User,
+    select
+)
+from server.common.utils import slow_query_recorder
+from server.common.utils.logger import logger
+from server.chats.repository.dispute_chat_repository import DisputeChatRepository
+from server.chats.repository.service_chat_repository import ServiceChatRepository
+from server.chats.repository.support_chat_repository import SupportChatRepository
+from server.dispute.repositories.dispute_repository import DisputeRepository
+from server.enrolls.repositories import EnrollRepository
+from server.payments.repositories import PaymentRepository
+from server.scheduletemplates.repositories import ScheduleTemplateRepository
+from server.services.repositories import ServiceRepository
+from server.users.repositories import UserRepository
+
+from ._common import Timer, fresh_database, report
+
+TAGS = 50
+CHUNK = 10_000
+
+# sqlite: "SCAN users" (older versions "SCAN TABLE users"), "SCAN users USING INDEX" is fine
+_SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+_POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+# name -> lookup, every entry is a filtered query the app runs on a hot path
+CATALOGUE = {
+    'user by email': lambda s, ids: UserRepository(s).get_by_email(ids['email']),
+    'user by name': lambda s, ids: UserRepository(s).get_by_name(ids['name']),
+    'user by telegram id': lambda s, ids: UserRepository(s).get_by_tg_id(ids['telegram_id']),
+    'user detail': lambda s, ids: UserRepository(s).get_by_id_detail(ids['user_id']),
+    'services of category': lambda s, ids: ServiceRepository(s).get_all_by_category_name('tag-7'),
+    'service of owner': lambda s, ids: ServiceRepository(s).get_by_service_user_id(
+        ids['service_id'], ids['user_id']),
+    'enrolls of user': lambda s, ids: EnrollRepository(s).get_by_user_id(ids['client_id']),
+    'enrolls of service': lambda s, ids: EnrollRepository(s).get_by_service_id(ids['service_id']),
+    'enrolls of user and service': lambda s, ids: EnrollRepository(s).get_by_service_user_id(
+        ids['service_id'], ids['client_id']),
+    'payment of enroll': lambda s, ids: PaymentRepository(s).get_by_enroll_id(ids['enroll_id']),
+    'payments of user': lambda s, ids: PaymentRepository(s).get_by_user_id(ids['client_id']),
+    'disputes waiting for arbitr': lambda s, ids: DisputeRepository(s).get_all(),
+    'disputes of arbitr': lambda s, ids: DisputeRepository(s).get_all_by_arbitr(ids['user_id']),
+    'disputes of client': lambda s, ids: DisputeRepository(s).get_all_by_client(ids['client_id']),
+    'disputes of master': lambda s, ids: DisputeRepository(s).get_all_by_master(ids['user_id']),
+    'service chats of user': lambda s, ids: ServiceChatRepository(s).get_all_by_user_id(ids['user_id']),
+    'service chat detail': lambda s, ids: ServiceChatRepository(s).get_detail_by_user_chat_id(
+        ids['client_id'], ids['service_chat_id']),
+    'support chats of user': lambda s, ids: SupportChatRepository(s).get_all_by_user_id(ids['user_id']),
+    'support chat detail': lambda s, ids: SupportChatRepository(s).get_detail_by_user_chat_id(
+        ids['user_id'], ids['support_chat_id']),
+    'dispute chats of user': lambda s, ids: DisputeChatRepository(s).get_all_by_user_id(ids['user_id']),
+    'dispute chat detail': lambda s, ids: DisputeChatRepository(s).get_detail_by_id(
+        ids['dispute_chat_id']),
+    'templates of service': lambda s, ids: ScheduleTemplateRepository(s).get_all_by_service_id(
+        ids['service_id']),
+    'templates of owner': lambda s, ids: ScheduleTemplateRepository(s).get_all_by_service_user_id(
+        ids['service_id'], ids['user_id']),
+}
+
+
+async def _insert(session, model, rows: list[dict]) -> None:
+    for start in range(0, len(rows), CHUNK):
+        await session.execute(insert(model), rows[start:start + CHUNK])
+
+
+async def seed(db, rows: int) -> dict:
+    '''
+    One service per user, its enroll booked by the next user,
+    a dispute for every tenth enroll and a few messages per chat
+    '''
+    day = date.today() + timedelta(days=1)
+
+    async with db.Session() as session:
+        await _insert(session, User, [
+            {'name': f'user-{i}', 'password': '-',
+             'email': f'user-{i}@example.com', 'telegram_id': 10_000 + i}
+            for i in range(rows)
+        ])
+        user_ids = (await session.scalars(select(User.id).order_by(User.id))).all()
+        clients = user_ids[1:] + user_ids[:1]
+
+        await _insert(session, Service, [
+            {'title': f'service {i}', 'description': '-',
+             'price': 1000, 'user_id': user_id}
+            for i, user_id in enumerate(user_ids)
+        ])
+        service_ids = (await session.scalars(select(Service.id).order_by(Service.id))).all()
+
+        await _insert(session, Tag, [
+            {'title': f'tag-{i}', 'user_id': user_ids[i]} for i in range(TAGS)])
+        tag_ids = (await session.scalars(select(Tag.id).order_by(Tag.id))).all()
+        await _insert(session, ServiceTagConnection, [
+            {'service_id': service_id, 'tag_id': tag_ids[i % TAGS]}
+            for i, service_id in enumerate(service_ids)
+        ])
+
+        await _insert(session, ScheduleTemplate, [
+            {'day': 'monday', 'hours_work': {'10:00': 'available'},
+             'user_id': user_id, 'service_id': service_id}
+            for user_id, service_id in zip(user_ids, service_ids)
+        ])
+        await _insert(session, ServiceDate, [
+            {'date': day, 'service_id': service_id} for service_id in service_ids])
+        date_ids = (await session.scalars(select(ServiceDate.id).order_by(ServiceDate.id))).all()
+
+        await _insert(session, ServiceEnroll, [
+            {'slot_time': '10:00', 'status': 'pending', 'price': 1000,
+             'user_id': client_id, 'service_id': service_id, 'service_date_id': date_id}
+            for client_id, service_id, date_id in zip(clients, service_ids, date_ids)
+        ])
+        enroll_ids = (await session.scalars(select(ServiceEnroll.id).order_by(ServiceEnroll.id))).all()
+        await _insert(session, Payment, [
+            {'enroll_id': enroll_id, 'amount': 1000} for enroll_id in enroll_ids])
+
+        disputed = range(0, rows, 10)
+        await _insert(session, Dispute, [
+            {'client_id': clients[i], 'master_id': user_ids[i],
+             'enroll_id': enroll_ids[i], 'reason': '-',
+             'disput_status': 'wait_for_arbitr' if i % 20 else 'in_process',
+             'arbitr_id': None if i % 20 else user_ids[i // 20 % 100]}
+            for i in disputed
+        ])
+        dispute_ids = (await session.scalars(select(Dispute.id).order_by(Dispute.id))).all()
+
+        await _insert(session, ServiceChat, [
+            {'service_id': service_id, 'master_id': user_id, 'client_id': client_id}
+            for user_id, client_id, service_id in zip(user_ids, clients, service_ids)
+        ])
+        await _insert(session, SupportChat, [
+            {'client_id': user_id, 'support_id': client_id}
+            for user_id, client_id in zip(user_ids, clients)
+        ])
+        await _insert(session, DisputeChat, [
+            {'master_id': user_ids[i], 'client_id': clients[i],
+             'arbitr_id': None if i % 20 else user_ids[i // 20 % 100],
+             'enroll_id': enroll_ids[i], 'dispute_id': dispute_id}
+            for i, dispute_id in zip(disputed, dispute_ids)
+        ])
+        chat_ids = {
+            model: (await session.scalars(select(model.id).order_by(model.id))).all()
+            for model in (ServiceChat, SupportChat, DisputeChat)
+        }
+        for message, chat in ((ServiceMessage, ServiceChat),
+                              (SupportMessage, SupportChat),
+                              (DisputeMessage, DisputeChat)):
+            await _insert(session, message, [
+                {'content': '-', 'chat_id': chat_id, 'sender_id': user_ids[0]}
+                for chat_id in chat_ids[chat]
+                for _ in range(3)
+            ])
+
+        await session.commit()
+
+    # planners decide by statistics, give them fresh ones
+    async with db.engine.begin() as conn:
+        await conn.execute(text('ANALYZE'))
+
+    middle = rows // 2 // 10 * 10
+    return {
+        'user_id': user_ids[middle],
+        'client_id': clients[middle],
+        'name': f'user-{middle}',
+        'email': f'user-{middle}@example.com',
+        'telegram_id': 10_000 + middle,
+        'service_id': service_ids[middle],
+        'enroll_id': enroll_ids[middle],
+        'service_chat_id': chat_ids[ServiceChat][middle],
+        'support_chat_id': chat_ids[SupportChat][middle],
+        'dispute_chat_id': chat_ids[DisputeChat][middle // 10],
+    }
+
+
+def full_scans(dialect: str, plan: list[str]) -> list[str]:
+    pattern = _SQLITE_SCAN if dialect == 'sqlite' else _POSTGRES_SCAN
+    return [
+        found.group(1)
+        for line in plan
+        if (found := pattern.search(line.strip()))
+    ]
+
+
+async def advise(db, ids: dict) -> dict:
+    '''
+    Plans of the catalogue: name -> [(tables scanned, fingerprint)]
+    '''
+    dialect = db.engine.dialect.name
+    findings = {}
+
+    for name, lookup in CATALOGUE.items():
+        slow_query_recorder.reset()
+        async with db.Session() as session:
+            await lookup(session, ids)
+
+        for summary in slow_query_recorder.top(100, 'calls'):
+            tables = full_scans(dialect, summary['plan'] or [])
+            if tables:
+                findings.setdefault(name, []).append(
+                    (tables, summary['fingerprint']))
+
+    return findings
+
+
+async def main(rows: int) -> int:
+    db = await fresh_database('index_advisor')
+
+    with Timer() as seeding:
+        ids = await seed(db, rows)
+
+    # every statement counts as slow, so each one gets its plan captured
+    slow_ms, slow_query_recorder.slow_ms = slow_query_recorder.slow_ms, 0
+    logger.setLevel(logging.ERROR)
+    try:
+        findings = await advise(db, ids)
+    finally:
+        slow_query_recorder.slow_ms = slow_ms
+        slow_query_recorder.reset()
+        logger.setLevel(logging.NOTSET)
+
+    report('index advisor', {
+        'backend': db.engine.dialect.name,
+        'rows per table': rows,
+        'seed, s': round(seeding.elapsed, 1),
+        'lookups': len(CATALOGUE),
+        'lookups with full scans': len(findings),
+    })
+    for name, scans in findings.items():
+        print(f'\n  {name}')
+        for tables, statement in scans:
+            print(f'    scans {", ".join(tables)}: {statement[:300]}')
+
+    await db.engine.dispose()
+    return 1 if findings else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=5_000)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.rows)))
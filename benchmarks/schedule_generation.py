@@ -0,0 +1,98 @@
+'''
+Benchmark for the weekly schedule generation.
+Seeds N active templates (one per service and weekday) and runs the
+generator twice: the first run creates every date, the rerun must skip
+them all without creating duplicates.
+
+    python -m benchmarks.schedule_generation --templates 20000
+'''
+import argparse
+import asyncio
+
+from sqlalchemy import func, insert
+
+from server.common.db import ScheduleTemplate, Service, ServiceDate, User, select
+from server.dates.repositories import ServiceDateRepository
+from server.dates.usecases.service_date_usecase import DatesInteractionTemplates
+from server.scheduletemplates.repositories import ScheduleTemplateRepository
+
+from ._common import Timer, fresh_database, report
+
+WEEKDAYS = ('monday', 'tuesday', 'wednesday',
+            'thursday', 'friday', 'saturday', 'sunday')
+HOURS_WORK = {
+    f'{hour:02d}:00': 'available' if 9 <= hour < 18 else 'break'
+    for hour in range(24)
+}
+CHUNK = 10_000
+
+
+async def seed(db, templates: int) -> None:
+    services = max(templates // len(WEEKDAYS), 1)
+
+    async with db.Session() as session:
+        master = User(name='bench', password='-', email='bench@example.com')
+        session.add(master)
+        await session.flush()
+
+        await session.execute(insert(Service), [
+            {'title': f'service {i}', 'description': '-',
+             'price': 1000, 'user_id': master.id}
+            for i in range(services)
+        ])
+        service_ids = (await session.scalars(select(Service.id))).all()
+
+        rows = [
+            {'day': WEEKDAYS[i % len(WEEKDAYS)], 'hours_work': HOURS_WORK,
+             'is_active': True, 'user_id': master.id,
+             'service_id': service_ids[i // len(WEEKDAYS) % services]}
+            for i in range(templates)
+        ]
+        for start in range(0, len(rows), CHUNK):
+            await session.execute(insert(ScheduleTemplate), rows[start:start + CHUNK])
+        await session.commit()
+
+
+async def generate(db) -> dict:
+    async with db.Session() as session:
+        return await DatesInteractionTemplates(
+            session,
+            ServiceDateRepository(session),
+            ScheduleTemplateRepository(session)
+        ).generate_schedule()
+
+
+async def main(templates: int) -> None:
+    db = await fresh_database('schedule_generation')
+
+    with Timer() as seeding:
+        await seed(db, templates)
+
+    with Timer() as first:
+        first_run = await generate(db)
+
+    with Timer() as rerun:
+        second_run = await generate(db)
+
+    async with db.Session() as session:
+        dates = await session.scalar(select(func.count(ServiceDate.id)))
+
+    report('schedule generation', {
+        'backend': db.engine.dialect.name,
+        'templates': templates,
+        'seed, s': round(seeding.elapsed, 1),
+        'first run, s': round(first.elapsed, 2),
+        'first run': first_run,
+        'rerun, s': round(rerun.elapsed, 2),
+        'rerun': second_run,
+        'dates in table': dates,
+    })
+
+    await db.engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--templates', type=int, default=20_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.templates))
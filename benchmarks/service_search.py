@@ -0,0 +1,106 @@
+'''
+Benchmark of the services full text search.
+Seeds N services with titles and descriptions built from a few common
+words (every tenth gets a tag), so each term matches thousands of rows,
+then times the search of GET /services/search for a set of queries.
+BENCH_DB_URL runs it against postgres.
+
+    python -m benchmarks.service_search --rows 100000 --rounds 5
+'''
+import argparse
+import asyncio
+import logging
+import random
+from statistics import median, quantiles
+
+from sqlalchemy import insert
+
+from server.common.db import Service, ServiceTagConnection, Tag, User, select
+from server.common.utils.logger import logger
+from server.services.repositories import ServiceSearchRepository
+
+from ._common import Timer, fresh_database, report
+
+CHUNK = 5_000
+TITLE_WORDS = ['Стрижка', 'Маникюр', 'Педикюр', 'Массаж', 'Окрашивание',
+               'Укладка', 'Брови', 'Ресницы', 'Депиляция', 'Макияж']
+DESCRIPTION_WORDS = ['мастер', 'салон', 'уход', 'волосы', 'ногти', 'гель',
+                     'спина', 'кожа', 'лицо', 'запись', 'опыт', 'дизайн']
+QUERIES = ('стрижка', 'маникюр гель', 'масс', 'окрашивание волосы',
+           'стрижку бороды', 'ресницы дизайн', 'брови', 'депиляция кожа')
+
+
+async def seed(db, rows: int) -> None:
+    rnd = random.Random(25)
+    async with db.Session() as session:
+        master = User(name='bench', password='-', email='bench@example.com')
+        session.add(master)
+        await session.flush()
+
+        await session.execute(insert(Service), {
+            'title': 'Стрижка бороды опасной бритвой', 'description': 'Горячее полотенце',
+            'price': 1500, 'user_id': master.id})
+        for start in range(0, rows, CHUNK):
+            await session.execute(insert(Service), [
+                {'title': f'{rnd.choice(TITLE_WORDS)} {rnd.choice(TITLE_WORDS).lower()}',
+                 'description': ' '.join(rnd.choices(DESCRIPTION_WORDS, k=12)),
+                 'price': 500 + i % 40 * 100, 'user_id': master.id}
+                for i in range(start, min(start + CHUNK, rows))
+            ])
+
+        tags = (await session.execute(
+            insert(Tag).returning(Tag.id),
+            [{'title': word.lower(), 'user_id': master.id} for word in TITLE_WORDS]
+        )).scalars().all()
+        tagged = (await session.scalars(
+            select(Service.id).where(Service.id % 10 == 0))).all()
+        for start in range(0, len(tagged), CHUNK):
+            await session.execute(insert(ServiceTagConnection), [
+                {'service_id': service_id, 'tag_id': rnd.choice(tags)}
+                for service_id in tagged[start:start + CHUNK]
+            ])
+
+        # bulk inserts bypass the usecase, postgres is indexed by hand
+        await ServiceSearchRepository(session).reindex()
+        await session.commit()
+
+
+async def search(db, query: str, limit: int) -> list[int]:
+    async with db.ReadSession() as session:
+        return await ServiceSearchRepository(session).search(query, limit)
+
+
+async def main(rows: int, rounds: int, limit: int) -> None:
+    logger.setLevel(logging.ERROR)
+    db = await fresh_database('service_search')
+    await seed(db, rows)
+
+    # warms the page cache
+    for query in QUERIES:
+        await search(db, query, limit)
+
+    times = []
+    for _ in range(rounds):
+        for query in QUERIES:
+            with Timer() as timer:
+                await search(db, query, limit)
+            times.append(timer.elapsed * 1000)
+    await db.engine.dispose()
+
+    report('services full text search', {
+        'backend': db.engine.dialect.name,
+        'services': rows,
+        'queries': len(times),
+        'p50, ms': round(median(times), 1),
+        'p95, ms': round(quantiles(times, n=20)[18], 1),
+        'max, ms': round(max(times), 1),
+    })
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.rounds, args.limit))
@@ -0,0 +1,82 @@
+'''
+Concurrency benchmark for BookingUseCase.create_book.
+Fires N parallel bookings at every slot of one day and checks that each
+slot ends up with exactly one winner.
+
+    python -m benchmarks.slot_booking --clients 50 --slots 8
+    BENCH_DB_URL=postgresql+asyncpg://... python -m benchmarks.slot_booking
+'''
+import argparse
+import asyncio
+
+from server.common.db import ServiceEnroll
+from server.dates.repositories import ServiceDateRepository
+from server.enrolls.repositories import EnrollRepository
+from server.enrolls.schemas import CreateEnrollModel
+from server.enrolls.usecases import BookingUseCase
+from server.payments.repositories import PaymentRepository
+
+from ._common import Timer, fresh_database, report, seed_date, seed_master
+
+
+async def book(db, user_id: int, enroll_data: CreateEnrollModel):
+    async with db.Session() as session:
+        booking = BookingUseCase(
+            session,
+            EnrollRepository(session),
+            ServiceDateRepository(session),
+            PaymentRepository(session)
+        )
+        return await booking.create_book(user_id, enroll_data)
+
+
+async def main(clients: int, slots: int) -> None:
+    db = await fresh_database('slot_booking')
+
+    slot_times = [f'{hour:02d}:00' for hour in range(9, 9 + slots)]
+    async with db.Session() as session:
+        users, service = await seed_master(session, clients)
+        service_date = await seed_date(
+            session, service, {slot: 'available' for slot in slot_times})
+        await session.commit()
+
+    attempts = [
+        book(db, user.id, CreateEnrollModel(
+            service_id=service.id,
+            service_date_id=service_date.id,
+            slot_time=slot,
+            price=service.price))
+        for slot in slot_times
+        for user in users
+    ]
+
+    with Timer() as timer:
+        results = await asyncio.gather(*attempts)
+
+    winners = {}
+    for result in results:
+        if isinstance(result, ServiceEnroll):
+            winners[result.slot_time] = winners.get(result.slot_time, 0) + 1
+
+    report('slot booking', {
+        'backend': db.engine.dialect.name,
+        'attempts': len(results),
+        'slots': len(slot_times),
+        'winners per slot': sorted(set(winners.values())) or [0],
+        'exactly one winner': len(winners) == len(slot_times)
+        and set(winners.values()) == {1},
+        'elapsed, s': round(timer.elapsed, 3),
+        'bookings/s': round(len(results) / timer.elapsed, 1),
+    })
+
+    await db.engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--slots', type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.clients, args.slots))
+
+#demo hold mvp confirm
\ No newline at end of file
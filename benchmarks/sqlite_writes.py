@@ -0,0 +1,188 @@
+'''
+Mixed read/write benchmark of the sqlite profile.
+N concurrent clients run a mix of catalog and chat reads with chat
+messages (queued writes) and profile updates (session writes) against
+three setups of the same data:
+    baseline - what the engine did before, rollback journal, no queue
+    wal      - the connection pragmas only
+    queue    - the pragmas and the single writer queue
+Meanwhile --processes other processes write batches of messages, the way
+the celery worker and the bot share the file with the api.
+"database is locked" and other failures are counted as errors.
+
+    python -m benchmarks.sqlite_writes --clients 50 --operations 2000 --writes 0.2 --processes 2
+'''
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import random
+import sqlite3
+from datetime import datetime, timezone
+from statistics import median, quantiles
+from time import sleep
+
+from sqlalchemy import event, make_url, update
+
+from server.common.db import DataBaseConfiguration, User
+from server.common.db.sqlite_writer import apply_sqlite_pragmas
+from server.common.utils.logger import logger
+from server.chats.repository.service_chat_repository import ServiceChatRepository
+from server.messages.repositories.service_message_repository import ServiceMessageRepository
+from server.services.repositories import ServiceRepository
+
+from ._common import Timer, bench_db_url, report
+from .index_advisor import seed
+
+PROFILES = ('baseline', 'wal', 'queue')
+
+
+def _foreign_keys_only(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+
+def database(profile: str) -> DataBaseConfiguration:
+    db = DataBaseConfiguration(bench_db_url(f'sqlite_writes_{profile}'))
+    if profile == 'baseline':
+        event.remove(db.engine.sync_engine, 'connect', apply_sqlite_pragmas)
+        event.listen(db.engine.sync_engine, 'connect', _foreign_keys_only)
+    if profile != 'queue':
+        db.write_queue = None
+        db.Session.configure(info={})
+    return db
+
+
+def background_writer(path: str, profile: str, ids: dict, stop, errors) -> None:
+    connection = sqlite3.connect(path)
+    if profile == 'baseline':
+        _foreign_keys_only(connection, None)
+    else:
+        apply_sqlite_pragmas(connection, None)
+
+    # a chat the clients do not read, its growth would slow the reads down
+    rows = [('background', ids['support_chat_id'], ids['user_id'],
+             datetime.now(timezone.utc).isoformat())] * 50
+    while not stop.is_set():
+        try:
+            with connection:
+                connection.executemany(
+                    'INSERT INTO support_messages (content, chat_id, sender_id, created_at) '
+                    'VALUES (?, ?, ?, ?)', rows)
+        except sqlite3.OperationalError:
+            with errors.get_lock():
+                errors.value += 1
+        sleep(0.05)
+    connection.close()
+
+
+async def read(db, ids: dict, rng: random.Random) -> None:
+    async with db.ReadSession() as session:
+        if rng.random() < 0.5:
+            await ServiceRepository(session).get_all_by_category_name(f'tag-{rng.randrange(50)}')
+        else:
+            await ServiceChatRepository(session).get_detail_by_user_chat_id(
+                ids['user_id'], ids['service_chat_id'])
+
+
+async def send_message(db, ids: dict, rng: random.Random) -> None:
+    await db.write(lambda session: ServiceMessageRepository(session).create_service_message(
+        'bench', ids['user_id'], ids['service_chat_id']))
+
+
+async def update_profile(db, ids: dict, rng: random.Random) -> None:
+    async with db.Session() as session:
+        await session.execute(
+            update(User).where(User.id == ids['user_id'])
+            .values(about=f'about {rng.random()}'))
+        await session.commit()
+
+
+async def run(db, ids: dict, clients: int, operations: int, writes: float) -> dict:
+    rng = random.Random(7)
+    plan = [
+        (send_message if rng.random() < 0.7 else update_profile)
+        if rng.random() < writes else read
+        for _ in range(operations)
+    ]
+    latencies = {'read': [], 'write': []}
+    errors = {}
+    limit = asyncio.Semaphore(clients)
+
+    async def one(operation) -> None:
+        async with limit:
+            with Timer() as timer:
+                try:
+                    await operation(db, ids, rng)
+                except Exception as e:
+                    name = type(e).__name__
+                    errors[name] = errors.get(name, 0) + 1
+                    return
+            kind = 'read' if operation is read else 'write'
+            latencies[kind].append(timer.elapsed * 1000)
+
+    with Timer() as total:
+        await asyncio.gather(*(one(operation) for operation in plan))
+
+    def p95(values):
+        return round(quantiles(values, n=20)[18], 1) if len(values) > 1 else None
+
+    return {
+        'ops/s': round(sum(map(len, latencies.values())) / total.elapsed, 1),
+        'read p50/p95, ms': (round(median(latencies['read']), 1) if latencies['read'] else None,
+                             p95(latencies['read'])),
+        'write p50/p95, ms': (round(median(latencies['write']), 1) if latencies['write'] else None,
+                              p95(latencies['write'])),
+        'errors': errors or 0,
+    }
+
+
+async def main(rows: int, clients: int, operations: int, writes: float, processes: int) -> None:
+    logger.setLevel(logging.ERROR)
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    for profile in PROFILES:
+        db = database(profile)
+        await db.migrate()
+        ids = await seed(db, rows)
+
+        stop, background_errors = context.Event(), context.Value('i', 0)
+        writers = [
+            context.Process(target=background_writer, args=(
+                make_url(db.db_url).database, profile, ids, stop, background_errors))
+            for _ in range(processes)
+        ]
+        for writer in writers:
+            writer.start()
+        try:
+            results[profile] = await run(db, ids, clients, operations, writes)
+        finally:
+            stop.set()
+            for writer in writers:
+                writer.join()
+        results[profile]['background errors'] = background_errors.value
+        await db.engine.dispose()
+
+    report('sqlite mixed read/write', {
+        'rows per table': rows,
+        'clients': clients,
+        'operations': operations,
+        'write share': writes,
+        'background writer processes': processes,
+        **{
+            profile: ', '.join(f'{key} {value}' for key, value in stats.items())
+            for profile, stats in results.items()
+        },
+    })
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=2_000)
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--operations', type=int, default=2_000)
+    parser.add_argument('--writes', type=float, default=0.2)
+    parser.add_argument('--processes', type=int, default=2)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.clients, args.operations, args.writes, args.processes))
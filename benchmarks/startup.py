@@ -0,0 +1,70 @@
+'''
+Benchmark for the database work done by every worker at startup.
+Boots N workers against an already migrated schema, each with its own
+engine like a fresh uvicorn process, and times the old create_all in
+lifespan against the alembic_version check that replaced it.
+
+    python -m benchmarks.startup --workers 8
+'''
+import argparse
+import asyncio
+from statistics import median
+
+from sqlalchemy import text
+
+from server.common.db import DataBaseConfiguration
+from server.common.utils.schema_version import alembic_heads, ensure_schema
+
+from ._common import Timer, bench_db_url, report
+
+
+async def stamp_head(db) -> None:
+    async with db.engine.begin() as conn:
+        await conn.execute(text('DROP TABLE IF EXISTS alembic_version'))
+        await conn.execute(text(
+            'CREATE TABLE alembic_version (version_num VARCHAR(32) PRIMARY KEY)'))
+        for head in alembic_heads():
+            await conn.execute(text('INSERT INTO alembic_version VALUES (:head)'),
+                               {'head': head})
+
+
+async def boot(url: str, mode: str) -> float:
+    db = DataBaseConfiguration(url)
+    with Timer() as startup:
+        await ensure_schema(db, mode)
+    await db.engine.dispose()
+    return startup.elapsed
+
+
+async def main(workers: int) -> None:
+    url = bench_db_url('startup')
+    db = DataBaseConfiguration(url)
+    await db.migrate()
+    await stamp_head(db)
+    await db.engine.dispose()
+
+    # the revision files are parsed once per process, keep it out of the loop
+    alembic_heads.cache_clear()
+    with Timer() as heads:
+        alembic_heads()
+
+    timings = {}
+    for mode in ('create', 'strict'):
+        timings[mode] = [await boot(url, mode) for _ in range(workers)]
+
+    report('startup schema work per worker', {
+        'backend': db.engine.dialect.name,
+        'workers': workers,
+        'reading migration heads, ms': round(heads.elapsed * 1000, 1),
+        'create_all median, ms': round(median(timings['create']) * 1000, 1),
+        'create_all total, ms': round(sum(timings['create']) * 1000, 1),
+        'version check median, ms': round(median(timings['strict']) * 1000, 1),
+        'version check total, ms': round(sum(timings['strict']) * 1000, 1),
+    })
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.workers))
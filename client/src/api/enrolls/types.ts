@@ -1,6 +1,7 @@
 export interface CreateEnrollModel {
     service_id: number;
-    service_date_id: number;
+    service_date_id: number | null;
+    date?: string; // dd-mm-YYYY, когда service_date_id еще нет
     slot_time: string;
     price: number;
 }
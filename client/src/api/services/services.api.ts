@@ -1,13 +1,23 @@
 import { API } from '../client';
 import type {
-    ServiceResponse,
     DetailServiceResponse,
     CreateServiceModel,
-    PatchServiceModel
+    PatchServiceModel,
+    ServiceCatalogQuery,
+    ServiceCardPageResponse,
+    ServiceCardResponse
 } from './types';
 
 export const servicesApi = {
-    getAll: () => API.get<ServiceResponse[]>('/services'),
+    getPage: (query: ServiceCatalogQuery = {}) =>
+        API.get<ServiceCardPageResponse>('/services/', {
+            params: query,
+            // tags=a&tags=b, the way FastAPI reads a list
+            paramsSerializer: { indexes: null },
+        }),
+    // full text search, the most relevant first, q is at least 2 characters
+    search: (q: string, limit: number = 20) =>
+        API.get<ServiceCardResponse[]>('/services/search', { params: { q, limit } }),
     getDetail: (serviceId: number) =>
         API.get<DetailServiceResponse>(`/services/detail/${serviceId}`),
     
@@ -7,5 +7,8 @@ export type {
     SimpleServiceUserEnroll,
     SimpleServiceUserResponse,
     CreateServiceModel,
-    PatchServiceModel
+    PatchServiceModel,
+    ServiceCatalogQuery,
+    ServiceCardResponse,
+    ServiceCardPageResponse
 } from '../../types/service.types';
@@ -1,7 +1,7 @@
 import React from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import { Card, CardContent } from '../../../components/ui/Card';
-import type { ServiceResponse } from '../../../types/service.types';
+import type { ServiceCardResponse } from '../../../types/service.types';
 
 const priceFormatter = new Intl.NumberFormat('ru-RU', {
     style: 'currency',
@@ -10,8 +10,8 @@ const priceFormatter = new Intl.NumberFormat('ru-RU', {
 });
 
 interface ServiceCardProps {
-    service: ServiceResponse;
-    onSelect?: (service: ServiceResponse) => void;
+    service: ServiceCardResponse;
+    onSelect?: (service: ServiceCardResponse) => void;
 }
 
 export const ServiceCard: React.FC<ServiceCardProps> = ({ service }) => {
@@ -27,21 +27,21 @@ export const ServiceCard: React.FC<ServiceCardProps> = ({ service }) => {
     };
 
     const coverImage = React.useMemo(() => {
-        if (service.photo?.startsWith('http')) {
-            return service.photo;
+        if (service.thumbnail?.startsWith('http')) {
+            return service.thumbnail;
         }
-        if (service.photo?.startsWith('data:') || service.photo?.startsWith('blob:')) {
-            return service.photo;
+        if (service.thumbnail?.startsWith('data:') || service.thumbnail?.startsWith('blob:')) {
+            return service.thumbnail;
         }
-        if (service.photo) {
+        if (service.thumbnail) {
             const baseStatic =
                 import.meta.env.VITE_STATIC_URL ||
                 import.meta.env.VITE_API_URL?.replace('/api/v1', '') ||
                 '';
-            return `${baseStatic}${service.photo}`;
+            return `${baseStatic}${service.thumbnail}`;
         }
         return null;
-    }, [service.photo]);
+    }, [service.thumbnail]);
 
     return (
         <Card className="service-card">
@@ -1,16 +1,16 @@
 import { useCallback, useEffect, useState } from 'react';
-import type { ServiceResponse } from '../../../types/service.types';
+import type { ServiceCardResponse } from '../../../types/service.types';
 import { servicesApi } from '../../../api/services/services.api';
 
 interface UseServicesResult {
-    services: ServiceResponse[];
+    services: ServiceCardResponse[];
     isLoading: boolean;
     error: string | null;
     refresh: () => Promise<void>;
 }
 
 export const useServices = (): UseServicesResult => {
-    const [services, setServices] = useState<ServiceResponse[]>([]);
+    const [services, setServices] = useState<ServiceCardResponse[]>([]);
     const [isLoading, setIsLoading] = useState(false);
     const [error, setError] = useState<string | null>(null);
 
@@ -18,8 +18,15 @@ export const useServices = (): UseServicesResult => {
         setIsLoading(true);
         setError(null);
         try {
-            const { data } = await servicesApi.getAll();
-            setServices(data);
+            // страницы по курсору, карточки показываются по мере загрузки
+            const loaded: ServiceCardResponse[] = [];
+            let cursor: string | undefined;
+            do {
+                const { data } = await servicesApi.getPage({ limit: 100, cursor });
+                loaded.push(...data.items);
+                setServices([...loaded]);
+                cursor = data.next_cursor ?? undefined;
+            } while (cursor);
         } catch (err) {
             const message =
                 err instanceof Error ? err.message : 'Не удалось загрузить услуги';
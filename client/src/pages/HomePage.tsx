@@ -31,8 +31,8 @@ export const HomePage: React.FC = () => {
             const serviceTags = (service.tags || [])
                 .map(tag => tag.title.toLowerCase());
             
-            // Поиск по названию и описанию
-            const searchableText = [service.title, service.description]
+            // Поиск по названию, описание есть только в детальной карточке
+            const searchableText = [service.title]
                 .filter(Boolean)
                 .join(' ')
                 .toLowerCase();
@@ -54,7 +54,7 @@ export const ServiceDetailPage: React.FC = () => {
     const [service, setService] = useState<DetailServiceResponse | null>(null);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState<string | null>(null);
-    const [bookingSlot, setBookingSlot] = useState<{ dateId: number; slotTime: string } | null>(null);
+    const [bookingSlot, setBookingSlot] = useState<{ dateId: number | null; date: string; slotTime: string } | null>(null);
     const [isBooking, setIsBooking] = useState(false);
     const [bookingError, setBookingError] = useState<string | null>(null);
     const [bookingSuccess, setBookingSuccess] = useState(false);
@@ -194,7 +194,8 @@ export const ServiceDetailPage: React.FC = () => {
         }
     };
 
-    const handleSlotClick = (dateId: number, slotTime: string, status: string, dateString?: string) => {
+    // dateId is null for a day resolved from the master's templates, it is booked by date
+    const handleSlotClick = (dateId: number | null, slotTime: string, status: string, dateString: string) => {
         if (isOwner) {
             setBookingError('Владелец услуги не может записываться на свою услугу');
             return;
@@ -239,7 +240,7 @@ export const ServiceDetailPage: React.FC = () => {
             }
         }
         
-        setBookingSlot({ dateId, slotTime });
+        setBookingSlot({ dateId, date: dateString, slotTime });
         setBookingError(null);
         setBookingSuccess(false);
     };
@@ -262,6 +263,7 @@ export const ServiceDetailPage: React.FC = () => {
         const validation = validateBookingData({
             service_id: service.id,
             service_date_id: bookingSlot.dateId,
+            date: bookingSlot.date,
             slot_time: bookingSlot.slotTime,
             price: service.price // Отправляем для совместимости, но сервер должен проверять
         });
@@ -282,6 +284,7 @@ export const ServiceDetailPage: React.FC = () => {
             const response = await enrollsApi.create({
                 service_id: service.id,
                 service_date_id: bookingSlot.dateId,
+                date: bookingSlot.dateId === null ? bookingSlot.date : undefined,
                 slot_time: bookingSlot.slotTime,
                 price: service.price // Сервер должен игнорировать это и брать из БД
             });
@@ -543,7 +546,7 @@ export const ServiceDetailPage: React.FC = () => {
                             ) : (
                                 <div className="service-schedule-list">
                                     {service.dates.map((dateItem) => (
-                                        <div key={dateItem.id} className="service-date-card">
+                                        <div key={dateItem.id ?? dateItem.date} className="service-date-card">
                                             <h3 className="service-date-title">
                                                 {formatDate(dateItem.date)}
                                             </h3>
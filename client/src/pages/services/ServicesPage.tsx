@@ -55,7 +55,7 @@ export const ServicesPage: React.FC = () => {
             }
             
             // Обычный поиск - ищем по тэгам и тексту
-            const searchableText = [service.title, service.description]
+            const searchableText = [service.title]
                 .filter(Boolean)
                 .join(' ')
                 .toLowerCase();
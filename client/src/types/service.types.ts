@@ -6,9 +6,35 @@ export interface ServiceResponse {
     price: number;
     photo: string;
     certificate: string;
+    photo_variants?: Record<string, Record<string, string>>;
     tags: SimpleServiceTagResponse[];
 }
 
+export interface ServiceCatalogQuery {
+    sort?: 'newest' | 'price_asc' | 'price_desc';
+    price_min?: number;
+    price_max?: number;
+    tags?: string[];
+    tags_mode?: 'any' | 'all';
+    master_id?: number;
+    cursor?: string;
+    limit?: number;
+}
+
+export interface ServiceCardResponse {
+    id: number;
+    title: string;
+    price: number;
+    user_id: number;
+    thumbnail: string;
+    tags: SimpleServiceTagResponse[];
+}
+
+export interface ServiceCardPageResponse {
+    items: ServiceCardResponse[];
+    next_cursor: string | null;
+}
+
 export interface SimpleServiceTemplateResponse {
     id: number;
     day: string;
@@ -18,7 +44,7 @@ export interface SimpleServiceTemplateResponse {
 }
 
 export interface SimpleServiceDateResponse {
-    id: number;
+    id: number | null; // null для дня из шаблона, который еще не сохранен
     date: string;
     slots: Record<string, string>;
 }
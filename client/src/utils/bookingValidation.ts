@@ -87,7 +87,8 @@ export function canBookSlot(status: string, dateString?: string): { canBook: boo
  */
 export function validateBookingData(data: {
     service_id: number;
-    service_date_id: number;
+    service_date_id: number | null;
+    date?: string;
     slot_time: string;
     price?: number;
 }): { valid: boolean; error?: string } {
@@ -96,8 +97,12 @@ export function validateBookingData(data: {
         return { valid: false, error: 'Некорректный ID услуги' };
     }
 
-    // Проверка service_date_id
-    if (!data.service_date_id || !Number.isInteger(data.service_date_id) || data.service_date_id <= 0) {
+    // Проверка service_date_id, день из шаблона записывается по дате
+    if (data.service_date_id === null) {
+        if (!data.date) {
+            return { valid: false, error: 'Не указана дата услуги' };
+        }
+    } else if (!Number.isInteger(data.service_date_id) || data.service_date_id <= 0) {
         return { valid: false, error: 'Некорректный ID даты услуги' };
     }
 
@@ -1,9 +1,12 @@
+import asyncio
 from logging.config import fileConfig
 
 from alembic import context
 from sqlalchemy import create_engine, pool
+from sqlalchemy.ext.asyncio import create_async_engine
 
 from server.common.db import Base, db_config
+from server.common.db.models.search import SERVICE_SEARCH_TABLE
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -30,6 +33,14 @@ def make_sync_url(async_url: str) -> str:
     return async_url
 
 
+def include_name(name, type_, parent_names) -> bool:
+    # the search index is not in the metadata: the fts5 table with its
+    # shadow tables on sqlite, the tsvector table on postgres
+    if type_ == "table":
+        return not name.startswith(SERVICE_SEARCH_TABLE)
+    return True
+
+
 def run_migrations_offline() -> None:
     url = make_sync_url(db_config.db_url)
     config.set_main_option("sqlalchemy.url", url)
@@ -43,13 +54,41 @@ def run_migrations_offline() -> None:
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
         render_as_batch=is_sqlite,
+        include_name=include_name,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection, is_sqlite: bool) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        compare_type=True,
+        render_as_batch=is_sqlite,
+        include_name=include_name,
     )
 
     with context.begin_transaction():
         context.run_migrations()
 
 
+async def run_async_migrations(url: str) -> None:
+    connectable = create_async_engine(url, poolclass=pool.NullPool)
+
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations, False)
+
+    await connectable.dispose()
+
+
 def run_migrations_online() -> None:
+    # asyncpg is the postgres driver of the app, migrate through it too
+    if db_config.db_url.startswith("postgresql+asyncpg://"):
+        asyncio.run(run_async_migrations(db_config.db_url))
+        return
+
     url = make_sync_url(db_config.db_url)
     config.set_main_option("sqlalchemy.url", url)
 
@@ -62,15 +101,7 @@ def run_migrations_online() -> None:
     is_sqlite = url.startswith("sqlite://")
 
     with connectable.connect() as connection:
-        context.configure(
-            connection=connection,
-            target_metadata=target_metadata,
-            compare_type=True,
-            render_as_batch=is_sqlite,
-        )
-
-        with context.begin_transaction():
-            context.run_migrations()
+        do_run_migrations(connection, is_sqlite)
 
 
 if context.is_offline_mode():
@@ -0,0 +1,84 @@
+"""enroll_deadlines for auto-cancel and auto-capture
+
+Revision ID: 4d7a2e91c5f3
+Revises: b81e4a6d0c35
+Create Date: 2026-10-17 18:21:07.331845
+
+"""
+from datetime import datetime, timedelta, timezone
+from os import getenv
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d7a2e91c5f3'
+down_revision: Union[str, Sequence[str], None] = 'b81e4a6d0c35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+service_enrolls = sa.table(
+    'service_enrolls',
+    sa.column('id', sa.Integer),
+    sa.column('status', sa.String),
+    sa.column('created_at', sa.DateTime),
+)
+
+# status -> (action, delay), the hourly scans measured the delay from created_at
+STATUS_DEADLINES = {
+    'pending': ('auto_cancel', timedelta(days=int(getenv('AUTO_CANCEL_PENDING_DAYS', '2')))),
+    'ready': ('auto_capture', timedelta(days=int(getenv('AUTO_CAPTURE_READY_DAYS', '3')))),
+}
+
+
+def _chunks(bind, stmt, key, size: int = 1000):
+    # keyset chunks instead of a server side cursor, an open asyncpg portal
+    # keeps the table busy for the ALTER TABLE that follows on postgres
+    last = 0
+    while chunk := bind.execute(stmt.where(key > last).order_by(key).limit(size)).all():
+        yield chunk
+        last = chunk[-1][0]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    enroll_deadlines = op.create_table(
+        'enroll_deadlines',
+        sa.Column('action', sa.String(length=16), nullable=False),
+        sa.Column('due_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('enroll_id', sa.Integer(), nullable=False),
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['enroll_id'], ['service_enrolls.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('enroll_id'),
+    )
+    op.create_index('ix_enroll_deadlines_due_at', 'enroll_deadlines', ['due_at'])
+
+    # arm the enrolls already waiting, overdue ones run on the first drain
+    now = datetime.now(timezone.utc)
+    bind = op.get_bind()
+    waiting = (
+        sa.select(service_enrolls.c.id, service_enrolls.c.status, service_enrolls.c.created_at)
+        .where(service_enrolls.c.status.in_(list(STATUS_DEADLINES)))
+    )
+    for chunk in _chunks(bind, waiting, service_enrolls.c.id):
+        rows = []
+        for enroll_id, status, created_at in chunk:
+            action, delay = STATUS_DEADLINES[status]
+            if created_at is None:
+                due_at = now
+            else:
+                due_at = (created_at if created_at.tzinfo
+                          else created_at.replace(tzinfo=timezone.utc)) + delay
+            rows.append({'enroll_id': enroll_id, 'action': action, 'due_at': due_at})
+        if rows:
+            bind.execute(enroll_deadlines.insert(), rows)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_enroll_deadlines_due_at', table_name='enroll_deadlines')
+    op.drop_table('enroll_deadlines')
@@ -0,0 +1,126 @@
+"""normalized service_slots table instead of dates.slots json
+
+Revision ID: 52687c8968c3
+Revises: 22760cb69ede
+Create Date: 2026-10-17 10:12:41.204377
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '52687c8968c3'
+down_revision: Union[str, Sequence[str], None] = '22760cb69ede'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+dates = sa.table(
+    'dates',
+    sa.column('id', sa.Integer),
+    sa.column('slots', sa.JSON),
+)
+
+service_slots = sa.table(
+    'service_slots',
+    sa.column('id', sa.Integer),
+    sa.column('service_date_id', sa.Integer),
+    sa.column('slot_time', sa.String),
+    sa.column('status', sa.String),
+    sa.column('enroll_id', sa.Integer),
+)
+
+
+def _chunks(bind, stmt, key, size: int = 1000):
+    # keyset chunks instead of a server side cursor, an open asyncpg portal
+    # keeps the table busy for the ALTER TABLE that follows on postgres
+    last = 0
+    while chunk := bind.execute(stmt.where(key > last).order_by(key).limit(size)).all():
+        yield chunk
+        last = chunk[-1][0]
+
+
+def _load_slots(raw) -> dict:
+    if not raw:
+        return {}
+    if isinstance(raw, str):
+        return json.loads(raw)
+    return raw
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'service_slots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('slot_time', sa.String(length=5), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('service_date_id', sa.Integer(), nullable=False),
+        sa.Column('enroll_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['service_date_id'], ['dates.id']),
+        sa.ForeignKeyConstraint(['enroll_id'], ['service_enrolls.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ux_service_slots_date_slot', 'service_slots',
+                    ['service_date_id', 'slot_time'], unique=True)
+    op.create_index('ix_service_slots_enroll_id',
+                    'service_slots', ['enroll_id'])
+
+    # move every blob into rows, in chunks so big tables do not sit in memory
+    bind = op.get_bind()
+    for chunk in _chunks(bind, sa.select(dates.c.id, dates.c.slots), dates.c.id):
+        rows = [
+            {
+                'service_date_id': date_id,
+                'slot_time': slot_time,
+                'status': status,
+            }
+            for date_id, raw in chunk
+            for slot_time, status in _load_slots(raw).items()
+        ]
+        if rows:
+            bind.execute(service_slots.insert(), rows)
+
+    # link slots to the enroll that currently holds them
+    op.execute(
+        """
+        UPDATE service_slots SET enroll_id = (
+            SELECT service_enrolls.id FROM service_enrolls
+            WHERE service_enrolls.service_date_id = service_slots.service_date_id
+              AND service_enrolls.slot_time = service_slots.slot_time
+              AND service_enrolls.status NOT IN ('cancelled', 'expired')
+        )
+        """
+    )
+
+    with op.batch_alter_table('dates', schema=None) as batch_op:
+        batch_op.drop_column('slots')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('dates', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('slots', sa.JSON(), nullable=True))
+
+    bind = op.get_bind()
+    blobs = {}
+    for date_id, slot_time, status in bind.execute(
+        sa.select(
+            service_slots.c.service_date_id,
+            service_slots.c.slot_time,
+            service_slots.c.status)
+        .order_by(service_slots.c.service_date_id, service_slots.c.slot_time)
+    ):
+        blobs.setdefault(date_id, {})[slot_time] = status
+
+    for date_id, slots in blobs.items():
+        bind.execute(
+            dates.update().where(dates.c.id == date_id).values(slots=slots))
+
+    op.drop_index('ix_service_slots_enroll_id', table_name='service_slots')
+    op.drop_index('ux_service_slots_date_slot', table_name='service_slots')
+    op.drop_table('service_slots')
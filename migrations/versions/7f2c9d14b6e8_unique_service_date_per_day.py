@@ -0,0 +1,84 @@
+"""unique service date per service and day
+
+Revision ID: 7f2c9d14b6e8
+Revises: e3b41f7c0a92
+Create Date: 2026-10-17 15:21:09.337140
+
+"""
+from itertools import groupby
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f2c9d14b6e8'
+down_revision: Union[str, Sequence[str], None] = 'e3b41f7c0a92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+dates = sa.table(
+    'dates',
+    sa.column('id', sa.Integer),
+    sa.column('service_id', sa.Integer),
+    sa.column('date', sa.Date),
+)
+
+service_slots = sa.table(
+    'service_slots',
+    sa.column('service_date_id', sa.Integer),
+)
+
+service_enrolls = sa.table(
+    'service_enrolls',
+    sa.column('service_date_id', sa.Integer),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # reruns of the old generator left duplicates behind,
+    # keep the date that has enrolls (or the oldest one) and drop the rest
+    bind = op.get_bind()
+    duplicated = (
+        sa.select(dates.c.service_id, dates.c.date)
+        .group_by(dates.c.service_id, dates.c.date)
+        .having(sa.func.count() > 1)
+        .subquery()
+    )
+    has_enrolls = sa.exists().where(
+        service_enrolls.c.service_date_id == dates.c.id)
+    rows = bind.execute(
+        sa.select(dates.c.id, dates.c.service_id, dates.c.date, has_enrolls)
+        .join(duplicated, sa.and_(
+            duplicated.c.service_id == dates.c.service_id,
+            duplicated.c.date == dates.c.date))
+        .order_by(dates.c.service_id, dates.c.date, dates.c.id)
+    ).all()
+
+    obsolete_ids = []
+    for (service_id, day), group in groupby(rows, key=lambda row: (row[1], row[2])):
+        group = list(group)
+        booked = [row for row in group if row[3]]
+        if len(booked) > 1:
+            raise RuntimeError(
+                f'dates {[row[0] for row in booked]} of service {service_id} '
+                f'on {day} all have enrolls, merge them before upgrading')
+        keep_id = (booked or group)[0][0]
+        obsolete_ids.extend(row[0] for row in group if row[0] != keep_id)
+
+    for start in range(0, len(obsolete_ids), 1000):
+        chunk = obsolete_ids[start:start + 1000]
+        bind.execute(service_slots.delete().where(
+            service_slots.c.service_date_id.in_(chunk)))
+        bind.execute(dates.delete().where(dates.c.id.in_(chunk)))
+
+    op.create_index('ux_dates_service_date', 'dates',
+                    ['service_id', 'date'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_dates_service_date', table_name='dates')
@@ -0,0 +1,57 @@
+"""cascade service and chat children on delete
+
+Revision ID: 83035137f1b8
+Revises: afacf0de4f2f
+Create Date: 2026-10-17 00:52:10.417385
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '83035137f1b8'
+down_revision: Union[str, Sequence[str], None] = 'afacf0de4f2f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, column, referred table, ON DELETE)
+FOREIGN_KEYS = (
+    ('scheduletemplates', 'service_id', 'services', 'CASCADE'),
+    ('dates', 'service_id', 'services', 'CASCADE'),
+    ('service_slots', 'service_date_id', 'dates', 'CASCADE'),
+    ('service_slots', 'enroll_id', 'service_enrolls', 'SET NULL'),
+    ('service_enrolls', 'service_id', 'services', 'CASCADE'),
+    ('service_enrolls', 'service_date_id', 'dates', 'CASCADE'),
+    ('payments', 'enroll_id', 'service_enrolls', 'CASCADE'),
+    ('services_tag_connections', 'service_id', 'services', 'CASCADE'),
+    ('service_chats', 'service_id', 'services', 'CASCADE'),
+    ('service_messages', 'chat_id', 'service_chats', 'CASCADE'),
+    ('support_messages', 'chat_id', 'support_chats', 'CASCADE'),
+    ('dispute_messages', 'chat_id', 'dispute_chats', 'CASCADE'),
+)
+
+# postgres default names, sqlite gets them for its unnamed reflected constraints
+NAMING_CONVENTION = {'fk': '%(table_name)s_%(column_0_name)s_fkey'}
+
+
+def _replace_foreign_keys(cascade: bool) -> None:
+    for table, column, referred, ondelete in FOREIGN_KEYS:
+        name = f'{table}_{column}_fkey'
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.drop_constraint(name, type_='foreignkey')
+            batch_op.create_foreign_key(
+                name, referred, [column], ['id'],
+                ondelete=ondelete if cascade else None)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _replace_foreign_keys(cascade=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _replace_foreign_keys(cascade=False)
@@ -0,0 +1,47 @@
+"""dates free_mask availability index
+
+Revision ID: 9c41e07b2d5a
+Revises: 52687c8968c3
+Create Date: 2026-10-17 12:40:03.518262
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c41e07b2d5a'
+down_revision: Union[str, Sequence[str], None] = '52687c8968c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('dates', schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column('free_mask', sa.Integer(), server_default='0', nullable=False))
+
+    # bit N is set when slot 'NN:00' is available and not held by an enroll
+    op.execute(
+        """
+        UPDATE dates SET free_mask = COALESCE((
+            SELECT SUM(1 << CAST(substr(service_slots.slot_time, 1, 2) AS INTEGER))
+            FROM service_slots
+            WHERE service_slots.service_date_id = dates.id
+              AND service_slots.status = 'available'
+              AND service_slots.enroll_id IS NULL
+        ), 0)
+        """
+    )
+
+    op.create_index('ix_dates_date_free_mask', 'dates', ['date', 'free_mask'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_dates_date_free_mask', table_name='dates')
+    with op.batch_alter_table('dates', schema=None) as batch_op:
+        batch_op.drop_column('free_mask')
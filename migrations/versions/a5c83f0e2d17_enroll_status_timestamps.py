@@ -0,0 +1,69 @@
+"""service_enrolls per-status timestamps and cutoff indexes
+
+Revision ID: a5c83f0e2d17
+Revises: 4d7a2e91c5f3
+Create Date: 2026-10-17 19:04:52.610377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5c83f0e2d17'
+down_revision: Union[str, Sequence[str], None] = '4d7a2e91c5f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+STATUS_TIMESTAMPS = {
+    'pending': 'pending_at',
+    'confirmed': 'confirmed_at',
+    'ready': 'ready_at',
+    'completed': 'completed_at',
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('service_enrolls', schema=None) as batch_op:
+        for column in STATUS_TIMESTAMPS.values():
+            batch_op.add_column(
+                sa.Column(column, sa.DateTime(timezone=True), nullable=True))
+
+    # the moment of the last transition is unknown for existing rows,
+    # created_at is the closest value the old cutoffs used as well
+    service_enrolls = sa.table(
+        'service_enrolls',
+        sa.column('status', sa.String),
+        sa.column('created_at', sa.DateTime),
+        *(sa.column(column, sa.DateTime(timezone=True))
+          for column in STATUS_TIMESTAMPS.values())
+    )
+    for status, column in STATUS_TIMESTAMPS.items():
+        op.execute(
+            service_enrolls.update()
+            .where(service_enrolls.c.status == status)
+            .values({column: service_enrolls.c.created_at})
+        )
+
+    op.create_index('ix_service_enrolls_status_created_at',
+                    'service_enrolls', ['status', 'created_at'])
+    for column in STATUS_TIMESTAMPS.values():
+        op.create_index(f'ix_service_enrolls_status_{column}',
+                        'service_enrolls', ['status', column])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in STATUS_TIMESTAMPS.values():
+        op.drop_index(f'ix_service_enrolls_status_{column}',
+                      table_name='service_enrolls')
+    op.drop_index('ix_service_enrolls_status_created_at',
+                  table_name='service_enrolls')
+
+    with op.batch_alter_table('service_enrolls', schema=None) as batch_op:
+        for column in STATUS_TIMESTAMPS.values():
+            batch_op.drop_column(column)
@@ -0,0 +1,60 @@
+"""index pack for repository lookups
+
+Revision ID: afacf0de4f2f
+Revises: c19e6b3f8a42
+Create Date: 2026-10-17 00:37:43.138195
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'afacf0de4f2f'
+down_revision: Union[str, Sequence[str], None] = 'c19e6b3f8a42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index, table, columns), each one backs a repository filter
+# that used to scan the whole table
+INDEXES = (
+    ('ix_users_name', 'users', ['name']),
+    ('ix_users_email', 'users', ['email']),
+    ('ix_users_telegram_id', 'users', ['telegram_id']),
+    ('ix_services_user_id', 'services', ['user_id']),
+    ('ix_service_enrolls_user_id_service_id', 'service_enrolls', ['user_id', 'service_id']),
+    ('ix_service_enrolls_service_id_id', 'service_enrolls', ['service_id', 'id']),
+    ('ix_payments_enroll_id', 'payments', ['enroll_id']),
+    ('ix_disputes_status_created_at', 'disputes', ['disput_status', 'created_at']),
+    ('ix_disputes_client_id', 'disputes', ['client_id']),
+    ('ix_disputes_master_id', 'disputes', ['master_id']),
+    ('ix_disputes_arbitr_id', 'disputes', ['arbitr_id']),
+    ('ix_disputes_enroll_id', 'disputes', ['enroll_id']),
+    ('ix_service_messages_chat_id_created_at', 'service_messages', ['chat_id', 'created_at']),
+    ('ix_support_messages_chat_id_created_at', 'support_messages', ['chat_id', 'created_at']),
+    ('ix_dispute_messages_chat_id_created_at', 'dispute_messages', ['chat_id', 'created_at']),
+    ('ix_service_chats_client_id', 'service_chats', ['client_id']),
+    ('ix_support_chats_support_id', 'support_chats', ['support_id']),
+    ('ix_dispute_chats_master_id', 'dispute_chats', ['master_id']),
+    ('ix_dispute_chats_client_id', 'dispute_chats', ['client_id']),
+    ('ix_dispute_chats_arbitr_id', 'dispute_chats', ['arbitr_id']),
+    ('ix_scheduletemplates_service_id_user_id', 'scheduletemplates', ['service_id', 'user_id']),
+    ('ix_scheduletemplates_user_id', 'scheduletemplates', ['user_id']),
+    ('ix_tags_title', 'tags', ['title']),
+    ('ix_tags_user_id', 'tags', ['user_id']),
+    ('ix_services_tag_connections_tag_id', 'services_tag_connections', ['tag_id']),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,112 @@
+"""services full text search
+
+Revision ID: b7e2c94d1f06
+Revises: e3d4f7cad7aa
+Create Date: 2026-10-17 14:08:51.203114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2c94d1f06'
+down_revision: Union[str, Sequence[str], None] = 'e3d4f7cad7aa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# the index as it is at this revision, later changes to the models
+# must not change what this migration builds
+def _fold(column: str) -> str:
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def _sqlite_tags(service_id: str) -> str:
+    return _fold(
+        "coalesce((SELECT group_concat(tags.title, ' ') FROM services_tag_connections "
+        "JOIN tags ON tags.id = services_tag_connections.tag_id "
+        f"WHERE services_tag_connections.service_id = {service_id}), '')"
+    )
+
+
+SQLITE_TRIGGERS = (
+    'services_search_insert',
+    'services_search_update',
+    'services_search_delete',
+    'services_search_tag_insert',
+    'services_search_tag_delete',
+    'services_search_tag_rename',
+)
+
+SQLITE_UPGRADE = (
+    "CREATE VIRTUAL TABLE services_search USING fts5("
+    "title, description, tags, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+
+    "CREATE TRIGGER services_search_insert AFTER INSERT ON services BEGIN "
+    "INSERT INTO services_search (rowid, title, description, tags) "
+    f"VALUES (new.id, {_fold('new.title')}, {_fold('new.description')}, ''); END",
+
+    "CREATE TRIGGER services_search_update AFTER UPDATE OF title, description ON services BEGIN "
+    f"UPDATE services_search SET title = {_fold('new.title')}, description = {_fold('new.description')} "
+    "WHERE rowid = new.id; END",
+
+    "CREATE TRIGGER services_search_delete AFTER DELETE ON services BEGIN "
+    "DELETE FROM services_search WHERE rowid = old.id; END",
+
+    "CREATE TRIGGER services_search_tag_insert AFTER INSERT ON services_tag_connections BEGIN "
+    f"UPDATE services_search SET tags = {_sqlite_tags('new.service_id')} "
+    "WHERE rowid = new.service_id; END",
+
+    "CREATE TRIGGER services_search_tag_delete AFTER DELETE ON services_tag_connections BEGIN "
+    f"UPDATE services_search SET tags = {_sqlite_tags('old.service_id')} "
+    "WHERE rowid = old.service_id; END",
+
+    "CREATE TRIGGER services_search_tag_rename AFTER UPDATE OF title ON tags BEGIN "
+    f"UPDATE services_search SET tags = {_sqlite_tags('services_search.rowid')} "
+    "WHERE rowid IN (SELECT service_id FROM services_tag_connections WHERE tag_id = new.id); END",
+
+    "INSERT INTO services_search (rowid, title, description, tags) "
+    f"SELECT services.id, {_fold('services.title')}, {_fold('services.description')}, "
+    f"{_sqlite_tags('services.id')} FROM services",
+)
+
+POSTGRES_UPGRADE = (
+    "CREATE TABLE services_search ("
+    "service_id INTEGER PRIMARY KEY REFERENCES services (id) ON DELETE CASCADE, "
+    "document TSVECTOR NOT NULL)",
+
+    """
+    INSERT INTO services_search (service_id, document)
+    SELECT
+        services.id,
+        setweight(to_tsvector('russian', services.title), 'A')
+        || setweight(to_tsvector('russian', coalesce((
+            SELECT string_agg(tags.title, ' ')
+            FROM services_tag_connections
+            JOIN tags ON tags.id = services_tag_connections.tag_id
+            WHERE services_tag_connections.service_id = services.id), '')), 'B')
+        || setweight(to_tsvector('russian', services.description), 'C')
+    FROM services
+    """,
+
+    # after the backfill, one build instead of a row by row update
+    "CREATE INDEX ix_services_search_document ON services_search USING gin (document)",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    statements = SQLITE_UPGRADE if op.get_bind().dialect.name == 'sqlite' else POSTGRES_UPGRADE
+    for statement in statements:
+        op.execute(sa.text(statement))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        for trigger in SQLITE_TRIGGERS:
+            op.execute(sa.text(f'DROP TRIGGER IF EXISTS {trigger}'))
+    op.execute(sa.text('DROP TABLE IF EXISTS services_search'))
@@ -0,0 +1,77 @@
+"""scheduletemplates free_mask for on-read availability
+
+Revision ID: b81e4a6d0c35
+Revises: 7f2c9d14b6e8
+Create Date: 2026-10-17 16:02:44.918203
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81e4a6d0c35'
+down_revision: Union[str, Sequence[str], None] = '7f2c9d14b6e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+scheduletemplates = sa.table(
+    'scheduletemplates',
+    sa.column('id', sa.Integer),
+    sa.column('hours_work', sa.JSON),
+    sa.column('free_mask', sa.Integer),
+)
+
+
+def _chunks(bind, stmt, key, size: int = 1000):
+    # keyset chunks instead of a server side cursor, an open asyncpg portal
+    # keeps the table busy for the ALTER TABLE that follows on postgres
+    last = 0
+    while chunk := bind.execute(stmt.where(key > last).order_by(key).limit(size)).all():
+        yield chunk
+        last = chunk[-1][0]
+
+
+def _free_mask(raw) -> int:
+    if isinstance(raw, str):
+        raw = json.loads(raw)
+    mask = 0
+    for slot_time, status in (raw or {}).items():
+        if status == 'available':
+            mask |= 1 << int(slot_time[:2])
+    return mask
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('scheduletemplates', schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column('free_mask', sa.Integer(), server_default='0', nullable=False))
+
+    bind = op.get_bind()
+    templates = sa.select(scheduletemplates.c.id, scheduletemplates.c.hours_work)
+    for chunk in _chunks(bind, templates, scheduletemplates.c.id):
+        bind.execute(
+            scheduletemplates.update()
+            .where(scheduletemplates.c.id == sa.bindparam('template_id'))
+            .values(free_mask=sa.bindparam('mask')),
+            [
+                {'template_id': template_id, 'mask': _free_mask(raw)}
+                for template_id, raw in chunk
+            ]
+        )
+
+    op.create_index('ix_scheduletemplates_day_active',
+                    'scheduletemplates', ['day', 'is_active'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_scheduletemplates_day_active',
+                  table_name='scheduletemplates')
+    with op.batch_alter_table('scheduletemplates', schema=None) as batch_op:
+        batch_op.drop_column('free_mask')
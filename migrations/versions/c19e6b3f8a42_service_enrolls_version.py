@@ -0,0 +1,31 @@
+"""service_enrolls version for guarded status transitions
+
+Revision ID: c19e6b3f8a42
+Revises: a5c83f0e2d17
+Create Date: 2026-10-17 20:12:36.184902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c19e6b3f8a42'
+down_revision: Union[str, Sequence[str], None] = 'a5c83f0e2d17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('service_enrolls', schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('service_enrolls', schema=None) as batch_op:
+        batch_op.drop_column('version')
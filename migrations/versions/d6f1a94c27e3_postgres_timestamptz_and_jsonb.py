@@ -0,0 +1,78 @@
+"""postgres timestamptz for aware timestamps and jsonb hours_work
+
+Revision ID: d6f1a94c27e3
+Revises: 83035137f1b8
+Create Date: 2026-10-17 03:14:52.640218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6f1a94c27e3'
+down_revision: Union[str, Sequence[str], None] = '83035137f1b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# columns written with datetime.now(timezone.utc), asyncpg refuses those for timestamp
+AWARE_TIMESTAMPS = (
+    ('services', 'created_at'),
+    ('service_enrolls', 'created_at'),
+    ('payments', 'created_at'),
+    ('payments', 'updated_at'),
+    ('payments', 'paid_at'),
+    ('disputes', 'created_at'),
+    ('disputes', 'taken_at'),
+    ('disputes', 'completed_at'),
+    ('tags', 'created_at'),
+    ('service_chats', 'created_at'),
+    ('support_chats', 'created_at'),
+    ('dispute_chats', 'created_at'),
+    ('service_messages', 'created_at'),
+    ('support_messages', 'created_at'),
+    ('dispute_messages', 'created_at'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # sqlite keeps both as text, only postgres has something to convert
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for table, column in AWARE_TIMESTAMPS:
+        op.alter_column(
+            table, column,
+            type_=sa.DateTime(timezone=True),
+            existing_type=sa.DateTime(),
+            postgresql_using=f"{column} AT TIME ZONE 'UTC'")
+
+    op.alter_column(
+        'scheduletemplates', 'hours_work',
+        type_=postgresql.JSONB(),
+        existing_type=sa.JSON(),
+        postgresql_using='hours_work::jsonb')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.alter_column(
+        'scheduletemplates', 'hours_work',
+        type_=sa.JSON(),
+        existing_type=postgresql.JSONB(),
+        postgresql_using='hours_work::json')
+
+    for table, column in AWARE_TIMESTAMPS:
+        op.alter_column(
+            table, column,
+            type_=sa.DateTime(),
+            existing_type=sa.DateTime(timezone=True),
+            postgresql_using=f"{column} AT TIME ZONE 'UTC'")
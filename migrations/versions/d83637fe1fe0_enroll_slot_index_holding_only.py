@@ -0,0 +1,40 @@
+"""enroll slot index holding only
+
+Revision ID: d83637fe1fe0
+Revises: f6884e6d7fec
+Create Date: 2026-10-17 03:12:40.511273
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd83637fe1fe0'
+down_revision: Union[str, Sequence[str], None] = 'f6884e6d7fec'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# as it is at this revision, not imported from the models
+HOLDS_SLOT = "status NOT IN ('cancelled', 'expired')"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ux_service_enrolls_date_slot', table_name='service_enrolls')
+    op.create_index(
+        'ux_service_enrolls_date_slot', 'service_enrolls',
+        ['service_date_id', 'slot_time'], unique=True,
+        sqlite_where=sa.text(HOLDS_SLOT), postgresql_where=sa.text(HOLDS_SLOT))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # fails once a slot has been booked again after a cancel or an expiry
+    op.drop_index('ux_service_enrolls_date_slot', table_name='service_enrolls')
+    op.create_index(
+        'ux_service_enrolls_date_slot', 'service_enrolls',
+        ['service_date_id', 'slot_time'], unique=True)
@@ -0,0 +1,135 @@
+"""dates.date as native DATE and expired flag
+
+Revision ID: e3b41f7c0a92
+Revises: 9c41e07b2d5a
+Create Date: 2026-10-17 14:05:27.611904
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b41f7c0a92'
+down_revision: Union[str, Sequence[str], None] = '9c41e07b2d5a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+dates = sa.table(
+    'dates',
+    sa.column('id', sa.Integer),
+    sa.column('date', sa.String),
+    sa.column('day', sa.Date),
+    sa.column('expired', sa.Boolean),
+    sa.column('free_mask', sa.Integer),
+)
+
+service_slots = sa.table(
+    'service_slots',
+    sa.column('service_date_id', sa.Integer),
+    sa.column('status', sa.String),
+)
+
+# dates that can not be parsed end up in the past and get expired
+UNPARSED_DAY = date(1970, 1, 1)
+
+
+def _chunks(bind, stmt, key, size: int = 1000):
+    # keyset chunks instead of a server side cursor, an open asyncpg portal
+    # keeps the table busy for the ALTER TABLE that follows on postgres
+    last = 0
+    while chunk := bind.execute(stmt.where(key > last).order_by(key).limit(size)).all():
+        yield chunk
+        last = chunk[-1][0]
+
+
+def _parse_day(raw: str | None) -> date:
+    for fmt in ('%d-%m-%Y', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(raw or '', fmt).date()
+        except ValueError:
+            continue
+    return UNPARSED_DAY
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('dates', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('day', sa.Date(), nullable=True))
+        batch_op.add_column(
+            sa.Column('expired', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+    # both dd-mm-YYYY and YYYY-mm-dd were written over time
+    bind = op.get_bind()
+    for chunk in _chunks(bind, sa.select(dates.c.id, dates.c.date), dates.c.id):
+        bind.execute(
+            dates.update()
+            .where(dates.c.id == sa.bindparam('date_id'))
+            .values(day=sa.bindparam('parsed_day')),
+            [
+                {'date_id': date_id, 'parsed_day': _parse_day(raw)}
+                for date_id, raw in chunk
+            ]
+        )
+
+    # past dates start out expired, the hourly job then only sees new ones
+    today = date.today()
+    past_dates = sa.select(dates.c.id).where(dates.c.day < today)
+    bind.execute(
+        service_slots.update()
+        .where(
+            service_slots.c.service_date_id.in_(past_dates),
+            service_slots.c.status != 'break')
+        .values(status='break')
+    )
+    bind.execute(
+        dates.update()
+        .where(dates.c.day < today)
+        .values(expired=True, free_mask=0)
+    )
+
+    op.drop_index('ix_dates_date_free_mask', table_name='dates')
+    with op.batch_alter_table('dates', schema=None) as batch_op:
+        batch_op.drop_column('date')
+        batch_op.alter_column('day', new_column_name='date', nullable=False)
+
+    op.create_index('ix_dates_date_free_mask', 'dates', ['date', 'free_mask'])
+    op.create_index('ix_dates_expired_date', 'dates', ['expired', 'date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_dates_expired_date', table_name='dates')
+    op.drop_index('ix_dates_date_free_mask', table_name='dates')
+
+    with op.batch_alter_table('dates', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('day_str', sa.String(), nullable=True))
+
+    dates_str = sa.table(
+        'dates',
+        sa.column('id', sa.Integer),
+        sa.column('date', sa.Date),
+        sa.column('day_str', sa.String),
+    )
+    bind = op.get_bind()
+    for chunk in _chunks(bind, sa.select(dates_str.c.id, dates_str.c.date), dates_str.c.id):
+        bind.execute(
+            dates_str.update()
+            .where(dates_str.c.id == sa.bindparam('date_id'))
+            .values(day_str=sa.bindparam('formatted_day')),
+            [
+                {'date_id': date_id, 'formatted_day': day.strftime('%d-%m-%Y')}
+                for date_id, day in chunk
+            ]
+        )
+
+    with op.batch_alter_table('dates', schema=None) as batch_op:
+        batch_op.drop_column('expired')
+        batch_op.drop_column('date')
+        batch_op.alter_column('day_str', new_column_name='date', nullable=False)
+
+    op.create_index('ix_dates_date_free_mask', 'dates', ['date', 'free_mask'])
@@ -0,0 +1,154 @@
+"""services photo and certificate moved from data urls to the media store
+
+Revision ID: f2c7a9d1e4b8
+Revises: d6f1a94c27e3
+Create Date: 2026-10-17 16:42:09.318275
+
+"""
+import base64
+import binascii
+import hashlib
+import os
+from pathlib import Path
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c7a9d1e4b8'
+down_revision: Union[str, Sequence[str], None] = 'd6f1a94c27e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# the layout of server.common.utils.media_store, {root}/ab/cd/{sha256}.{ext}
+MEDIA_ROOT = Path(os.getenv('MEDIA_ROOT', 'media'))
+MEDIA_URL = os.getenv('MEDIA_URL', '/api/v1/media').rstrip('/')
+MEDIA_TYPES = {
+    'jpg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+}
+
+services = sa.table(
+    'services',
+    sa.column('id', sa.Integer),
+    sa.column('photo', sa.String),
+    sa.column('certificate', sa.String),
+    sa.column('photo_hash', sa.String),
+    sa.column('certificate_hash', sa.String),
+)
+
+
+def _chunks(bind, stmt, key, size: int = 1000):
+    # keyset chunks instead of a server side cursor, an open asyncpg portal
+    # keeps the table busy for the ALTER TABLE that follows on postgres
+    last = 0
+    while chunk := bind.execute(stmt.where(key > last).order_by(key).limit(size)).all():
+        yield chunk
+        last = chunk[-1][0]
+
+
+def _sniff_extension(head: bytes) -> str | None:
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def _path(name: str) -> Path:
+    return MEDIA_ROOT / name[:2] / name[2:4] / name
+
+
+def _extract(value: str | None) -> tuple[str, str] | None:
+    '''writes the image of a data url to the store, (url, sha256) or None'''
+    if not value or not value.startswith('data:'):
+        return None
+    header, _, payload = value.partition(',')
+    if not header.endswith(';base64'):
+        return None
+    try:
+        data = base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    extension = _sniff_extension(data[:12])
+    # svg and the like stay inline, the store serves raster images only
+    if extension is None:
+        return None
+
+    digest = hashlib.sha256(data).hexdigest()
+    name = f'{digest}.{extension}'
+    path = _path(name)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f'.{name}.tmp')
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    return f'{MEDIA_URL}/{name}', digest
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('services', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('photo_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('certificate_hash', sa.String(length=64), nullable=True))
+
+    bind = op.get_bind()
+    inline = sa.select(services.c.id, services.c.photo, services.c.certificate).where(
+        sa.or_(services.c.photo.like('data:%'), services.c.certificate.like('data:%')))
+    # a row carries up to two ~5 MB blobs, small chunks
+    for chunk in _chunks(bind, inline, services.c.id, size=50):
+        for service_id, photo, certificate in chunk:
+            values = {}
+            for column, value in (('photo', photo), ('certificate', certificate)):
+                extracted = _extract(value)
+                if extracted is not None:
+                    values[column], values[f'{column}_hash'] = extracted
+            if values:
+                bind.execute(
+                    services.update()
+                    .where(services.c.id == service_id)
+                    .values(**values)
+                )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # files stay on disk, the rows get their data urls back
+    bind = op.get_bind()
+    stored = sa.select(
+        services.c.id,
+        services.c.photo, services.c.photo_hash,
+        services.c.certificate, services.c.certificate_hash
+    ).where(sa.or_(services.c.photo_hash != '', services.c.certificate_hash != ''))
+    for chunk in _chunks(bind, stored, services.c.id, size=50):
+        for service_id, photo, photo_hash, certificate, certificate_hash in chunk:
+            values = {}
+            for column, url, digest in (
+                ('photo', photo, photo_hash),
+                ('certificate', certificate, certificate_hash)
+            ):
+                name = (url or '').rpartition('/')[2]
+                if not digest or not name.startswith(digest) or not _path(name).exists():
+                    continue
+                content_type = MEDIA_TYPES.get(name.rpartition('.')[2], 'application/octet-stream')
+                payload = base64.b64encode(_path(name).read_bytes()).decode('utf-8')
+                values[column] = f'data:{content_type};base64,{payload}'
+            if values:
+                bind.execute(
+                    services.update()
+                    .where(services.c.id == service_id)
+                    .values(**values)
+                )
+
+    with op.batch_alter_table('services', schema=None) as batch_op:
+        batch_op.drop_column('certificate_hash')
+        batch_op.drop_column('photo_hash')
@@ -1,4 +1,9 @@
 from asyncio import run
+from os import environ
+
+# smaller connection pool than the api, read by server.common.db on import
+environ.setdefault('DB_PROCESS_ROLE', 'bot')
+
 from bot import main
 import logging
 
@@ -0,0 +1,4 @@
+from server.common.utils.schema_version import migrate
+
+if __name__ == '__main__':
+    migrate()
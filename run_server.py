@@ -16,7 +16,10 @@ from server import (
     lifespan,
     master_app,
     notifications_websocket,
+    PoolMetricsMiddleware,
+    QueryBudgetMiddleware,
     RateLimitMiddleware,
+    ReadYourWritesMiddleware,
     service_chat_websocket,
     support_chat_websocket,
 )
@@ -33,6 +36,9 @@ app = FastAPI(
 )
 
 app.add_middleware(RateLimitMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(QueryBudgetMiddleware)
+app.add_middleware(PoolMetricsMiddleware)
 
 # CORS configuration - allow all origins for production deployment
 app.add_middleware(
@@ -78,6 +84,18 @@ async def root():
 @app.get('/health')
 async def health_check():
     '''Health check endpoint for monitoring'''
+    # a saturated pool would make the probe itself wait for pool_timeout
+    if db_config.saturated():
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={
+                "status": "degraded",
+                "database": "pool saturated",
+                "pool": db_config.pool_status(),
+                "environment": ENVIRONMENT
+            }
+        )
+
     try:
         async with db_config.Session() as session:
             await session.execute(text("SELECT 1"))
@@ -85,6 +103,7 @@ async def health_check():
         return {
             "status": "healthy",
             "database": "connected",
+            "pool": db_config.pool_status(),
             "environment": ENVIRONMENT
         }
     except Exception as e:
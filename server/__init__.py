@@ -11,7 +11,16 @@ from .accounts import account_app
 from .chats import service_chat_app, support_chat_app, dispute_chat_app
 from .dispute import dispute_app
 from .arbitrage import arbitrage_app
-from .common import lifespan, RateLimitMiddleware, db_config
+from .diagnostics import diagnostics_app
+from .media import media_app
+from .common import (
+    lifespan,
+    PoolMetricsMiddleware,
+    QueryBudgetMiddleware,
+    RateLimitMiddleware,
+    ReadYourWritesMiddleware,
+    db_config
+)
 from .websockets import (
     websocket_router,
     notification_routes,
@@ -39,3 +48,5 @@ master_app.include_router(dispute_chat_app)
 master_app.include_router(notification_routes)
 master_app.include_router(dispute_app)
 master_app.include_router(arbitrage_app)
+master_app.include_router(diagnostics_app)
+master_app.include_router(media_app)
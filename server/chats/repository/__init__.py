@@ -1,14 +1,17 @@
 from .service_chat_repository import (
     get_service_chat_repository,
+    get_service_chat_read_repository,
     ServiceChatRepository
 )
 
 from .support_chat_repository import (
     get_support_chat_repository,
+    get_support_chat_read_repository,
     SupportChatRepository
 )
 
 from .dispute_chat_repository import (
     get_dispute_chat_repository,
+    get_dispute_chat_read_repository,
     DisputeChatRepository
 )
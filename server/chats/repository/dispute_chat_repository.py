@@ -101,4 +101,10 @@ def get_dispute_chat_repository(
 ) -> DisputeChatRepository:
     return DisputeChatRepository(session)
 
+
+def get_dispute_chat_read_repository(
+    session: AsyncSession = Depends(db_config.read_session)
+) -> DisputeChatRepository:
+    return DisputeChatRepository(session)
+
 #demo hold mvp confirm
\ No newline at end of file
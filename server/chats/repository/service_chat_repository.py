@@ -1,5 +1,6 @@
 from typing import List
 from fastapi import Depends
+from sqlalchemy import delete, or_
 
 from ...common.db import (
     AsyncSession,
@@ -159,19 +160,26 @@ class ServiceChatRepository:
         return new_chat
 
     async def delete_chat(self, chat_id: int, user_id: int) -> bool:
-        chat = await self._session.scalar(
-            select(ServiceChat)
-            .where(ServiceChat.id == chat_id, ServiceChat.user_id == user_id)
+        # messages go with ON DELETE CASCADE
+        deleted = await self._session.scalar(
+            delete(ServiceChat)
+            .where(
+                ServiceChat.id == chat_id,
+                or_(ServiceChat.master_id == user_id,
+                    ServiceChat.client_id == user_id))
+            .returning(ServiceChat.id)
         )
-        if not chat:
-            return False
-        await self._session.delete(chat)
-        await self._session.flush()
-        return True
+        return deleted is not None
 
 
 def get_service_chat_repository(
         session: AsyncSession = Depends(db_config.session)) -> ServiceChatRepository:
     return ServiceChatRepository(session)
 
+
+def get_service_chat_read_repository(
+    session: AsyncSession = Depends(db_config.read_session)
+) -> ServiceChatRepository:
+    return ServiceChatRepository(session)
+
 #demo hold mvp confirm
\ No newline at end of file
@@ -1,5 +1,6 @@
 from typing import List
 from fastapi import Depends
+from sqlalchemy import delete
 
 from ...common.db import (
     AsyncSession,
@@ -89,18 +90,22 @@ class SupportChatRepository:
         return new_chat
 
     async def delete_chat(self, chat_id: int, user_id: int) -> bool:
-        chat = await self._session.scalar(
-            select(SupportChat)
+        # messages go with ON DELETE CASCADE
+        deleted = await self._session.scalar(
+            delete(SupportChat)
             .where(SupportChat.id == chat_id, SupportChat.client_id == user_id)
+            .returning(SupportChat.id)
         )
-        if not chat:
-            return False
-        await self._session.delete(chat)
-        await self._session.flush()
-        return True
+        return deleted is not None
 
 def get_support_chat_repository(
     session: AsyncSession = Depends(db_config.session)) -> SupportChatRepository:
     return SupportChatRepository(session)
 
+
+def get_support_chat_read_repository(
+    session: AsyncSession = Depends(db_config.read_session)
+) -> SupportChatRepository:
+    return SupportChatRepository(session)
+
 #demo hold mvp confirm
\ No newline at end of file
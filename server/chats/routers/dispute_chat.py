@@ -7,7 +7,7 @@ from ..schemas.dispute_chat import (
     CreateDisputeChatRequest
 )
 from ..usecases import get_dispute_chat_usecase, DisputeChatUsecase
-from ..repository import get_dispute_chat_repository, DisputeChatRepository
+from ..repository import get_dispute_chat_read_repository, DisputeChatRepository
 from ...common.utils import JWTManager, Exceptions400, NotFoundException404
 
 dispute_chat_app = APIRouter(prefix='/dispute-chats', tags=['Dispute Chats'])
@@ -35,7 +35,7 @@ async def create_dispute_chat(
                       description='endpoint for getting all dispute chats')
 async def get_all_dispute_chats(
     dispute_chat_repository: DisputeChatRepository = Depends(
-        get_dispute_chat_repository),
+        get_dispute_chat_read_repository),
     user: dict = Depends(JWTManager.auth_required)
 ) -> List[DisputeChatResponse]:
     chats = await dispute_chat_repository.get_all_by_user_id(int(user.get('id')))
@@ -49,7 +49,7 @@ async def get_all_dispute_chats(
 async def get_detail_dispute_chat(
     chat_id: int,
     dispute_chat_repository: DisputeChatRepository = Depends(
-        get_dispute_chat_repository),
+        get_dispute_chat_read_repository),
     user: dict = Depends(JWTManager.auth_required)
 ) -> DetailDisputeChatResponse:
     user_id = int(user.get('id'))
@@ -75,7 +75,7 @@ async def get_detail_dispute_chat(
 async def get_dispute_chat_by_dispute_id(
     dispute_id: int,
     dispute_chat_repository: DisputeChatRepository = Depends(
-        get_dispute_chat_repository),
+        get_dispute_chat_read_repository),
     user: dict = Depends(JWTManager.auth_required)
 ) -> DetailDisputeChatResponse:
     chat = await dispute_chat_repository.get_by_dispute_id(dispute_id)
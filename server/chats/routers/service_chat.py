@@ -4,7 +4,7 @@ from typing import List
 
 from ..schemas import CreatedServiceChat, ServiceChatResponse, DetailServiceChat
 from ..usecases import get_service_chat_usecase, ServiceChatUsecase
-from ..repository import get_service_chat_repository, ServiceChatRepository
+from ..repository import get_service_chat_read_repository, ServiceChatRepository
 from ...common.utils import Exceptions400, JWTManager
 from ...messages.usecases import get_service_message_use_case, ServiceMessageUseCase
 from ...websockets.connection_manager import service_chat_manager
@@ -38,7 +38,7 @@ async def create_service_chat(
                       description='endpoint for getting all service chats')
 async def get_all_service_chats(
     service_chat_repository: ServiceChatRepository = Depends(
-        get_service_chat_repository),
+        get_service_chat_read_repository),
     user: dict = Depends(JWTManager.auth_required)
 ) -> dict:
     chats = await service_chat_repository.get_all_by_user_id(int(user.get('id')))
@@ -57,7 +57,7 @@ async def get_all_service_chats(
 async def get_detail_service_chat(
     chat_id: int,
     service_chat_repository: ServiceChatRepository = Depends(
-        get_service_chat_repository),
+        get_service_chat_read_repository),
     user: dict = Depends(JWTManager.auth_required)
 ) -> dict:
     user_role = user.get('role')
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, status
 from typing import List
 from ..schemas import CreatedSupportChat, SupportChatResponse, DetailSupportChatResponse
 from ..usecases import get_support_chat_usecase, SupportChatUsecase
-from ..repository import get_support_chat_repository, SupportChatRepository
+from ..repository import get_support_chat_read_repository, SupportChatRepository
 from ...common.utils import JWTManager, Exceptions400, NotFoundException404
 
 support_chat_app = APIRouter(prefix='/support-chats', tags=['Support Chats'])
@@ -27,7 +27,7 @@ async def create_support_chat(
                       summary='get all support chats',
                       description='endpoint for getting all support chats')
 async def get_all_support_chats(
-    support_chat_repository: SupportChatRepository = Depends(get_support_chat_repository),
+    support_chat_repository: SupportChatRepository = Depends(get_support_chat_read_repository),
     user: dict = Depends(JWTManager.auth_required)
 ) -> dict:
     chats = await support_chat_repository.get_all_by_user_id(int(user.get('id')))
@@ -43,7 +43,7 @@ async def get_all_support_chats(
                       description='endpoint for getting detail support chat')
 async def get_detail_support_chat(
     chat_id: int,
-    support_chat_repository: SupportChatRepository = Depends(get_support_chat_repository),
+    support_chat_repository: SupportChatRepository = Depends(get_support_chat_read_repository),
     user: dict = Depends(JWTManager.auth_required)
 ) -> dict:
     chat = await support_chat_repository.get_detail_by_user_chat_id(int(user.get('id')), chat_id)
@@ -1,2 +1,8 @@
 from .db import db_config
-from .utils import RateLimitMiddleware, lifespan
\ No newline at end of file
+from .utils import (
+    PoolMetricsMiddleware,
+    QueryBudgetMiddleware,
+    RateLimitMiddleware,
+    ReadYourWritesMiddleware,
+    lifespan
+)
\ No newline at end of file
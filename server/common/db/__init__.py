@@ -1,8 +1,10 @@
+from contextvars import ContextVar
 from os import getenv
 
 from dotenv import load_dotenv
 
 from sqlalchemy import (
+    event,
     select,
     join
 )
@@ -15,13 +17,28 @@ from sqlalchemy.ext.asyncio import (
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
+    Session,
     mapped_column,
     joinedload,
     selectinload
 )
+from sqlalchemy.util import await_only
 
 load_dotenv()
 
+from .pool import (
+    DB_PROCESS_ROLE,
+    InstrumentedQueuePool,
+    asyncpg_connect_args,
+    pool_settings,
+    request_scope
+)
+from .sqlite_writer import (
+    SQLITE_WRITE_QUEUE,
+    SQLiteWriteQueue,
+    apply_sqlite_pragmas
+)
+
 
 class Base(DeclarativeBase):
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -32,45 +49,158 @@ class AssociationBase(DeclarativeBase):
     metadata = Base.metadata
 
 
+class ReadRouting:
+    '''
+    Where the reads of one request go.
+    pinned - the client wrote recently, read from the primary
+    wrote - this request wrote to the primary
+    '''
+    __slots__ = ('pinned', 'wrote')
+
+    def __init__(self, pinned: bool = False) -> None:
+        self.pinned = pinned
+        self.wrote = False
+
+
+read_routing: ContextVar[ReadRouting | None] = ContextVar(
+    'read_routing', default=None)
+
+
+class PrimarySession(Session):
+    '''
+    Sessions of the primary engine, they mark the request as written
+    so that its later reads see the write
+    '''
+
+
+def _mark_written() -> None:
+    routing = read_routing.get()
+    if routing is not None:
+        routing.wrote = True
+
+
+@event.listens_for(PrimarySession, 'after_flush')
+def _written_by_flush(session, flush_context) -> None:
+    _mark_written()
+
+
+@event.listens_for(PrimarySession, 'do_orm_execute')
+def _written_by_statement(orm_execute_state) -> None:
+    if (orm_execute_state.is_insert or orm_execute_state.is_update
+            or orm_execute_state.is_delete):
+        _mark_written()
+        _take_write_slot(orm_execute_state.session)
+
+
+def _take_write_slot(session) -> None:
+    # sqlite only: the first write of a transaction waits for the single writer
+    queue = session.info.get('write_queue')
+    if queue is not None and session.info.get('write_slot') is None:
+        session.info['write_slot'] = await_only(queue.acquire())
+
+
+@event.listens_for(PrimarySession, 'before_flush')
+def _write_slot_for_flush(session, flush_context, instances) -> None:
+    _take_write_slot(session)
+
+
+@event.listens_for(PrimarySession, 'after_transaction_end')
+def _free_write_slot(session, transaction) -> None:
+    token = session.info.pop('write_slot', None) if transaction.parent is None else None
+    if token is not None:
+        session.info['write_queue'].release(token)
+
+
 class DataBaseConfiguration:
     def __init__(
         self,
         db_url,
-        echo: bool = False
+        echo: bool = False,
+        read_url: str | None = None,
+        role: str = DB_PROCESS_ROLE
     ):
 
         self.db_url = db_url
         self.echo = echo
+        self.read_url = read_url
+        self.role = role
+
+        self.engine = create_async_engine(**self._engine_kwargs(self.db_url))
+        self._configure_engine(self.engine)
+
+        self.write_queue: SQLiteWriteQueue | None = None
+        self.Session = async_sessionmaker(
+            self.engine,
+            expire_on_commit=False,
+            class_=AsyncSession,
+            sync_session_class=PrimarySession
+        )
+        if self.engine.dialect.name == 'sqlite' and SQLITE_WRITE_QUEUE:
+            self.write_queue = SQLiteWriteQueue(self.Session)
+            self.Session.configure(info={'write_queue': self.write_queue})
+
+        # without a replica the reads stay on the primary
+        self.read_engine = self.engine
+        if read_url:
+            self.read_engine = create_async_engine(**self._engine_kwargs(read_url))
+            self._configure_engine(self.read_engine)
+
+        self.ReadSession = async_sessionmaker(
+            self.read_engine,
+            expire_on_commit=False,
+            class_=AsyncSession
+        )
 
+    def _engine_kwargs(self, db_url: str) -> dict:
         # Connection pool settings to prevent exhaustion
         # For SQLite use different settings
         is_sqlite = "sqlite" in db_url.lower()
 
         engine_kwargs = {
-            "url": self.db_url,
+            "url": db_url,
             "echo": self.echo,
         }
 
         if not is_sqlite:
-            # For PostgreSQL/MySQL configure connection pool
+            # For PostgreSQL/MySQL configure connection pool,
+            # sized by the process role (api / worker / bot)
             engine_kwargs.update({
-                "pool_size": 20,  # Number of connections in pool
-                "max_overflow": 10,  # Additional connections beyond pool_size
-                # Timeout waiting for free connection (seconds)
-                "pool_timeout": 30,
+                "poolclass": InstrumentedQueuePool,
+                **pool_settings(self.role),
                 # Recreate connections after an hour (prevents DB timeouts)
                 "pool_recycle": 3600,
                 "pool_pre_ping": True,  # Check connections before use
             })
+            if db_url.startswith("postgresql+asyncpg://"):
+                engine_kwargs["connect_args"] = asyncpg_connect_args(self.role)
         else:
             engine_kwargs["connect_args"] = {"check_same_thread": False}
 
-        self.engine = create_async_engine(**engine_kwargs)
+        return engine_kwargs
 
-        self.Session = async_sessionmaker(
-            self.engine,
-            expire_on_commit=False,
-            class_=AsyncSession
+    @staticmethod
+    def _configure_engine(engine) -> None:
+        if engine.dialect.name == 'sqlite':
+            event.listen(engine.sync_engine, 'connect', apply_sqlite_pragmas)
+
+    def pool_status(self) -> dict:
+        '''
+        Checkout metrics of the pools, None for engines without instrumentation
+        '''
+        engines = {'primary': self.engine}
+        if self.read_engine is not self.engine:
+            engines['replica'] = self.read_engine
+
+        return {
+            name: engine.pool.snapshot()
+            if isinstance(engine.pool, InstrumentedQueuePool) else None
+            for name, engine in engines.items()
+        }
+
+    def saturated(self) -> bool:
+        return any(
+            isinstance(engine.pool, InstrumentedQueuePool) and engine.pool.saturated()
+            for engine in (self.engine, self.read_engine)
         )
 
     async def up(self):
@@ -89,14 +219,43 @@ class DataBaseConfiguration:
         async with self.Session() as session:
             yield session
 
+    async def write(self, job):
+        '''
+        Runs job(session) and commits. On sqlite the job goes through
+        the writer queue and shares its commit with the queued jobs
+        '''
+        if self.write_queue is not None:
+            return await self.write_queue.submit(job)
+
+        async with self.Session() as session:
+            result = await job(session)
+            await session.commit()
+            return result
+
     async def session_begin(self):
         async with self.Session.begin() as session:
             yield session
 
+    async def read_session(self):
+        '''
+        Session for read-only endpoints, served by the replica
+        unless the request is pinned to the primary after a write
+        '''
+        routing = read_routing.get()
+        if routing is not None and (routing.pinned or routing.wrote):
+            session_factory = self.Session
+        else:
+            session_factory = self.ReadSession
+
+        async with session_factory() as session:
+            yield session
+
 
+# full echo only for local debugging, DB_ECHO_SAMPLE_RATE samples statements instead
 db_config = DataBaseConfiguration(
     getenv('DB_URL'),
-    True
+    getenv('DB_ECHO', 'false').lower() in ('1', 'true', 'yes'),
+    getenv('DB_READ_URL')
 )
 
 from .models import (
@@ -105,6 +264,7 @@ from .models import (
     ScheduleTemplate,
     Service,
     ServiceDate,
+    ServiceSlot,
     ServiceEnroll,
     Tag,
     Payment,
@@ -116,4 +276,7 @@ from .models import (
     DisputeMessage,
     Account,
     Dispute,
+    EnrollDeadline,
+    MediaFailure,
+    MediaVariant,
 )
\ No newline at end of file
@@ -1,10 +1,13 @@
 from .tag import ServiceTagConnection, Tag
 from .user import User
 from .service import Service, ServiceEnroll
-from .date import ServiceDate
+from .date import ServiceDate, ServiceSlot
 from .scheduletemplate import ScheduleTemplate
 from .payment import Payment
 from .chats import ServiceChat, SupportChat, DisputeChat
 from .messages import ServiceMessage, SupportMessage, DisputeMessage
 from .accounts import Account
-from .dispute import Dispute
\ No newline at end of file
+from .dispute import Dispute
+from .deadline import EnrollDeadline
+from .media import MediaFailure, MediaVariant
+from . import search
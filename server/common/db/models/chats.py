@@ -27,14 +27,17 @@ class ServiceChat(Base):
     __table_args__ = (
         Index('ux_service_chats_master_client_service',
               'master_id', 'client_id', 'service_id', unique=True),
+        # the unique index above serves the master side
+        Index('ix_service_chats_client_id', 'client_id'),
     )
 
-    service_id: Mapped[int] = mapped_column(ForeignKey('services.id'))
+    service_id: Mapped[int] = mapped_column(
+        ForeignKey('services.id', ondelete='CASCADE'))
     master_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
     client_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
 
     created_at: Mapped[DateTime] = mapped_column(
-        DateTime, default=datetime.now(timezone.utc))
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
     service: Mapped['Service'] = relationship(
         'Service', back_populates='chats')
@@ -44,7 +47,8 @@ class ServiceChat(Base):
         'User', foreign_keys=[client_id], back_populates='client_chats')
 
     messages: Mapped[List['ServiceMessage']] = relationship(
-        'ServiceMessage', back_populates='chat', cascade="all, delete-orphan")
+        'ServiceMessage', back_populates='chat',
+        cascade="all, delete-orphan", passive_deletes=True)
 
 
 class SupportChat(Base):
@@ -52,13 +56,14 @@ class SupportChat(Base):
     __table_args__ = (
         Index('ux_support_chats_client_support',
               'client_id', 'support_id', unique=True),
+        Index('ix_support_chats_support_id', 'support_id'),
     )
 
     client_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
     support_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
 
     created_at: Mapped[DateTime] = mapped_column(
-        DateTime, default=datetime.now(timezone.utc))
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
     support: Mapped['User'] = relationship(
         'User', foreign_keys=[support_id], back_populates='support_chats')
@@ -66,13 +71,18 @@ class SupportChat(Base):
         'User', foreign_keys=[client_id], back_populates='client_support_chats')
 
     messages: Mapped[List['SupportMessage']] = relationship(
-        'SupportMessage', back_populates='chat', cascade="all, delete-orphan")
+        'SupportMessage', back_populates='chat',
+        cascade="all, delete-orphan", passive_deletes=True)
 
 
 class DisputeChat(Base):
     __tablename__ = 'dispute_chats'
     __table_args__ = (
         Index('ux_dispute_chats_dispute', 'dispute_id', unique=True),
+        # participants' chat list is an OR over these three
+        Index('ix_dispute_chats_master_id', 'master_id'),
+        Index('ix_dispute_chats_client_id', 'client_id'),
+        Index('ix_dispute_chats_arbitr_id', 'arbitr_id'),
     )
 
     master_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
@@ -84,7 +94,7 @@ class DisputeChat(Base):
         ForeignKey('disputes.id'), unique=True)
 
     created_at: Mapped[DateTime] = mapped_column(
-        DateTime, default=datetime.now(timezone.utc))
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
     master: Mapped['User'] = relationship(
         'User', foreign_keys=[master_id], back_populates='master_dispute_chats')
@@ -98,6 +108,7 @@ class DisputeChat(Base):
         'Dispute', back_populates='dispute_chat', uselist=False)
 
     messages: Mapped[List['DisputeMessage']] = relationship(
-        'DisputeMessage', back_populates='chat', cascade="all, delete-orphan")
+        'DisputeMessage', back_populates='chat',
+        cascade="all, delete-orphan", passive_deletes=True)
 
 #demo hold mvp confirm
\ No newline at end of file
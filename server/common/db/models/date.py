@@ -1,4 +1,5 @@
-from typing import List, TYPE_CHECKING
+import datetime
+from typing import Dict, Iterable, List, TYPE_CHECKING
 
 from sqlalchemy.orm import (
     Mapped,
@@ -7,26 +8,134 @@ from sqlalchemy.orm import (
 )
 
 from sqlalchemy import (
+    Date,
     ForeignKey,
-    JSON,
+    Index,
+    String,
+    false,
 )
 
 from .. import Base
 
 if TYPE_CHECKING:
+    from .scheduletemplate import ScheduleTemplate
     from .service import ServiceEnroll, Service
 
 
+def hours_mask(hours: Iterable[int]) -> int:
+    # bit N is the hourly slot 'NN:00'
+    mask = 0
+    for hour in hours:
+        mask |= 1 << hour
+    return mask
+
+
+def availability_mask(slots: Dict[str, str]) -> int:
+    return hours_mask(
+        int(slot_time[:2]) for slot_time, status in slots.items()
+        if status == 'available'
+    )
+
+
+def resolve_service_dates(
+    service_id: int,
+    dates: Iterable['ServiceDate'],
+    templates: Iterable['ScheduleTemplate'],
+    date_from: datetime.date,
+    date_to: datetime.date
+) -> List['ServiceDate']:
+    '''
+    Dates of the service for every day of the window.
+    A materialized date wins, a day without one is expanded from the first
+    active template of its weekday into a transient ServiceDate (id is None).
+    Days before today are never expanded
+    '''
+    materialized = {date_obj.date: date_obj for date_obj in dates}
+    by_weekday = {}
+    for template in sorted(templates, key=lambda template: template.id):
+        if template.is_active and template.day not in by_weekday:
+            by_weekday[template.day] = template
+
+    resolved = []
+    day = date_from
+    while day <= date_to:
+        if day in materialized:
+            resolved.append(materialized[day])
+        elif day >= datetime.date.today():
+            template = by_weekday.get(day.strftime('%A').lower())
+            if template:
+                resolved.append(ServiceDate(
+                    date=day,
+                    slots=template.hours_work,
+                    service_id=service_id))
+        day += datetime.timedelta(days=1)
+
+    return resolved
+
+
+class ServiceSlot(Base):
+    __tablename__ = 'service_slots'
+    __table_args__ = (
+        Index('ux_service_slots_date_slot',
+            'service_date_id', 'slot_time', unique=True),
+        Index('ix_service_slots_enroll_id', 'enroll_id'),
+    )
+    # available - slot can be booked
+    # booked - slot is taken by enroll_id
+    # break / unavailable - master is not working at this time
+    slot_time: Mapped[str] = mapped_column(String(5))
+    status: Mapped[str] = mapped_column(String(16), default='available')
+
+    service_date_id: Mapped[int] = mapped_column(
+        ForeignKey('dates.id', ondelete='CASCADE'))
+    service_date: Mapped['ServiceDate'] = relationship(
+        'ServiceDate', back_populates='slot_rows')
+
+    enroll_id: Mapped[int] = mapped_column(
+        ForeignKey('service_enrolls.id', ondelete='SET NULL'), nullable=True)
+
+
 class ServiceDate(Base):
     __tablename__ = 'dates'
-    date: Mapped[str]
-    slots = mapped_column(JSON)
+    __table_args__ = (
+        Index('ix_dates_date_free_mask', 'date', 'free_mask'),
+        Index('ix_dates_expired_date', 'expired', 'date'),
+        # one date per service and day, lets schedule generation be rerun
+        Index('ux_dates_service_date', 'service_id', 'date', unique=True),
+    )
+    date: Mapped[datetime.date] = mapped_column(Date)
+    # set once by the hourly expiry, so it only ever scans fresh rows
+    expired: Mapped[bool] = mapped_column(default=False, server_default=false())
+    # 24-bit index of free hours, kept in sync with slot_rows by the repository
+    free_mask: Mapped[int] = mapped_column(default=0, server_default='0')
 
-    service_id: Mapped[int] = mapped_column(ForeignKey('services.id'))
+    slot_rows: Mapped[List['ServiceSlot']] = relationship(
+        'ServiceSlot',
+        back_populates='service_date',
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by='ServiceSlot.slot_time',
+        lazy='selectin')
+
+    service_id: Mapped[int] = mapped_column(
+        ForeignKey('services.id', ondelete='CASCADE'))
     service: Mapped['Service'] = relationship(
         'Service', back_populates='dates')
 
     enrolls: Mapped[List['ServiceEnroll']] = relationship(
         'ServiceEnroll', back_populates='service_date')
 
+    @property
+    def slots(self) -> Dict[str, str]:
+        # keeps the old {slot_time: status} shape for responses
+        return {slot.slot_time: slot.status for slot in self.slot_rows}
+
+    @slots.setter
+    def slots(self, value: Dict[str, str]) -> None:
+        self.slot_rows = [
+            ServiceSlot(slot_time=slot_time, status=status)
+            for slot_time, status in value.items()
+        ]
+        self.free_mask = availability_mask(value)
+
 #demo hold mvp confirm
\ No newline at end of file
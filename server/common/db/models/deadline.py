@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Literal
+
+from sqlalchemy.orm import (
+    Mapped,
+    mapped_column
+)
+
+from sqlalchemy import (
+    DateTime,
+    ForeignKey,
+    Index,
+    String
+)
+
+from .. import Base
+
+
+class EnrollDeadline(Base):
+    '''
+    Next timed action of an enroll, armed when the enroll enters a status
+    and drained once due_at has passed.
+    auto_cancel - pending enroll the master did not accept
+    auto_capture - ready enroll the client did not confirm
+    '''
+    __tablename__ = 'enroll_deadlines'
+    __table_args__ = (
+        Index('ix_enroll_deadlines_due_at', 'due_at'),
+    )
+    action: Mapped[Literal['auto_cancel', 'auto_capture']] = mapped_column(String(16))
+    due_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+    # one armed deadline per enroll, a new status replaces the old one
+    enroll_id: Mapped[int] = mapped_column(
+        ForeignKey('service_enrolls.id', ondelete='CASCADE'), unique=True)
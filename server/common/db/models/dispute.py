@@ -10,7 +10,8 @@ from sqlalchemy.orm import (
 from sqlalchemy import (
     ForeignKey,
     String,
-    DateTime
+    DateTime,
+    Index
 )
 
 from .. import Base
@@ -36,6 +37,14 @@ WinnerTypes = Literal[
 
 class Dispute(Base):
     __tablename__ = 'disputes'
+    __table_args__ = (
+        # arbitrs' queue of waiting disputes
+        Index('ix_disputes_status_created_at', 'disput_status', 'created_at'),
+        Index('ix_disputes_client_id', 'client_id'),
+        Index('ix_disputes_master_id', 'master_id'),
+        Index('ix_disputes_arbitr_id', 'arbitr_id'),
+        Index('ix_disputes_enroll_id', 'enroll_id'),
+    )
     client_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
     master_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
     enroll_id: Mapped[int] = mapped_column(ForeignKey('service_enrolls.id'))
@@ -85,16 +94,16 @@ class Dispute(Base):
         nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.now(timezone.utc)
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
     )
 
     taken_at: Mapped[Optional[datetime]] = mapped_column(
-        DateTime,
+        DateTime(timezone=True),
         nullable=True
     )
 
     completed_at: Mapped[Optional[datetime]] = mapped_column(
-        DateTime,
+        DateTime(timezone=True),
         nullable=True
     )
 
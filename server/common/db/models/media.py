@@ -0,0 +1,55 @@
+from datetime import datetime, timezone
+from typing import Literal
+
+from sqlalchemy.orm import (
+    Mapped,
+    mapped_column
+)
+
+from sqlalchemy import (
+    DateTime,
+    String,
+    UniqueConstraint
+)
+
+from .. import Base
+
+
+class MediaVariant(Base):
+    '''
+    Resized copy of an image of the media store, keyed by the sha256 of
+    the original, so every service with the same photo shares the variants
+    and processing the same file again finds them done.
+    thumb - catalog card, cropped to a fixed size
+    medium - detail page, fit into a box
+    '''
+    __tablename__ = 'media_variants'
+    __table_args__ = (
+        UniqueConstraint('source_hash', 'variant', 'format',
+                         name='uq_media_variants_source_hash_variant_format'),
+    )
+    source_hash: Mapped[str] = mapped_column(String(64))
+    variant: Mapped[Literal['thumb', 'medium']] = mapped_column(String(16))
+    format: Mapped[Literal['webp', 'jpg']] = mapped_column(String(8))
+    url: Mapped[str] = mapped_column(String(256))
+    width: Mapped[int]
+    height: Mapped[int]
+    size: Mapped[int]
+
+
+class MediaFailure(Base):
+    '''
+    Image of the media store that gives no variants, keyed like them.
+    missing - the file is not on disk
+    broken - the file does not decode
+    oversize - every variant is over the media size cap
+    The sweep leaves these alone, a new upload of the same file tries again
+    '''
+    __tablename__ = 'media_failures'
+    __table_args__ = (
+        UniqueConstraint('source_hash', name='uq_media_failures_source_hash'),
+    )
+    source_hash: Mapped[str] = mapped_column(String(64))
+    reason: Mapped[Literal['missing', 'broken', 'oversize']] = mapped_column(String(16))
+    failed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
@@ -23,40 +23,52 @@ from .. import Base
 
 class ServiceMessage(Base):
     __tablename__ = 'service_messages'
+    __table_args__ = (
+        Index('ix_service_messages_chat_id_created_at', 'chat_id', 'created_at'),
+    )
     content: Mapped[str] = mapped_column(String(1024))
-    chat_id: Mapped[int] = mapped_column(ForeignKey('service_chats.id'))
+    chat_id: Mapped[int] = mapped_column(
+        ForeignKey('service_chats.id', ondelete='CASCADE'))
     sender_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
     sender: Mapped['User'] = relationship(
         'User', foreign_keys=[sender_id], back_populates='service_messages')
     chat: Mapped['ServiceChat'] = relationship(
         'ServiceChat', back_populates='messages', uselist=False)
     created_at: Mapped[DateTime] = mapped_column(
-        DateTime, default=datetime.now(timezone.utc))
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
 
 class SupportMessage(Base):
     __tablename__ = 'support_messages'
+    __table_args__ = (
+        Index('ix_support_messages_chat_id_created_at', 'chat_id', 'created_at'),
+    )
     content: Mapped[str] = mapped_column(String(1024))
-    chat_id: Mapped[int] = mapped_column(ForeignKey('support_chats.id'))
+    chat_id: Mapped[int] = mapped_column(
+        ForeignKey('support_chats.id', ondelete='CASCADE'))
     sender_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
     sender: Mapped['User'] = relationship(
         'User', foreign_keys=[sender_id], back_populates='support_messages')
     chat: Mapped['SupportChat'] = relationship(
         'SupportChat', back_populates='messages', uselist=False)
     created_at: Mapped[DateTime] = mapped_column(
-        DateTime, default=datetime.now(timezone.utc))
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
 
 class DisputeMessage(Base):
     __tablename__ = 'dispute_messages'
+    __table_args__ = (
+        Index('ix_dispute_messages_chat_id_created_at', 'chat_id', 'created_at'),
+    )
     content: Mapped[str] = mapped_column(String(1024))
-    chat_id: Mapped[int] = mapped_column(ForeignKey('dispute_chats.id'))
+    chat_id: Mapped[int] = mapped_column(
+        ForeignKey('dispute_chats.id', ondelete='CASCADE'))
     sender_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
     sender: Mapped['User'] = relationship(
         'User', foreign_keys=[sender_id], back_populates='dispute_messages')
     chat: Mapped['DisputeChat'] = relationship(
         'DisputeChat', back_populates='messages', uselist=False)
     created_at: Mapped[DateTime] = mapped_column(
-        DateTime, default=datetime.now(timezone.utc))
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
 #demo hold mvp confirm
\ No newline at end of file
@@ -10,6 +10,7 @@ from sqlalchemy import (
     String,
     DateTime,
     ForeignKey,
+    Index,
     Numeric,
     Text,
 )
@@ -22,9 +23,12 @@ if TYPE_CHECKING:
 
 class Payment(Base):
     __tablename__ = 'payments'
+    __table_args__ = (
+        Index('ix_payments_enroll_id', 'enroll_id'),
+    )
 
     enroll_id: Mapped[int] = mapped_column(
-        ForeignKey('service_enrolls.id'), nullable=True)
+        ForeignKey('service_enrolls.id', ondelete='CASCADE'), nullable=True)
     enroll: Mapped['ServiceEnroll'] = relationship(
         'ServiceEnroll', back_populates='payment', uselist=False
     )
@@ -46,12 +50,12 @@ class Payment(Base):
     payment_metadata: Mapped[str] = mapped_column(Text, nullable=True)
 
     created_at: Mapped[DateTime] = mapped_column(
-        DateTime, default=datetime.now(timezone.utc)
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
     )
     updated_at: Mapped[DateTime] = mapped_column(
-        DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc)
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc)
     )
-    paid_at: Mapped[DateTime] = mapped_column(DateTime, nullable=True)
+    paid_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=True)
 
     confirmation_url: Mapped[str] = mapped_column(Text, nullable=True)
 
@@ -1,29 +1,46 @@
 from sqlalchemy.orm import (
     Mapped,
     mapped_column,
-    relationship
+    relationship,
+    validates
 )
 
 from sqlalchemy import (
     ForeignKey,
+    Index,
     JSON
 )
+from sqlalchemy.dialects.postgresql import JSONB
 
 from .. import Base
+from .date import availability_mask
 
 
 class ScheduleTemplate(Base):
     __tablename__ = 'scheduletemplates'
+    __table_args__ = (
+        Index('ix_scheduletemplates_day_active', 'day', 'is_active'),
+        Index('ix_scheduletemplates_service_id_user_id', 'service_id', 'user_id'),
+        Index('ix_scheduletemplates_user_id', 'user_id'),
+    )
     day: Mapped[str]
-    hours_work = mapped_column(JSON)
+    hours_work = mapped_column(JSON().with_variant(JSONB(), 'postgresql'))
     is_active: Mapped[bool] = mapped_column(default=True)
+    # same bitmap as dates.free_mask, lets search see days not materialized yet
+    free_mask: Mapped[int] = mapped_column(default=0, server_default='0')
 
     user_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
     user: Mapped['User'] = relationship(
         'User', back_populates='templates', uselist=False)
 
-    service_id: Mapped[int] = mapped_column(ForeignKey('services.id'))
+    service_id: Mapped[int] = mapped_column(
+        ForeignKey('services.id', ondelete='CASCADE'))
     service: Mapped['Service'] = relationship(
         'Service', back_populates='templates', uselist=False)
 
+    @validates('hours_work')
+    def _sync_free_mask(self, key, hours_work):
+        self.free_mask = availability_mask(hours_work or {})
+        return hours_work
+
 #demo hold mvp confirm
\ No newline at end of file
@@ -0,0 +1,68 @@
+from sqlalchemy import DDL, event
+
+from .. import Base
+
+# full text index of the services, not a model: an fts5 virtual table on sqlite
+# (rowid is the service id), a tsvector table on postgres. create_all builds it
+# with the tables, the migrations do the same by hand. a sqlite batch migration
+# that recreates services or services_tag_connections drops their triggers,
+# it has to create them again
+SERVICE_SEARCH_TABLE = 'services_search'
+
+
+def _fold(column: str) -> str:
+    # unicode61 folds the case of cyrillic but keeps ё apart from е
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def _sqlite_tags(service_id: str) -> str:
+    return _fold(
+        "coalesce((SELECT group_concat(tags.title, ' ') FROM services_tag_connections "
+        "JOIN tags ON tags.id = services_tag_connections.tag_id "
+        f"WHERE services_tag_connections.service_id = {service_id}), '')"
+    )
+
+
+SQLITE_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS services_search USING fts5("
+    "title, description, tags, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+
+    "CREATE TRIGGER IF NOT EXISTS services_search_insert AFTER INSERT ON services BEGIN "
+    "INSERT INTO services_search (rowid, title, description, tags) "
+    f"VALUES (new.id, {_fold('new.title')}, {_fold('new.description')}, ''); END",
+
+    "CREATE TRIGGER IF NOT EXISTS services_search_update AFTER UPDATE OF title, description ON services BEGIN "
+    f"UPDATE services_search SET title = {_fold('new.title')}, description = {_fold('new.description')} "
+    "WHERE rowid = new.id; END",
+
+    "CREATE TRIGGER IF NOT EXISTS services_search_delete AFTER DELETE ON services BEGIN "
+    "DELETE FROM services_search WHERE rowid = old.id; END",
+
+    "CREATE TRIGGER IF NOT EXISTS services_search_tag_insert AFTER INSERT ON services_tag_connections BEGIN "
+    f"UPDATE services_search SET tags = {_sqlite_tags('new.service_id')} "
+    "WHERE rowid = new.service_id; END",
+
+    "CREATE TRIGGER IF NOT EXISTS services_search_tag_delete AFTER DELETE ON services_tag_connections BEGIN "
+    f"UPDATE services_search SET tags = {_sqlite_tags('old.service_id')} "
+    "WHERE rowid = old.service_id; END",
+
+    "CREATE TRIGGER IF NOT EXISTS services_search_tag_rename AFTER UPDATE OF title ON tags BEGIN "
+    f"UPDATE services_search SET tags = {_sqlite_tags('services_search.rowid')} "
+    "WHERE rowid IN (SELECT service_id FROM services_tag_connections WHERE tag_id = new.id); END",
+)
+
+# kept up to date by ServiceSearchRepository.reindex, rows go with the service
+POSTGRES_SEARCH_DDL = (
+    "CREATE TABLE IF NOT EXISTS services_search ("
+    "service_id INTEGER PRIMARY KEY REFERENCES services (id) ON DELETE CASCADE, "
+    "document TSVECTOR NOT NULL)",
+
+    "CREATE INDEX IF NOT EXISTS ix_services_search_document ON services_search USING gin (document)",
+)
+
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(Base.metadata, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(Base.metadata, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+# the postgres table references services, it goes first
+event.listen(Base.metadata, 'before_drop', DDL(f'DROP TABLE IF EXISTS {SERVICE_SEARCH_TABLE}'))
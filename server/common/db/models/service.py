@@ -6,6 +6,7 @@ from sqlalchemy.orm import (
     Mapped,
     mapped_column,
     relationship,
+    validates
 )
 from sqlalchemy.ext.associationproxy import association_proxy
 
@@ -13,7 +14,8 @@ from sqlalchemy import (
     String,
     DateTime,
     ForeignKey,
-    Index
+    Index,
+    text
 )
 
 if TYPE_CHECKING:
@@ -25,16 +27,52 @@ if TYPE_CHECKING:
     from .chats import ServiceChat, DisputeChat
     from .accounts import Account
     from .dispute import Dispute
+    from .media import MediaVariant
 
 
 from .. import Base
 
+# status -> statuses an enroll may enter it from, the only legal transitions
+ENROLL_TRANSITIONS = {
+    'pending': ('waiting_payment', 'cancelled'),
+    'confirmed': ('pending',),
+    'ready': ('confirmed',),
+    'completed': ('ready',),
+    'cancelled': ('waiting_payment', 'pending', 'confirmed'),
+    'expired': ('waiting_payment',),
+}
+
+# enrolls that gave their slot back, the next booking of the slot is a new row
+RELEASED_STATUSES = ('cancelled', 'expired')
+HOLDS_SLOT = text(
+    f"status NOT IN ({', '.join(repr(status) for status in RELEASED_STATUSES)})")
+
+# status -> column stamped when an enroll enters it
+STATUS_TIMESTAMPS = {
+    'pending': 'pending_at',
+    'confirmed': 'confirmed_at',
+    'ready': 'ready_at',
+    'completed': 'completed_at',
+}
+
 
 class ServiceEnroll(Base):
     __tablename__ = 'service_enrolls'
     __table_args__ = (
+        # one enroll holding a slot, any number that released it
         Index('ux_service_enrolls_date_slot',
-            'service_date_id', 'slot_time', unique=True),
+            'service_date_id', 'slot_time', unique=True,
+            sqlite_where=HOLDS_SLOT, postgresql_where=HOLDS_SLOT),
+        # cutoff queries of the lifecycle jobs are range scans on these
+        Index('ix_service_enrolls_status_created_at', 'status', 'created_at'),
+        Index('ix_service_enrolls_status_pending_at', 'status', 'pending_at'),
+        Index('ix_service_enrolls_status_confirmed_at', 'status', 'confirmed_at'),
+        Index('ix_service_enrolls_status_ready_at', 'status', 'ready_at'),
+        Index('ix_service_enrolls_status_completed_at', 'status', 'completed_at'),
+        # "my enrolls" and "my enrolls of this service"
+        Index('ix_service_enrolls_user_id_service_id', 'user_id', 'service_id'),
+        # enrolls of a service, newest first
+        Index('ix_service_enrolls_service_id_id', 'service_id', 'id'),
     )
     # pending - when user booked the slot and waiting for confirmation
     # waiting_payment - when user booked the slot and waiting for payment
@@ -48,22 +86,31 @@ class ServiceEnroll(Base):
                         'cancelled', 'expired', 'waiting_payment']] = mapped_column(default='waiting_payment')
     price: Mapped[int]
     created_at: Mapped[DateTime] = mapped_column(
-        DateTime, default=datetime.now(timezone.utc))
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    pending_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    confirmed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    ready_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    # bumped by every write, ORM flushes of a stale row raise StaleDataError
+    version: Mapped[int] = mapped_column(default=1, server_default='1')
 
     user_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
     user: Mapped['User'] = relationship(
         'User', back_populates='services_enroll')
 
-    service_date_id: Mapped[int] = mapped_column(ForeignKey('dates.id'))
+    service_date_id: Mapped[int] = mapped_column(
+        ForeignKey('dates.id', ondelete='CASCADE'))
     service_date: Mapped['ServiceDate'] = relationship(
         'ServiceDate', back_populates='enrolls')
 
-    service_id: Mapped[int] = mapped_column(ForeignKey('services.id'))
+    service_id: Mapped[int] = mapped_column(
+        ForeignKey('services.id', ondelete='CASCADE'))
     service: Mapped['Service'] = relationship(
         'Service', back_populates='users_enroll')
 
     payment: Mapped['Payment'] = relationship(
-        'Payment', back_populates='enroll', uselist=False, cascade="all, delete-orphan")
+        'Payment', back_populates='enroll', uselist=False,
+        cascade="all, delete-orphan", passive_deletes=True)
 
     disputes: Mapped[List['Dispute']] = relationship(
         'Dispute', foreign_keys='Dispute.enroll_id', back_populates='enroll')
@@ -71,35 +118,74 @@ class ServiceEnroll(Base):
     dispute_chat: Mapped['DisputeChat'] = relationship(
         'DisputeChat', foreign_keys='DisputeChat.enroll_id', back_populates='enroll', uselist=False)
 
+    __mapper_args__ = {'version_id_col': version}
+
+    @validates('status')
+    def _stamp_status(self, key, status):
+        # bulk UPDATEs bypass this and stamp the column themselves
+        column = STATUS_TIMESTAMPS.get(status)
+        if column is not None and status != self.status:
+            setattr(self, column, datetime.now(timezone.utc))
+        return status
+
 
 class Service(Base):
     __tablename__ = 'services'
+    __table_args__ = (
+        # keyset pages of the catalog, newest goes by the primary key
+        Index('ix_services_user_id_id', 'user_id', 'id'),
+        Index('ix_services_price_id', 'price', 'id'),
+        Index('ix_services_user_id_price_id', 'user_id', 'price', 'id'),
+    )
     title: Mapped[str] = mapped_column(String(128))
     description: Mapped[str] = mapped_column(String(896))
+    # urls, an uploaded file is kept in the media store under its sha256
     photo: Mapped[str] = mapped_column(nullable=True)
     certificate: Mapped[str] = mapped_column(nullable=True)
+    photo_hash: Mapped[str] = mapped_column(String(64), nullable=True)
+    certificate_hash: Mapped[str] = mapped_column(String(64), nullable=True)
     created_at: Mapped[DateTime] = mapped_column(
-        DateTime, default=datetime.now(timezone.utc))
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     price: Mapped[int]
 
+    # children go with ON DELETE CASCADE, the ORM does not load them to delete
     templates: Mapped[List['ScheduleTemplate']] = relationship(
-        'ScheduleTemplate', back_populates='service', cascade="all, delete-orphan")
+        'ScheduleTemplate', back_populates='service',
+        cascade="all, delete-orphan", passive_deletes=True)
     dates: Mapped[List['ServiceDate']] = relationship(
-        'ServiceDate', back_populates='service', cascade="all, delete-orphan")
+        'ServiceDate', back_populates='service',
+        cascade="all, delete-orphan", passive_deletes=True)
 
     user_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
     user: Mapped['User'] = relationship(
         'User', back_populates='services', uselist=False)
 
     users_enroll: Mapped[List['ServiceEnroll']] = relationship(
-        'ServiceEnroll', back_populates='service', cascade="all, delete-orphan")
+        'ServiceEnroll', back_populates='service',
+        cascade="all, delete-orphan", passive_deletes=True)
 
     tag_connections: Mapped[List['ServiceTagConnection']] = relationship(
-        'ServiceTagConnection', back_populates='service', cascade="all, delete-orphan")
+        'ServiceTagConnection', back_populates='service',
+        cascade="all, delete-orphan", passive_deletes=True)
 
     tags: association_proxy = association_proxy('tag_connections', 'tag')
 
     chats: Mapped[List['ServiceChat']] = relationship(
-        'ServiceChat', back_populates='service', cascade="all, delete-orphan")
+        'ServiceChat', back_populates='service',
+        cascade="all, delete-orphan", passive_deletes=True)
+
+    # variants belong to the image and not to the service, no foreign key
+    media_variants: Mapped[List['MediaVariant']] = relationship(
+        'MediaVariant',
+        primaryjoin='foreign(MediaVariant.source_hash) == Service.photo_hash',
+        viewonly=True)
+
+    @property
+    def photo_variants(self) -> dict:
+        '''{'thumb': {'webp': url, 'jpg': url}, 'medium': {...}}, empty until processed'''
+        variants = {}
+        for media_variant in self.media_variants:
+            variants.setdefault(media_variant.variant, {})[media_variant.format] = media_variant.url
+        return variants
 
 #demo hold mvp confirm
\ No newline at end of file
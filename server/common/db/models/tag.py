@@ -12,7 +12,8 @@ from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy import (
     String,
     DateTime,
-    ForeignKey
+    ForeignKey,
+    Index
 )
 
 from .. import Base, AssociationBase
@@ -24,11 +25,16 @@ if TYPE_CHECKING:
 
 class ServiceTagConnection(AssociationBase):
     __tablename__ = 'services_tag_connections'
+    # the primary key leads with service_id, category search comes from the tag side,
+    # the service ids of a tag are read from the index alone
+    __table_args__ = (
+        Index('ix_services_tag_connections_tag_id_service_id', 'tag_id', 'service_id'),
+    )
     __mapper_args__ = {
         'exclude_properties': ['id']
     }
     service_id: Mapped[int] = mapped_column(
-        ForeignKey('services.id'), primary_key=True)
+        ForeignKey('services.id', ondelete='CASCADE'), primary_key=True)
     service: Mapped['Service'] = relationship(
         'Service', back_populates='tag_connections')
     tag_id: Mapped[int] = mapped_column(
@@ -39,13 +45,17 @@ class ServiceTagConnection(AssociationBase):
 
 class Tag(Base):
     __tablename__ = 'tags'
+    __table_args__ = (
+        Index('ix_tags_title', 'title'),
+        Index('ix_tags_user_id', 'user_id'),
+    )
     title: Mapped[str] = mapped_column(String(55))
 
     user_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
     user: Mapped['User'] = relationship(
         'User', back_populates='tags', uselist=False)
     created_at: Mapped[DateTime] = mapped_column(
-        DateTime, default=datetime.now(timezone.utc))
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
     service_connections: Mapped[List['ServiceTagConnection']] = relationship(
         'ServiceTagConnection', back_populates='tag')
@@ -9,7 +9,8 @@ from sqlalchemy.orm import (
 
 from sqlalchemy import (
     String,
-    DateTime
+    DateTime,
+    Index
 )
 
 if TYPE_CHECKING:
@@ -28,6 +29,12 @@ from .. import Base
 
 class User(Base):
     __tablename__ = 'users'
+    __table_args__ = (
+        # login, registration checks and the telegram bot look users up by these
+        Index('ix_users_name', 'name'),
+        Index('ix_users_email', 'email'),
+        Index('ix_users_telegram_id', 'telegram_id'),
+    )
     name: Mapped[str] = mapped_column(String(255))
     password: Mapped[str] = mapped_column(String(1024))
 
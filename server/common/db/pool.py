@@ -0,0 +1,147 @@
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from os import getenv
+from time import monotonic, perf_counter
+from uuid import uuid4
+
+from dotenv import load_dotenv
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+load_dotenv()
+
+# api - uvicorn workers, worker - celery (--pool=solo, one task at a time), bot - telegram bot
+DB_PROCESS_ROLE = getenv('DB_PROCESS_ROLE', 'api')
+POOL_PROFILES = {
+    'api': {'pool_size': 20, 'max_overflow': 10, 'pool_timeout': 10},
+    'worker': {'pool_size': 2, 'max_overflow': 2, 'pool_timeout': 30},
+    'bot': {'pool_size': 5, 'max_overflow': 5, 'pool_timeout': 10},
+}
+# prepared statements kept per asyncpg connection, the hot queries of a worker fit
+DB_STATEMENT_CACHE_SIZE = int(getenv('DB_STATEMENT_CACHE_SIZE', '500'))
+# pgbouncer in transaction mode hands every transaction another server connection
+DB_PGBOUNCER = getenv('DB_PGBOUNCER', 'false').lower() in ('1', 'true', 'yes')
+DB_COMMAND_TIMEOUT = float(getenv('DB_COMMAND_TIMEOUT', '60'))
+# upper bounds of the checkout wait histogram
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000, 10000)
+# a pool that timed out this recently still counts as saturated
+SATURATION_WINDOW_SECONDS = 60
+
+# scope of the current request, the route is read from it once routing is done
+request_scope: ContextVar[dict | None] = ContextVar('request_scope', default=None)
+
+
+def pool_settings(role: str = DB_PROCESS_ROLE) -> dict:
+    '''
+    Pool profile of the process role, DB_POOL_SIZE / DB_MAX_OVERFLOW /
+    DB_POOL_TIMEOUT override single values
+    '''
+    settings = dict(POOL_PROFILES.get(role, POOL_PROFILES['api']))
+    for key, env in (('pool_size', 'DB_POOL_SIZE'),
+                     ('max_overflow', 'DB_MAX_OVERFLOW'),
+                     ('pool_timeout', 'DB_POOL_TIMEOUT')):
+        if getenv(env):
+            settings[key] = type(settings[key])(getenv(env))
+    return settings
+
+
+def asyncpg_connect_args(role: str = DB_PROCESS_ROLE) -> dict:
+    '''
+    connect_args of the asyncpg driver: prepared statement caches,
+    a per role application_name for pg_stat_activity and no JIT,
+    which only adds planning time to short OLTP queries
+    '''
+    connect_args = {
+        'prepared_statement_cache_size': DB_STATEMENT_CACHE_SIZE,
+        'statement_cache_size': DB_STATEMENT_CACHE_SIZE,
+        'command_timeout': DB_COMMAND_TIMEOUT,
+        'server_settings': {'application_name': f'mstv2-{role}', 'jit': 'off'},
+    }
+    if DB_PGBOUNCER:
+        # the statement prepared on one server connection is unknown to the next
+        connect_args.update({
+            'prepared_statement_cache_size': 0,
+            'statement_cache_size': 0,
+            'prepared_statement_name_func': lambda: f'__asyncpg_{uuid4()}__',
+        })
+    return connect_args
+
+
+def current_route() -> str:
+    scope = request_scope.get()
+    if scope is None:
+        return DB_PROCESS_ROLE
+
+    # /services/15 -> /services/{service_id}, keeps the label set small
+    path = scope.get('path', '')
+    for name, value in (scope.get('path_params') or {}).items():
+        path = path.replace(f'/{value}', f'/{{{name}}}', 1)
+    return f"{scope.get('method', 'WS')} {path}"
+
+
+class PoolMetrics:
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.wait_ms: Counter = Counter()
+        self.max_wait_ms = 0.0
+        self.timeouts: Counter = Counter()
+        self.last_timeout: float | None = None
+
+    def waited(self, seconds: float) -> None:
+        elapsed_ms = seconds * 1000
+        self.checkouts += 1
+        self.max_wait_ms = max(self.max_wait_ms, elapsed_ms)
+        bucket = bisect_left(WAIT_BUCKETS_MS, elapsed_ms)
+        self.wait_ms[str(WAIT_BUCKETS_MS[bucket]) if bucket < len(WAIT_BUCKETS_MS) else 'inf'] += 1
+
+    def timed_out(self, route: str) -> None:
+        self.timeouts[route] += 1
+        self.last_timeout = monotonic()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    '''
+    Queue pool that times every checkout and counts timeouts by route
+    '''
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.timed_out(current_route())
+            raise
+        self.metrics.waited(perf_counter() - started)
+        return connection
+
+    @property
+    def capacity(self) -> int:
+        return self.size() + max(self._max_overflow, 0)
+
+    def saturated(self) -> bool:
+        last_timeout = self.metrics.last_timeout
+        return self.checkedout() >= self.capacity or (
+            last_timeout is not None
+            and monotonic() - last_timeout < SATURATION_WINDOW_SECONDS)
+
+    def snapshot(self) -> dict:
+        metrics = self.metrics
+        return {
+            'size': self.size(),
+            'capacity': self.capacity,
+            'checked_out': self.checkedout(),
+            'overflow': max(self.overflow(), 0),
+            'saturated': self.saturated(),
+            'checkouts': metrics.checkouts,
+            'wait_ms': {
+                bucket: metrics.wait_ms[bucket]
+                for bucket in [*map(str, WAIT_BUCKETS_MS), 'inf']
+            },
+            'max_wait_ms': round(metrics.max_wait_ms, 2),
+            'timeouts': sum(metrics.timeouts.values()),
+            'timeouts_by_route': dict(metrics.timeouts),
+        }
@@ -0,0 +1,191 @@
+import asyncio
+from os import getenv
+from typing import Awaitable, Callable, TypeVar
+from weakref import WeakKeyDictionary
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as WriteTimeoutError
+
+load_dotenv()
+
+T = TypeVar('T')
+
+# per connection, PRAGMA journal_mode=WAL also sticks to the database file
+SQLITE_BUSY_TIMEOUT_MS = int(getenv('DB_SQLITE_BUSY_TIMEOUT_MS', '5000'))
+SQLITE_MMAP_SIZE = int(getenv('DB_SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+# negative is KiB, 64 MiB of page cache per connection
+SQLITE_CACHE_SIZE = int(getenv('DB_SQLITE_CACHE_SIZE', '-65536'))
+SQLITE_WRITE_QUEUE = getenv('DB_SQLITE_WRITE_QUEUE', 'true').lower() in ('1', 'true', 'yes')
+SQLITE_WRITE_BATCH = int(getenv('DB_SQLITE_WRITE_BATCH', '64'))
+SQLITE_WRITE_TIMEOUT = float(getenv('DB_SQLITE_WRITE_TIMEOUT', '30'))
+
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}',
+    f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}',
+    f'PRAGMA cache_size={SQLITE_CACHE_SIZE}',
+    'PRAGMA temp_store=MEMORY',
+    # sqlite ignores foreign keys, ON DELETE CASCADE included, unless asked per connection
+    'PRAGMA foreign_keys=ON',
+)
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    '''
+    WAL lets readers run next to the writer, synchronous=NORMAL syncs
+    on checkpoints instead of every commit, busy_timeout makes a writer
+    of another process wait for the lock instead of failing
+    '''
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+class _WriterSlot:
+    # the slot of one event loop, asyncio locks do not cross loops
+    __slots__ = ('lock', 'owner', 'token', 'depth')
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.owner: asyncio.Task | None = None
+        self.token: object | None = None
+        self.depth = 0
+
+
+class SQLiteWriteQueue:
+    '''
+    The single writer of a process.
+    Write transactions of the primary sessions take their turn in FIFO
+    order (slot is held from the first write until the transaction ends),
+    jobs given to submit are run by one worker task in batches, the whole
+    batch under one BEGIN IMMEDIATE and one commit. Other processes still
+    meet on the file lock, busy_timeout covers them.
+    The slot is per event loop: celery tasks start a fresh loop with
+    asyncio.run every time, a loop that dies holding it takes it along
+    '''
+    def __init__(
+        self,
+        session_factory,
+        batch_size: int = SQLITE_WRITE_BATCH,
+        timeout: float = SQLITE_WRITE_TIMEOUT
+    ) -> None:
+        self._session_factory = session_factory
+        self._batch_size = batch_size
+        self._timeout = timeout
+        self._slots: WeakKeyDictionary = WeakKeyDictionary()
+        self._jobs: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+
+    def _slot(self) -> _WriterSlot:
+        loop = asyncio.get_running_loop()
+        slot = self._slots.get(loop)
+        if slot is None:
+            slot = self._slots[loop] = _WriterSlot()
+        return slot
+
+    def held(self) -> bool:
+        slot = self._slot()
+        return slot.owner is not None and slot.owner is asyncio.current_task()
+
+    def locked(self) -> bool:
+        return self._slot().lock.locked()
+
+    async def acquire(self) -> object:
+        '''
+        Waits for the slot and returns the token release wants back.
+        Re-entrant per task, the writer worker opens sessions while it holds the slot
+        '''
+        slot = self._slot()
+        if self.held():
+            slot.depth += 1
+            return slot.token
+
+        try:
+            await asyncio.wait_for(slot.lock.acquire(), self._timeout)
+        except asyncio.TimeoutError:
+            raise WriteTimeoutError(
+                f'waited more than {self._timeout}s for the sqlite writer')
+        slot.owner = asyncio.current_task()
+        slot.token = object()
+        slot.depth = 1
+        return slot.token
+
+    def release(self, token: object) -> None:
+        # by token and not by task: AsyncSession closes, and so ends the
+        # transaction holding the slot, in a task of its own
+        slot = self._slot()
+        if token is None or token is not slot.token:
+            raise RuntimeError('the sqlite writer is released by a caller that does not hold it')
+
+        slot.depth -= 1
+        if slot.depth == 0:
+            slot.owner = slot.token = None
+            slot.lock.release()
+
+    async def submit(self, job: Callable[..., Awaitable[T]]) -> T:
+        '''
+        Runs job(session) in the next batch and returns its result
+        once the batch is committed
+        '''
+        if self.held():
+            # the caller is in the middle of a write, waiting for the worker would deadlock
+            async with self._session_factory() as session:
+                result = await job(session)
+                await session.commit()
+                return result
+
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._jobs = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+        future = loop.create_future()
+        await self._jobs.put((job, future))
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._jobs.get()]
+            while len(batch) < self._batch_size and not self._jobs.empty():
+                batch.append(self._jobs.get_nowait())
+            try:
+                await self._run_batch(batch)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def _run_batch(self, batch: list) -> None:
+        # optimistic: no savepoint per job, a failing job rolls the batch
+        # back and the jobs that are left run again without it
+        batch = [(job, future) for job, future in batch if not future.cancelled()]
+        while batch:
+            results, failed = [], None
+            token = await self.acquire()
+            try:
+                async with self._session_factory() as session:
+                    # the write lock up front, no other process slips in mid batch
+                    await session.execute(text('BEGIN IMMEDIATE'))
+                    for index, (job, _) in enumerate(batch):
+                        try:
+                            results.append(await job(session))
+                        except Exception as e:
+                            failed = index, e
+                            break
+                    if failed is None:
+                        await session.commit()
+            finally:
+                self.release(token)
+
+            if failed is None:
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+                return
+
+            index, error = failed
+            batch[index][1].set_exception(error)
+            batch = batch[:index] + batch[index + 1:]
@@ -16,29 +16,31 @@ app = Celery(
 
 
 app.conf.beat_schedule = {
-    'generate-schedule-every-sunday': {
-        'task': 'server.common.tasks.task_schedule.generate_all_dates_schedule',
-        'schedule': crontab(hour=0, minute=0, day_of_week='monday'),
-    },
-    
+    # dates are resolved from the templates on read and written on booking,
+    # task_schedule.generate_all_dates_schedule stays for manual backfills
     'check-all-dates-slots-every-hour': {
         'task': 'server.common.tasks.task_check_dates.check_all_dates_schedule_on_expire',
         'schedule': crontab(minute=0), 
     },
     
-    'expire-pending-enrolls-every-minute': {
+    # payment holds are returned by the api drainer,
+    # this sweep only catches holds lost in redis
+    'expire-pending-enrolls-sweep': {
         'task': 'server.common.tasks.task_expire_pending_enrolls.expire_pending_enrolls',
-        'schedule': timedelta(minutes=1),
+        'schedule': timedelta(minutes=15),
     },
     
-    'auto-cancel-unaccepted-orders-hourly': {
-        'task': 'server.common.tasks.task_auto_cancel_unaccepted.auto_cancel_unaccepted_orders',
-        'schedule': crontab(minute=30), 
+    # auto-cancel and auto-capture run per enroll from enroll_deadlines,
+    # the hourly scans stay in their modules for manual runs
+    'drain-enroll-deadlines-every-minute': {
+        'task': 'server.common.tasks.task_drain_deadlines.drain_enroll_deadlines',
+        'schedule': timedelta(minutes=1),
     },
-    
-    'auto-capture-ready-orders-hourly': {
-        'task': 'server.common.tasks.task_auto_capture_ready.auto_capture_ready_orders',
-        'schedule': crontab(minute=45),
+
+    # variants are queued on upload, the sweep catches the lost ones
+    'sweep-media-variants': {
+        'task': 'server.common.tasks.task_media_variants.sweep_media_variants',
+        'schedule': timedelta(minutes=10),
     }
 }
 
@@ -49,4 +51,6 @@ from . import (
     task_expire_pending_enrolls,
     task_auto_cancel_unaccepted,
     task_auto_capture_ready,
+    task_drain_deadlines,
+    task_media_variants,
 )
\ No newline at end of file
@@ -2,8 +2,10 @@ import asyncio
 from datetime import datetime, timedelta, timezone
 from os import getenv
 
+from sqlalchemy import select
+
 from . import app
-from ...common.db import db_config
+from ...common.db import db_config, ServiceEnroll
 from ...enrolls.repositories import EnrollRepository
 from ...dates.repositories import ServiceDateRepository
 from ...payments.repositories import PaymentRepository
@@ -15,11 +17,73 @@ from ...common.utils.yookassa import (
 from ...common.utils.logger import logger
 
 
+async def cancel_unaccepted_enroll(
+    session,
+    enroll,
+    payment_repo: PaymentRepository,
+    date_repo: ServiceDateRepository
+) -> str | None:
+    '''
+    Cancels one pending enroll and returns the money of its payment.
+    Returns 'cancelled' or 'refunded' when the payment was touched at yookassa
+    '''
+    outcome = None
+    payment = await payment_repo.get_by_enroll_id(enroll.id)
+    if payment and payment.yookassa_payment_id:
+        try:
+            y_payment = await yookassa_get_payment(payment.yookassa_payment_id)
+            y_status = y_payment.get("status")
+        except Exception:
+            y_status = payment.yookassa_status
+
+        if y_status == "waiting_for_capture":
+            try:
+                cancel_result = await yookassa_cancel_payment(payment.yookassa_payment_id)
+                await payment_repo.update_payment(
+                    payment_id=payment.id,
+                    yookassa_status=cancel_result.get(
+                        "status", "canceled"),
+                    status="canceled",
+                )
+                outcome = "cancelled"
+            except Exception as e:
+                logger.error(
+                    f"Auto-cancel payment {payment.yookassa_payment_id} failed: {e}")
+        elif y_status == "succeeded":
+            try:
+                refund_result = await yookassa_create_refund(
+                    payment_id=payment.yookassa_payment_id,
+                    amount=payment.amount,
+                    description=f"Auto-refund for unaccepted enroll #{enroll.id}",
+                )
+                await payment_repo.update_payment(
+                    payment_id=payment.id,
+                    yookassa_status=refund_result.get(
+                        "status", "succeeded"),
+                    status="canceled",
+                )
+                outcome = "refunded"
+            except Exception as e:
+                logger.error(
+                    f"Auto-refund payment {payment.yookassa_payment_id} failed: {e}")
+        else:
+            await payment_repo.update_payment(payment_id=payment.id, status="canceled")
+
+    if enroll.service_date_id:
+        await date_repo.set_slot_status(
+            enroll.service_date_id, enroll.slot_time, "available")
+
+    enroll.status = "cancelled"
+    return outcome
+
+
 @app.task
 def auto_cancel_unaccepted_orders():
     '''
     cancelled enroll who master not confirmed at N days
     Refound money to client
+    Deadlines normally do this per enroll (task_drain_deadlines),
+    the scan is kept for manual runs
     '''
 
     async def _run():
@@ -32,10 +96,10 @@ def auto_cancel_unaccepted_orders():
             cutoff = datetime.now(timezone.utc) - timedelta(days=days)
 
             enrolls = await session.scalars(
-                db_config.select(db_config.ServiceEnroll)
+                select(ServiceEnroll)
                 .where(
-                    db_config.ServiceEnroll.status == "pending",
-                    db_config.ServiceEnroll.created_at < cutoff,
+                    ServiceEnroll.status == "pending",
+                    ServiceEnroll.pending_at < cutoff,
                 )
             )
             enrolls_list = enrolls.all()
@@ -44,59 +108,10 @@ def auto_cancel_unaccepted_orders():
 
             for enroll in enrolls_list:
                 try:
-                    payment = await payment_repo.get_by_enroll_id(enroll.id)
-                    if payment and payment.yookassa_payment_id:
-                        try:
-                            y_payment = await yookassa_get_payment(payment.yookassa_payment_id)
-                            y_status = y_payment.get("status")
-                        except Exception:
-                            y_status = payment.yookassa_status
-
-                        if y_status == "waiting_for_capture":
-                            try:
-                                cancel_result = await yookassa_cancel_payment(payment.yookassa_payment_id)
-                                await payment_repo.update_payment(
-                                    payment_id=payment.id,
-                                    yookassa_status=cancel_result.get(
-                                        "status", "canceled"),
-                                    status="canceled",
-                                )
-                                cancelled += 1
-                            except Exception as e:
-                                logger.error(
-                                    f"Auto-cancel payment {payment.yookassa_payment_id} failed: {e}")
-                        elif y_status == "succeeded":
-                            try:
-                                refund_result = await yookassa_create_refund(
-                                    payment_id=payment.yookassa_payment_id,
-                                    amount=payment.amount,
-                                    description=f"Auto-refund for unaccepted enroll #{enroll.id}",
-                                )
-                                await payment_repo.update_payment(
-                                    payment_id=payment.id,
-                                    yookassa_status=refund_result.get(
-                                        "status", "succeeded"),
-                                    status="canceled",
-                                )
-                                refunded += 1
-                            except Exception as e:
-                                logger.error(
-                                    f"Auto-refund payment {payment.yookassa_payment_id} failed: {e}")
-                        else:
-                            await payment_repo.update_payment(payment_id=payment.id, status="canceled")
-
-                    if enroll.service_date_id:
-                        date_obj = await date_repo.get_by_id(enroll.service_date_id)
-                        if date_obj:
-                            slots = date_obj.slots.copy()
-                            if enroll.slot_time in slots:
-                                slots[enroll.slot_time] = "available"
-                            await session.merge(
-                                db_config.ServiceDate(
-                                    id=enroll.service_date_id, slots=slots)
-                            )
-
-                    enroll.status = "cancelled"
+                    outcome = await cancel_unaccepted_enroll(
+                        session, enroll, payment_repo, date_repo)
+                    cancelled += outcome == "cancelled"
+                    refunded += outcome == "refunded"
                 except Exception as e:
                     logger.error(
                         f"Auto-cancel error for enroll {enroll.id}: {e}")
@@ -2,8 +2,10 @@ import asyncio
 from datetime import datetime, timedelta, timezone
 from os import getenv
 
+from sqlalchemy import select
+
 from . import app
-from ...common.db import db_config
+from ...common.db import db_config, ServiceEnroll
 from ...enrolls.repositories import EnrollRepository
 from ...payments.repositories import PaymentRepository
 from ...common.utils.yookassa import (
@@ -13,11 +15,64 @@ from ...common.utils.yookassa import (
 )
 from ...common.utils.logger import logger
 
+async def capture_ready_enroll(
+    enroll,
+    payment_repo: PaymentRepository
+) -> tuple[bool, bool]:
+    '''
+    Captures the payment of one ready enroll, starts the payout
+    and completes the enroll. Returns (captured, payout_started)
+    '''
+    captured, payout_started = False, False
+    payment = await payment_repo.get_by_enroll_id(enroll.id)
+    if not payment or not payment.yookassa_payment_id:
+        return captured, payout_started
+
+    try:
+        y_payment = await yookassa_get_payment(payment.yookassa_payment_id)
+        y_status = y_payment.get("status")
+    except Exception:
+        y_status = payment.yookassa_status
+
+    if y_status == "waiting_for_capture":
+        try:
+            capture_result = await yookassa_capture_payment(payment.yookassa_payment_id)
+            captured = True
+            await payment_repo.update_payment(
+                payment_id=payment.id,
+                yookassa_status=capture_result.get(
+                    "status", "succeeded"),
+                status="succeeded",
+                paid_at=capture_result.get("paid_at"),
+            )
+
+            payout_result = await yookassa_process_deal_closure(payment.yookassa_payment_id)
+            if payout_result.get("success"):
+                payout_started = True
+            else:
+                logger.error(
+                    f"Deal closure failed for payment {payment.yookassa_payment_id}: {payout_result}")
+        except Exception as e:
+            logger.error(
+                f"Auto-capture failed for {payment.yookassa_payment_id}: {e}")
+    elif y_status == "succeeded":
+        payout_result = await yookassa_process_deal_closure(payment.yookassa_payment_id)
+        if payout_result.get("success"):
+            payout_started = True
+        else:
+            logger.error(
+                f"Deal closure failed for payment {payment.yookassa_payment_id}: {payout_result}")
+
+    enroll.status = "completed"
+    return captured, payout_started
+
+
 @app.task
 def auto_capture_ready_orders():
     '''
     autp-capture and paying if client not confirmed N days after status 'ready'
-    use created_at as approximation of the time when the order became ready
+    Deadlines normally do this per enroll (task_drain_deadlines),
+    the scan is kept for manual runs
     '''
 
     async def _run():
@@ -29,10 +84,10 @@ def auto_capture_ready_orders():
             cutoff = datetime.now(timezone.utc) - timedelta(days=days)
 
             enrolls = await session.scalars(
-                db_config.select(db_config.ServiceEnroll)
+                select(ServiceEnroll)
                 .where(
-                    db_config.ServiceEnroll.status == "ready",
-                    db_config.ServiceEnroll.created_at < cutoff,
+                    ServiceEnroll.status == "ready",
+                    ServiceEnroll.ready_at < cutoff,
                 )
             )
             enrolls_list = enrolls.all()
@@ -40,46 +95,10 @@ def auto_capture_ready_orders():
             captured, payouts = 0, 0
             for enroll in enrolls_list:
                 try:
-                    payment = await payment_repo.get_by_enroll_id(enroll.id)
-                    if not payment or not payment.yookassa_payment_id:
-                        continue
-
-                    try:
-                        y_payment = await yookassa_get_payment(payment.yookassa_payment_id)
-                        y_status = y_payment.get("status")
-                    except Exception:
-                        y_status = payment.yookassa_status
-
-                    if y_status == "waiting_for_capture":
-                        try:
-                            capture_result = await yookassa_capture_payment(payment.yookassa_payment_id)
-                            captured += 1
-                            await payment_repo.update_payment(
-                                payment_id=payment.id,
-                                yookassa_status=capture_result.get(
-                                    "status", "succeeded"),
-                                status="succeeded",
-                                paid_at=capture_result.get("paid_at"),
-                            )
-
-                            payout_result = await yookassa_process_deal_closure(payment.yookassa_payment_id)
-                            if payout_result.get("success"):
-                                payouts += 1
-                            else:
-                                logger.error(
-                                    f"Deal closure failed for payment {payment.yookassa_payment_id}: {payout_result}")
-                        except Exception as e:
-                            logger.error(
-                                f"Auto-capture failed for {payment.yookassa_payment_id}: {e}")
-                    elif y_status == "succeeded":
-                        payout_result = await yookassa_process_deal_closure(payment.yookassa_payment_id)
-                        if payout_result.get("success"):
-                            payouts += 1
-                        else:
-                            logger.error(
-                                f"Deal closure failed for payment {payment.yookassa_payment_id}: {payout_result}")
-
-                    enroll.status = "completed"
+                    was_captured, payout_started = await capture_ready_enroll(
+                        enroll, payment_repo)
+                    captured += was_captured
+                    payouts += payout_started
                 except Exception as e:
                     logger.error(
                         f"Auto-capture error for enroll {enroll.id}: {e}")
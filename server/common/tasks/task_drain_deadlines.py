@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from . import app
+from .task_auto_cancel_unaccepted import cancel_unaccepted_enroll
+from .task_auto_capture_ready import capture_ready_enroll
+from ...common.db import db_config, ServiceEnroll
+from ...enrolls.repositories import EnrollDeadlineRepository
+from ...enrolls.repositories.deadline_repository import STATUS_DEADLINES
+from ...dates.repositories import ServiceDateRepository
+from ...payments.repositories import PaymentRepository
+from ...common.utils.logger import logger
+
+DEADLINE_DRAIN_BATCH = 200
+DEADLINE_RETRY_DELAY = timedelta(minutes=5)
+# action -> status the enroll must still be in
+ACTION_STATUSES = {action: status for status, action in STATUS_DEADLINES.items()}
+
+
+def _as_utc(moment: datetime) -> datetime:
+    # sqlite hands timezone aware columns back naive
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+async def drain_due_deadlines(
+    session,
+    limit: int = DEADLINE_DRAIN_BATCH,
+    now: datetime | None = None
+) -> dict:
+    '''
+    Runs one batch of due deadlines. The claim is committed first,
+    then every action runs in its own transaction and drops its deadline
+    with it. Deadlines whose enroll left the status meanwhile are dropped,
+    a failed action is rolled back and its deadline is due again after
+    DEADLINE_RETRY_DELAY, when the claim runs out.
+    lag_* is the delay between due_at and the action
+    '''
+    now = now or datetime.now(timezone.utc)
+    deadline_repo = EnrollDeadlineRepository(session)
+    payment_repo = PaymentRepository(session)
+    date_repo = ServiceDateRepository(session)
+
+    deadlines = await deadline_repo.claim_due(now, limit, DEADLINE_RETRY_DELAY)
+    # one query for the batch, session.get below reloads only after a rollback
+    enrolls = (await session.scalars(
+        select(ServiceEnroll)
+        .where(ServiceEnroll.id.in_([enroll_id for enroll_id, _, _ in deadlines]))
+    )).all()
+    await session.commit()
+
+    done, stale, failed, lags = 0, 0, 0, []
+    for enroll_id, action, due_at in deadlines:
+        try:
+            enroll = await session.get(ServiceEnroll, enroll_id)
+            is_due = enroll is not None and enroll.status == ACTION_STATUSES[action]
+            if is_due:
+                if action == 'auto_cancel':
+                    await cancel_unaccepted_enroll(session, enroll, payment_repo, date_repo)
+                else:
+                    await capture_ready_enroll(enroll, payment_repo)
+            await deadline_repo.disarm(enroll_id, action)
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            failed += 1
+            logger.error(f'{action} failed for enroll {enroll_id}: {e}')
+            continue
+
+        if is_due:
+            done += 1
+            lags.append((now - _as_utc(due_at)).total_seconds())
+        else:
+            stale += 1
+
+    return {
+        'claimed': len(deadlines),
+        'done': done,
+        'stale': stale,
+        'failed': failed,
+        'lag_max_seconds': round(max(lags), 1) if lags else 0,
+        'lag_avg_seconds': round(sum(lags) / len(lags), 1) if lags else 0,
+    }
+
+@app.task
+def drain_enroll_deadlines():
+    '''
+    Auto-cancel of unaccepted and auto-capture of unconfirmed enrolls.
+    Only due deadlines are read, batch after batch until none is left
+    '''
+
+    async def _run():
+        totals = {'claimed': 0, 'done': 0, 'stale': 0, 'failed': 0,
+                  'lag_max_seconds': 0}
+        while True:
+            async with db_config.Session() as session:
+                batch = await drain_due_deadlines(session)
+
+            for key in ('claimed', 'done', 'stale', 'failed'):
+                totals[key] += batch[key]
+            totals['lag_max_seconds'] = max(
+                totals['lag_max_seconds'], batch['lag_max_seconds'])
+
+            if batch['claimed'] < DEADLINE_DRAIN_BATCH:
+                break
+
+        if totals['claimed']:
+            logger.info(f'enroll deadlines drained: {totals}')
+        return {'status': 'success', **totals}
+
+    try:
+        return asyncio.run(_run())
+    except Exception as e:
+        return {'status': 'failed', 'detail': str(e)}
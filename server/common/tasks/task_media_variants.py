@@ -0,0 +1,136 @@
+import asyncio
+
+from . import app
+from ...common.db import db_config
+from ...common.utils import media_store
+from ...common.utils.image_variants import (
+    IMAGE_ERRORS,
+    IMAGE_FORMATS,
+    IMAGE_VARIANTS,
+    render_variants
+)
+from ...common.utils.logger import logger
+from ...media.repositories import MediaVariantRepository
+
+MEDIA_SWEEP_BATCH = 100
+
+
+async def process_media_variants(session, name: str) -> dict:
+    '''
+    Renders the variants of the stored image name and records them
+    under its sha256. Variants recorded before are not rendered again,
+    a file that is missing or does not decode is marked failed so that
+    the sweep stops picking it up
+    '''
+    source_hash = name.partition('.')[0]
+    variant_repo = MediaVariantRepository(session)
+
+    expected = {(variant, extension) for variant in IMAGE_VARIANTS for extension in IMAGE_FORMATS}
+    existing = {
+        (media_variant.variant, media_variant.format)
+        for media_variant in await variant_repo.get_by_source_hash(source_hash)
+    }
+    if expected <= existing:
+        return {'status': 'exists', 'variants': 0}
+
+    path = media_store.path(name)
+    if not path.is_file():
+        await variant_repo.mark_failed(source_hash, 'missing')
+        await session.commit()
+        return {'status': 'missing', 'variants': 0}
+
+    try:
+        rendered_variants = render_variants(path)
+    except IMAGE_ERRORS as e:
+        logger.warning(f'media variants of {name} not rendered: {e}')
+        await variant_repo.mark_failed(source_hash, 'broken')
+        await session.commit()
+        return {'status': 'broken', 'variants': 0}
+
+    created = 0
+    for rendered in rendered_variants:
+        if (rendered.variant, rendered.format) in existing:
+            continue
+        stored = media_store.save_bytes(rendered.data)
+        if stored is None:
+            logger.warning(
+                f'{rendered.variant} {rendered.format} of {name} is over the media size cap')
+            continue
+        await variant_repo.save(
+            source_hash,
+            rendered.variant,
+            rendered.format,
+            stored.url,
+            rendered.width,
+            rendered.height,
+            stored.size
+        )
+        created += 1
+
+    if not created and not existing:
+        # nothing to show, the sweep must not render it again and again
+        await variant_repo.mark_failed(source_hash, 'oversize')
+        await session.commit()
+        return {'status': 'oversize', 'variants': 0}
+
+    # uploaded again after a failure
+    await variant_repo.clear_failed(source_hash)
+    await session.commit()
+    return {'status': 'processed', 'variants': created}
+
+
+@app.task
+def generate_media_variants(name: str):
+    async def _run():
+        async with db_config.Session() as session:
+            return await process_media_variants(session, name)
+
+    try:
+        return asyncio.run(_run())
+    except Exception as e:
+        logger.error(f'media variants failed for {name}: {e}')
+        return {'status': 'failed', 'detail': str(e)}
+
+
+@app.task
+def sweep_media_variants():
+    '''
+    Photos whose task was lost (broker down on upload) or failed,
+    and the ones extracted from the rows by the migration.
+    Missing and broken files are marked by process_media_variants
+    and not picked up again
+    '''
+    async def _run():
+        processed, failed = 0, 0
+        async with db_config.Session() as session:
+            photos = await MediaVariantRepository(session).get_unprocessed_photos(MEDIA_SWEEP_BATCH)
+
+        for photo_hash, photo in photos:
+            name = (photo or '').rpartition('/')[2]
+            if media_store.digest_of(photo or '') != photo_hash:
+                continue
+            try:
+                async with db_config.Session() as session:
+                    await process_media_variants(session, name)
+                processed += 1
+            except Exception as e:
+                failed += 1
+                logger.error(f'media variants failed for {name}: {e}')
+
+        return {'status': 'success', 'processed': processed, 'failed': failed}
+
+    try:
+        return asyncio.run(_run())
+    except Exception as e:
+        return {'status': 'failed', 'detail': str(e)}
+
+
+def enqueue_media_variants(name: str) -> None:
+    '''
+    Hands the image to the worker, a broker that is down never fails
+    the upload, sweep_media_variants picks the photo up later
+    '''
+    try:
+        generate_media_variants.apply_async(args=[name], retry=False)
+    except Exception as e:
+        logger.warning(f'media variants not queued for {name}: {e}')
@@ -0,0 +1,58 @@
+import pytest
+
+
+@pytest.fixture
+async def database(tmp_path):
+    '''
+    Throwaway sqlite database with the full schema,
+    file based so that several sessions can race on it
+    '''
+    from server.common.db import DataBaseConfiguration
+
+    db = DataBaseConfiguration(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    await db.up()
+    yield db
+    await db.engine.dispose()
+
+
+@pytest.fixture
+async def postgres():
+    '''
+    The schema created from scratch in the TEST_PG_URL database,
+    for the tests marked with needs_postgres
+    '''
+    from os import getenv
+
+    from server.common.db import DataBaseConfiguration
+
+    db = DataBaseConfiguration(getenv('TEST_PG_URL'))
+    await db.migrate()
+    yield db
+    await db.drop()
+    await db.engine.dispose()
+
+
+@pytest.fixture
+def query_budget():
+    '''
+    with query_budget(max_queries=5): ...
+    fails the test when the block runs more statements than max_queries
+    or one normalized statement more than max_repeats times
+    '''
+    from contextlib import contextmanager
+
+    from server.common.utils.query_budget import QUERY_REPEAT_LIMIT, collect_queries
+
+    @contextmanager
+    def budget(max_queries: int, max_repeats: int = QUERY_REPEAT_LIMIT):
+        with collect_queries() as stats:
+            yield stats
+
+        assert stats.count <= max_queries, (
+            f'{stats.count} queries, budget is {max_queries}: '
+            f'{dict(stats.statements)}')
+        assert not stats.repeated(max_repeats), (
+            f'statements repeated more than {max_repeats} times: '
+            f'{stats.repeated(max_repeats)}')
+
+    return budget
@@ -0,0 +1,84 @@
+from datetime import date, timedelta
+
+import pytest
+
+
+async def _free_mask(database, service_date_id: int) -> int:
+    from server.common.db import ServiceDate, select
+
+    async with database.Session() as session:
+        return await session.scalar(
+            select(ServiceDate.free_mask).where(ServiceDate.id == service_date_id))
+
+
+@pytest.mark.asyncio
+async def test_free_mask_follows_booking_and_cancel(database):
+    from server.common.db import Service, ServiceDate, User
+    from server.common.db.models.date import hours_mask
+    from server.dates.repositories import ServiceDateRepository
+    from server.enrolls.repositories import EnrollRepository
+    from server.enrolls.schemas import CreateEnrollModel
+    from server.enrolls.usecases.booking_usecase import BookingUseCase
+    from server.payments.repositories import PaymentRepository
+    from server.services.repositories import ServiceRepository
+
+    day = date.today() + timedelta(days=1)
+    async with database.Session() as session:
+        master = User(name='master', password='-', email='m@example.com')
+        client = User(name='client', password='-', email='c@example.com')
+        session.add_all([master, client])
+        await session.flush()
+        service = Service(title='massage', description='-',
+                          price=2000, user_id=master.id)
+        session.add(service)
+        await session.flush()
+        service_date = ServiceDate(
+            date=day,
+            slots={'14:00': 'available', '15:00': 'available', '16:00': 'break'},
+            service_id=service.id
+        )
+        session.add(service_date)
+        await session.commit()
+
+    assert await _free_mask(database, service_date.id) == hours_mask([14, 15])
+
+    async with database.Session() as session:
+        booking = BookingUseCase(
+            session,
+            EnrollRepository(session),
+            ServiceDateRepository(session),
+            PaymentRepository(session)
+        )
+        enroll = await booking.create_book(client.id, CreateEnrollModel(
+            service_id=service.id,
+            service_date_id=service_date.id,
+            slot_time='14:00',
+            price=1
+        ))
+
+    assert await _free_mask(database, service_date.id) == hours_mask([15])
+
+    async with database.Session() as session:
+        repo = ServiceRepository(session)
+        assert [s.id for s in await repo.get_all_free_at(day, hours_mask([15, 16]))] == [service.id]
+        assert await repo.get_all_free_at(day, hours_mask([14, 15]), whole_window=True) == []
+        assert await repo.get_all_free_at(day + timedelta(days=1), hours_mask([15])) == []
+
+    async with database.Session() as session:
+        booking = BookingUseCase(
+            session,
+            EnrollRepository(session),
+            ServiceDateRepository(session),
+            PaymentRepository(session)
+        )
+        await booking.cancel_book(enroll.id, client.id)
+
+    assert await _free_mask(database, service_date.id) == hours_mask([14, 15])
+
+    async with database.Session() as session:
+        await ServiceDateRepository(session).mark_dates_break([service_date.id])
+        await session.commit()
+
+    assert await _free_mask(database, service_date.id) == 0
+
+#demo hold mvp confirm
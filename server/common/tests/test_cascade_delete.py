@@ -0,0 +1,87 @@
+from datetime import date, timedelta
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_service_delete_is_one_statement_and_cascades(database, query_budget):
+    from sqlalchemy import func, select
+
+    from server.common.db import (
+        Payment,
+        ScheduleTemplate,
+        Service,
+        ServiceChat,
+        ServiceDate,
+        ServiceEnroll,
+        ServiceMessage,
+        ServiceSlot,
+        ServiceTagConnection,
+        Tag,
+        User
+    )
+    from server.chats.repository.service_chat_repository import ServiceChatRepository
+    from server.services.repositories import ServiceRepository
+
+    async with database.Session() as session:
+        master, client = (
+            User(name=name, password='-', email=f'{name}@example.com')
+            for name in ('master', 'client')
+        )
+        session.add_all([master, client])
+        await session.flush()
+
+        services = [
+            Service(title=title, description='-', price=1500, user_id=master.id)
+            for title in ('haircut', 'shave')
+        ]
+        session.add_all(services)
+        tag = Tag(title='hair', user_id=master.id)
+        session.add(tag)
+        await session.flush()
+
+        for service in services:
+            service_date = ServiceDate(
+                date=date.today() + timedelta(days=1), service_id=service.id,
+                slots={'10:00': 'booked', '11:00': 'available'})
+            session.add(service_date)
+            session.add(ScheduleTemplate(
+                day='monday', hours_work={'10:00': 'available'},
+                user_id=master.id, service_id=service.id))
+            session.add(ServiceTagConnection(service_id=service.id, tag_id=tag.id))
+            chat = ServiceChat(service_id=service.id,
+                               master_id=master.id, client_id=client.id)
+            session.add(chat)
+            await session.flush()
+
+            enroll = ServiceEnroll(slot_time='10:00', status='pending', price=1500,
+                                   user_id=client.id, service_id=service.id,
+                                   service_date_id=service_date.id)
+            session.add(enroll)
+            session.add(ServiceMessage(content='hi', chat_id=chat.id, sender_id=client.id))
+            await session.flush()
+            session.add(Payment(enroll_id=enroll.id, amount=1500))
+        await session.commit()
+
+    deleted, kept = services
+    async with database.Session() as session:
+        with query_budget(max_queries=1):
+            assert await ServiceRepository(session).delete_service(deleted.id, master.id)
+        await session.commit()
+
+    async with database.Session() as session:
+        # only the rows of the kept service are left, tags are not children
+        for model, rows in ((Service, 1), (ScheduleTemplate, 1), (ServiceDate, 1),
+                            (ServiceSlot, 2), (ServiceEnroll, 1), (Payment, 1),
+                            (ServiceTagConnection, 1), (ServiceChat, 1),
+                            (ServiceMessage, 1), (Tag, 1)):
+            assert await session.scalar(
+                select(func.count()).select_from(model)) == rows, model
+        assert await session.scalar(select(Service.id)) == kept.id
+
+        chat_id = await session.scalar(select(ServiceChat.id))
+        repository = ServiceChatRepository(session)
+        assert not await repository.delete_chat(chat_id, user_id=0)
+        assert await repository.delete_chat(chat_id, master.id)
+        await session.commit()
+        assert await session.scalar(select(func.count(ServiceMessage.id))) == 0
@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_expiry_touches_only_fresh_past_dates(database):
+    from sqlalchemy import select
+
+    from server.common.db import Service, ServiceDate, ServiceSlot, User
+    from server.dates.repositories import ServiceDateRepository
+
+    today = date.today()
+    async with database.Session() as session:
+        master = User(name='master', password='-', email='master@example.com')
+        session.add(master)
+        await session.flush()
+
+        service = Service(title='haircut', description='-',
+                          price=1500, user_id=master.id)
+        session.add(service)
+        await session.flush()
+
+        past, upcoming = (
+            ServiceDate(date=today + timedelta(days=shift),
+                        slots={'14:00': 'available', '15:00': 'booked'},
+                        service_id=service.id)
+            for shift in (-1, 1)
+        )
+        session.add_all([past, upcoming])
+        await session.commit()
+
+    async with database.Session() as session:
+        repository = ServiceDateRepository(session)
+        assert await repository.count_past_dates(today) == 1
+        assert await repository.expire_past_dates(today) == [past.id]
+        await session.commit()
+
+        # the second run has nothing left to do
+        assert await repository.count_past_dates(today) == 0
+        assert await repository.expire_past_dates(today) == []
+
+    async with database.Session() as session:
+        statuses = dict((await session.execute(
+            select(ServiceSlot.service_date_id, ServiceSlot.status)
+            .where(ServiceSlot.slot_time == '14:00')
+        )).all())
+        free_masks = dict((await session.execute(
+            select(ServiceDate.id, ServiceDate.free_mask)
+        )).all())
+
+    assert statuses == {past.id: 'break', upcoming.id: 'available'}
+    assert free_masks[past.id] == 0
+    assert free_masks[upcoming.id] != 0
@@ -0,0 +1,158 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_deadlines_follow_transitions_and_drain_when_due(database):
+    from sqlalchemy import func, select
+
+    from server.common.db import (
+        EnrollDeadline, Service, ServiceDate, ServiceEnroll, ServiceSlot, User)
+    from server.common.tasks.task_drain_deadlines import drain_due_deadlines
+    from server.dates.repositories import ServiceDateRepository
+    from server.enrolls.repositories import EnrollDeadlineRepository, EnrollRepository
+    from server.enrolls.usecases.booking_usecase import BookingUseCase
+    from server.payments.repositories import PaymentRepository
+
+    async with database.Session() as session:
+        master, client = (
+            User(name=name, password='-', email=f'{name}@example.com')
+            for name in ('master', 'client')
+        )
+        session.add_all([master, client])
+        await session.flush()
+
+        service = Service(title='haircut', description='-',
+                          price=1500, user_id=master.id)
+        session.add(service)
+        await session.flush()
+
+        service_date = ServiceDate(
+            date=date.today() + timedelta(days=1), service_id=service.id,
+            slots={'10:00': 'booked', '11:00': 'booked', '12:00': 'booked'})
+        session.add(service_date)
+        await session.flush()
+
+        ready, unaccepted, accepted = (
+            ServiceEnroll(slot_time=slot_time, status=status, price=1500,
+                          user_id=client.id, service_id=service.id,
+                          service_date_id=service_date.id)
+            for slot_time, status in (
+                ('10:00', 'confirmed'), ('11:00', 'pending'), ('12:00', 'pending'))
+        )
+        session.add_all([ready, unaccepted, accepted])
+        await session.flush()
+
+        deadlines = EnrollDeadlineRepository(session)
+        await deadlines.track(unaccepted.id, 'pending')
+        await deadlines.track(accepted.id, 'pending')
+        await session.commit()
+
+    async with database.Session() as session:
+        usecase = BookingUseCase(
+            session,
+            EnrollRepository(session),
+            ServiceDateRepository(session),
+            PaymentRepository(session)
+        )
+        await usecase.mark_enroll_as_completed(ready.id, master.id)
+        await usecase.change_enroll_status(accepted.id, master.id, 'accept')
+
+    async with database.Session() as session:
+        armed = dict((await session.execute(
+            select(EnrollDeadline.enroll_id, EnrollDeadline.action))).all())
+        assert armed == {ready.id: 'auto_capture', unaccepted.id: 'auto_cancel'}
+
+        assert (await drain_due_deadlines(session))['claimed'] == 0
+
+    later = datetime.now(timezone.utc) + timedelta(days=10)
+    async with database.Session() as session:
+        drained = await drain_due_deadlines(session, now=later)
+
+    assert drained['claimed'] == drained['done'] == 2
+    assert drained['lag_max_seconds'] > 0
+
+    async with database.Session() as session:
+        statuses = dict((await session.execute(
+            select(ServiceEnroll.id, ServiceEnroll.status))).all())
+        slot = await session.scalar(
+            select(ServiceSlot.status)
+            .where(ServiceSlot.service_date_id == service_date.id,
+                   ServiceSlot.slot_time == '11:00'))
+        left = await session.scalar(select(func.count(EnrollDeadline.id)))
+
+    # without a payment there is nothing to capture, the enroll stays ready
+    assert statuses == {
+        ready.id: 'ready', unaccepted.id: 'cancelled', accepted.id: 'confirmed'}
+    assert slot == 'available'
+    assert left == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_action_rolls_back_alone_and_comes_due_again(database, monkeypatch):
+    from sqlalchemy import select, text
+
+    from server.common.db import EnrollDeadline, Service, ServiceDate, ServiceEnroll, User
+    from server.common.tasks import task_drain_deadlines
+    from server.enrolls.repositories import EnrollDeadlineRepository
+
+    async with database.Session() as session:
+        user = User(name='master', password='-', email='master@example.com')
+        session.add(user)
+        await session.flush()
+        service = Service(title='haircut', description='-', price=1500, user_id=user.id)
+        session.add(service)
+        await session.flush()
+        service_date = ServiceDate(
+            date=date.today() + timedelta(days=1), service_id=service.id, slots={})
+        session.add(service_date)
+        await session.flush()
+
+        enrolls = [
+            ServiceEnroll(slot_time=f'1{index}:00', status=status, price=1500,
+                          user_id=user.id, service_id=service.id,
+                          service_date_id=service_date.id)
+            for index, status in enumerate(('pending', 'ready', 'pending'))
+        ]
+        session.add_all(enrolls)
+        await session.flush()
+        deadlines = EnrollDeadlineRepository(session)
+        for enroll in enrolls:
+            await deadlines.track(enroll.id, enroll.status)
+        await session.commit()
+
+    broken, half_done, fine = (enroll.id for enroll in enrolls)
+
+    async def cancel(session, enroll, payment_repo, date_repo):
+        if enroll.id == broken:
+            # a database error leaves the session to be rolled back
+            await session.execute(text('SELECT * FROM missing_table'))
+        enroll.status = 'cancelled'
+
+    async def capture(enroll, payment_repo):
+        # written, then the payment provider fails
+        enroll.status = 'completed'
+        raise RuntimeError('yookassa is down')
+
+    monkeypatch.setattr(task_drain_deadlines, 'cancel_unaccepted_enroll', cancel)
+    monkeypatch.setattr(task_drain_deadlines, 'capture_ready_enroll', capture)
+
+    later = datetime.now(timezone.utc) + timedelta(days=10)
+    async with database.Session() as session:
+        drained = await task_drain_deadlines.drain_due_deadlines(session, now=later)
+    assert (drained['claimed'], drained['done'], drained['failed']) == (3, 1, 2)
+
+    async with database.Session() as session:
+        statuses = dict((await session.execute(
+            select(ServiceEnroll.id, ServiceEnroll.status))).all())
+        armed = dict((await session.execute(
+            select(EnrollDeadline.enroll_id, EnrollDeadline.due_at))).all())
+
+    assert statuses == {broken: 'pending', half_done: 'ready', fine: 'cancelled'}
+    # the failed ones wait for the claim to run out, then they are due again
+    assert set(armed) == {broken, half_done}
+    async with database.Session() as session:
+        assert (await task_drain_deadlines.drain_due_deadlines(session, now=later))['claimed'] == 0
+        retry = later + task_drain_deadlines.DEADLINE_RETRY_DELAY
+        assert (await task_drain_deadlines.drain_due_deadlines(session, now=retry))['failed'] == 2
@@ -0,0 +1,76 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_transitions_stamp_their_status_time(database):
+    from sqlalchemy import select, text
+
+    from server.common.db import Service, ServiceDate, ServiceEnroll, User
+    from server.dates.repositories import ServiceDateRepository
+    from server.enrolls.repositories import EnrollRepository
+    from server.enrolls.usecases.booking_usecase import BookingUseCase
+    from server.payments.repositories import PaymentRepository
+
+    async with database.Session() as session:
+        master, client = (
+            User(name=name, password='-', email=f'{name}@example.com')
+            for name in ('master', 'client')
+        )
+        session.add_all([master, client])
+        await session.flush()
+
+        service = Service(title='haircut', description='-',
+                          price=1500, user_id=master.id)
+        session.add(service)
+        await session.flush()
+
+        service_date = ServiceDate(
+            date=date.today() + timedelta(days=1), service_id=service.id,
+            slots={'10:00': 'booked', '11:00': 'booked'})
+        session.add(service_date)
+        await session.flush()
+
+        first = ServiceEnroll(slot_time='10:00', status='confirmed', price=1500,
+                              user_id=client.id, service_id=service.id,
+                              service_date_id=service_date.id)
+        session.add(first)
+        await session.commit()
+
+        await asyncio.sleep(0.01)
+        second = ServiceEnroll(slot_time='11:00', status='pending', price=1500,
+                               user_id=client.id, service_id=service.id,
+                               service_date_id=service_date.id)
+        session.add(second)
+        await session.commit()
+
+    # created_at is taken per row, not once at import
+    assert second.created_at > first.created_at
+    assert second.pending_at is not None and first.ready_at is None
+
+    async with database.Session() as session:
+        before = datetime.now(timezone.utc).replace(tzinfo=None)
+        await BookingUseCase(
+            session,
+            EnrollRepository(session),
+            ServiceDateRepository(session),
+            PaymentRepository(session)
+        ).mark_enroll_as_completed(first.id, master.id)
+
+    async with database.Session() as session:
+        ready = await session.get(ServiceEnroll, first.id)
+        assert ready.status == 'ready'
+        assert ready.ready_at.replace(tzinfo=None) >= before
+
+        cutoff = select(ServiceEnroll.id).where(
+            ServiceEnroll.status == 'ready',
+            ServiceEnroll.ready_at < datetime.now(timezone.utc))
+        compiled = cutoff.compile(
+            dialect=session.get_bind().dialect,
+            compile_kwargs={'literal_binds': True})
+        plan = (await session.execute(
+            text(f'EXPLAIN QUERY PLAN {compiled}'))).all()
+
+    assert 'ix_service_enrolls_status_ready_at' in str(plan)
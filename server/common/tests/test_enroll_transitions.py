@@ -0,0 +1,78 @@
+from datetime import date, timedelta
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_transitions_are_guarded_single_updates(database):
+    from server.common.db import Service, ServiceDate, ServiceEnroll, User
+    from server.dates.repositories import ServiceDateRepository
+    from server.enrolls.repositories import EnrollRepository
+    from server.enrolls.usecases.booking_usecase import BookingUseCase
+    from server.payments.repositories import PaymentRepository
+
+    async with database.Session() as session:
+        master, client = (
+            User(name=name, password='-', email=f'{name}@example.com')
+            for name in ('master', 'client')
+        )
+        session.add_all([master, client])
+        await session.flush()
+
+        service = Service(title='haircut', description='-',
+                          price=1500, user_id=master.id)
+        session.add(service)
+        await session.flush()
+
+        service_date = ServiceDate(
+            date=date.today() + timedelta(days=1), service_id=service.id,
+            slots={'10:00': 'booked'})
+        session.add(service_date)
+        await session.flush()
+
+        enroll = ServiceEnroll(slot_time='10:00', status='pending', price=1500,
+                               user_id=client.id, service_id=service.id,
+                               service_date_id=service_date.id)
+        session.add(enroll)
+        await session.commit()
+
+    def usecase(session):
+        return BookingUseCase(
+            session,
+            EnrollRepository(session),
+            ServiceDateRepository(session),
+            PaymentRepository(session)
+        )
+
+    async with database.Session() as session:
+        denied = await usecase(session).change_enroll_status(
+            enroll.id, client.id, 'accept')
+        accepted = await usecase(session).change_enroll_status(
+            enroll.id, master.id, 'accept')
+        # the second decision on the same enroll loses
+        rejected = await usecase(session).change_enroll_status(
+            enroll.id, master.id, 'reject')
+
+    assert denied == {'status': 'failed', 'detail': 'permission denied'}
+    assert accepted.status == 'confirmed' and accepted.version == enroll.version + 1
+    assert rejected == {
+        'status': 'failed',
+        'detail': 'enroll status is confirmed, only pending can be changed'}
+
+    async with database.Session() as session:
+        repository = EnrollRepository(session)
+        stale = await repository.transition(
+            enroll.id, 'ready', version=enroll.version)
+        ready = await repository.transition(
+            enroll.id, 'ready', version=accepted.version)
+        await session.commit()
+
+    assert stale is None
+    assert ready.status == 'ready' and ready.ready_at is not None
+
+    async with database.Session() as session:
+        cancelled = await usecase(session).cancel_book(enroll.id, client.id)
+
+    assert cancelled == {
+        'status': 'failed canceling enroll',
+        'detail': 'enroll status is ready, it can not be cancelled'}
@@ -0,0 +1,18 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_repository_lookups_do_not_scan_whole_tables(database):
+    from benchmarks.index_advisor import advise, seed
+    from server.common.utils import slow_query_recorder
+
+    ids = await seed(database, 1000)
+
+    slow_ms, slow_query_recorder.slow_ms = slow_query_recorder.slow_ms, 0
+    try:
+        findings = await advise(database, ids)
+    finally:
+        slow_query_recorder.slow_ms = slow_ms
+        slow_query_recorder.reset()
+
+    assert findings == {}
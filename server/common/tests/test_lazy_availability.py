@@ -0,0 +1,81 @@
+from datetime import date, timedelta
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_days_resolve_from_templates_and_materialize_on_booking(database):
+    from sqlalchemy import func, select
+
+    from server.common.db import ScheduleTemplate, Service, ServiceDate, ServiceSlot, User
+    from server.common.db.models.date import hours_mask
+    from server.dates.repositories import ServiceDateRepository
+    from server.dates.usecases import DatesInteractionTemplates
+    from server.enrolls.repositories import EnrollRepository
+    from server.enrolls.schemas import CreateEnrollModel
+    from server.enrolls.usecases.booking_usecase import BookingUseCase
+    from server.payments.repositories import PaymentRepository
+    from server.scheduletemplates.repositories import ScheduleTemplateRepository
+    from server.services.repositories import ServiceRepository
+
+    day = date.today() + timedelta(days=2)
+    async with database.Session() as session:
+        master, client = (
+            User(name=name, password='-', email=f'{name}@example.com')
+            for name in ('master', 'client')
+        )
+        session.add_all([master, client])
+        await session.flush()
+
+        service = Service(title='haircut', description='-',
+                          price=1500, user_id=master.id)
+        session.add(service)
+        await session.flush()
+
+        session.add(ScheduleTemplate(
+            day=day.strftime('%A').lower(),
+            hours_work={'10:00': 'available', '11:00': 'break'},
+            user_id=master.id, service_id=service.id))
+        await session.commit()
+
+    async def resolve():
+        async with database.Session() as session:
+            return await DatesInteractionTemplates(
+                session,
+                ServiceDateRepository(session),
+                ScheduleTemplateRepository(session)
+            ).resolve_dates(service.id, day, day)
+
+    [resolved] = await resolve()
+    assert resolved.id is None
+    assert resolved.slots == {'10:00': 'available', '11:00': 'break'}
+
+    async with database.Session() as session:
+        free = await ServiceRepository(session).get_all_free_at(day, hours_mask([10]))
+        busy = await ServiceRepository(session).get_all_free_at(day, hours_mask([11]))
+        assert [found.id for found in free] == [service.id]
+        assert busy == []
+        assert await session.scalar(select(func.count(ServiceDate.id))) == 0
+
+    async with database.Session() as session:
+        enroll = await BookingUseCase(
+            session,
+            EnrollRepository(session),
+            ServiceDateRepository(session),
+            PaymentRepository(session)
+        ).create_book(client.id, CreateEnrollModel(
+            service_id=service.id,
+            date=day.strftime('%d-%m-%Y'),
+            slot_time='10:00',
+            price=1
+        ))
+        assert not isinstance(enroll, dict), enroll
+
+    [resolved] = await resolve()
+    assert resolved.id == enroll.service_date_id
+
+    async with database.Session() as session:
+        assert await session.scalar(
+            select(ServiceSlot.enroll_id)
+            .where(ServiceSlot.service_date_id == resolved.id,
+                   ServiceSlot.slot_time == '10:00')) == enroll.id
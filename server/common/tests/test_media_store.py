@@ -0,0 +1,74 @@
+import pytest
+
+PNG = b'\x89PNG\r\n\x1a\n' + bytes(range(256)) * 64
+
+
+def upload(data: bytes, filename: str = 'photo.png'):
+    from io import BytesIO
+
+    from fastapi import UploadFile
+
+    return UploadFile(BytesIO(data), filename=filename, size=len(data))
+
+
+@pytest.mark.asyncio
+async def test_uploads_are_stored_once_by_content(tmp_path):
+    from hashlib import sha256
+
+    from server.common.utils.media_store import MediaStore
+
+    store = MediaStore(root=str(tmp_path), max_size_mb=1)
+    first = await store.save_upload(upload(PNG))
+    second = await store.save_upload(upload(PNG, 'same.png'))
+
+    assert first == second
+    assert first.digest == sha256(PNG).hexdigest()
+    assert first.url == f'/api/v1/media/{first.digest}.png'
+    assert store.path(first.name).read_bytes() == PNG
+    assert [path.name for path in tmp_path.rglob('*') if path.is_file()] == [first.name]
+    assert store.digest_of(first.url) == first.digest
+    assert store.digest_of('https://example.com/photo.png') is None
+
+    # the type comes from the bytes, not from the name or the client
+    assert await store.save_upload(upload(b'<svg onload="alert(1)"/>', 'photo.png')) is None
+    # over the cap, the size is counted while copying as well
+    too_big = PNG + bytes(1024 * 1024)
+    assert await store.save_upload(upload(too_big)) is None
+    assert store._save_stream(upload(too_big).file) is None
+    assert not list(tmp_path.glob('.upload-*'))
+
+
+@pytest.mark.asyncio
+async def test_media_is_served_cacheable_with_ranges(tmp_path, monkeypatch):
+    from fastapi import FastAPI
+    from httpx import ASGITransport, AsyncClient
+
+    from server.common.utils import media_store
+    from server.media import media_app
+
+    monkeypatch.setattr(media_store, 'root', tmp_path)
+    stored = media_store.save_bytes(PNG)
+
+    app = FastAPI()
+    app.include_router(media_app, prefix='/api/v1')
+    async with AsyncClient(transport=ASGITransport(app=app), base_url='http://test') as client:
+        response = await client.get(stored.url)
+        assert response.status_code == 200
+        assert response.content == PNG
+        assert response.headers['content-type'] == 'image/png'
+        assert response.headers['content-length'] == str(len(PNG))
+        assert response.headers['etag'] == f'"{stored.digest}"'
+        assert 'immutable' in response.headers['cache-control']
+        assert response.headers['accept-ranges'] == 'bytes'
+
+        response = await client.get(stored.url, headers={'Range': 'bytes=8-15'})
+        assert response.status_code == 206
+        assert response.content == PNG[8:16]
+        assert response.headers['content-range'] == f'bytes 8-15/{len(PNG)}'
+
+        response = await client.get(stored.url, headers={'If-None-Match': f'"{stored.digest}"'})
+        assert response.status_code == 304
+        assert not response.content
+
+        assert (await client.get(f'/api/v1/media/{"0" * 64}.png')).status_code == 404
+        assert (await client.get('/api/v1/media/..%2F..%2Fetc%2Fpasswd')).status_code == 404
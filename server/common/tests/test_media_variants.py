@@ -0,0 +1,127 @@
+import pytest
+
+
+def jpeg(size=(1600, 1200)) -> bytes:
+    from io import BytesIO
+
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 120, 40)).save(buffer, 'JPEG', quality=95)
+    return buffer.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_variants_are_rendered_once_per_content(database, tmp_path, monkeypatch):
+    from server.common.db import MediaVariant, Service, User, select
+    from server.common.tasks.task_media_variants import process_media_variants
+    from server.common.utils import media_store
+    from server.media.repositories import MediaVariantRepository
+    from server.services.repositories import ServiceRepository
+    from server.services.schemas import ServiceResponse
+
+    monkeypatch.setattr(media_store, 'root', tmp_path)
+    original = media_store.save_bytes(jpeg())
+
+    async with database.Session() as session:
+        master = User(name='master', password='-', email='master@example.com')
+        session.add(master)
+        await session.flush()
+        # two services with the same photo share the variants
+        for title in ('haircut', 'shave'):
+            session.add(Service(title=title, description='-', price=1500, user_id=master.id,
+                                photo=original.url, certificate='', photo_hash=original.digest))
+        await session.commit()
+
+    async with database.Session() as session:
+        assert await MediaVariantRepository(session).get_unprocessed_photos(10) == [
+            (original.digest, original.url)]
+        assert await process_media_variants(session, original.name) == {
+            'status': 'processed', 'variants': 4}
+
+    async with database.Session() as session:
+        assert await process_media_variants(session, original.name) == {
+            'status': 'exists', 'variants': 0}
+        assert await MediaVariantRepository(session).get_unprocessed_photos(10) == []
+        variants = (await session.scalars(select(MediaVariant))).all()
+
+    assert {(v.variant, v.format, v.width, v.height) for v in variants} == {
+        ('thumb', 'webp', 320, 240), ('thumb', 'jpg', 320, 240),
+        ('medium', 'webp', 1024, 768), ('medium', 'jpg', 1024, 768)}
+    thumb = next(v for v in variants if (v.variant, v.format) == ('thumb', 'webp'))
+    assert thumb.size < original.size // 10
+    assert media_store.path(thumb.url.rpartition('/')[2]).stat().st_size == thumb.size
+
+    async with database.Session() as session:
+        services = await ServiceRepository(session).get_all()
+        responses = [ServiceResponse.model_validate(service).model_dump() for service in services]
+
+    for response in responses:
+        assert response['photo'] == original.url
+        assert response['photo_variants']['thumb']['webp'] == thumb.url
+        assert set(response['photo_variants']['medium']) == {'webp', 'jpg'}
+
+
+@pytest.mark.asyncio
+async def test_missing_file_is_reported(database, tmp_path, monkeypatch):
+    from server.common.tasks.task_media_variants import process_media_variants
+    from server.common.utils import media_store
+
+    monkeypatch.setattr(media_store, 'root', tmp_path)
+    async with database.Session() as session:
+        assert await process_media_variants(session, f'{"0" * 64}.jpg') == {
+            'status': 'missing', 'variants': 0}
+
+
+@pytest.mark.asyncio
+async def test_failed_photos_leave_the_sweep(database, tmp_path, monkeypatch):
+    from server.common.db import MediaFailure, Service, User, select
+    from server.common.tasks.task_media_variants import process_media_variants
+    from server.common.utils import media_store
+    from server.media.repositories import MediaVariantRepository
+
+    monkeypatch.setattr(media_store, 'root', tmp_path)
+    good = media_store.save_bytes(jpeg())
+    # a jpeg header and nothing else
+    broken = media_store.save_bytes(jpeg()[:200])
+    missing = f'{"0" * 64}.jpg'
+
+    async with database.Session() as session:
+        master = User(name='master', password='-', email='master@example.com')
+        session.add(master)
+        await session.flush()
+        for digest, url in (
+            (good.digest, good.url),
+            (broken.digest, broken.url),
+            ('0' * 64, media_store.url(missing)),
+        ):
+            session.add(Service(title='haircut', description='-', price=1500, user_id=master.id,
+                                photo=url, certificate='', photo_hash=digest))
+        await session.commit()
+
+    async with database.Session() as session:
+        # the latest services first
+        assert [photo_hash for photo_hash, _ in
+                await MediaVariantRepository(session).get_unprocessed_photos(10)] == [
+            '0' * 64, broken.digest, good.digest]
+        assert (await process_media_variants(session, missing))['status'] == 'missing'
+        assert (await process_media_variants(session, broken.name))['status'] == 'broken'
+        assert await MediaVariantRepository(session).get_unprocessed_photos(10) == [
+            (good.digest, good.url)]
+
+    # every variant over the cap: nothing is recorded, the photo is marked
+    monkeypatch.setattr(media_store, 'save_bytes', lambda data: None)
+    async with database.Session() as session:
+        assert await process_media_variants(session, good.name) == {
+            'status': 'oversize', 'variants': 0}
+        assert await MediaVariantRepository(session).get_unprocessed_photos(10) == []
+    monkeypatch.undo()
+    monkeypatch.setattr(media_store, 'root', tmp_path)
+
+    # the same file uploaded again, its task clears the mark
+    async with database.Session() as session:
+        assert (await process_media_variants(session, good.name))['status'] == 'processed'
+        reasons = dict((await session.execute(
+            select(MediaFailure.source_hash, MediaFailure.reason))).all())
+
+    assert reasons == {'0' * 64: 'missing', broken.digest: 'broken'}
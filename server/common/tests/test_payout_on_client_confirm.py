@@ -84,9 +84,9 @@ async def test_confirm_enroll_by_client_triggers_payment_usecase(monkeypatch):
         get_by_id=AsyncMock(return_value=enroll),
     )
 
-    #confirm_enroll_by_client не проверяется service ownership но updated_enroll читается снова
-    enroll_repo.get_by_id.side_effect = [enroll, SimpleNamespace(
-        id=10, user_id=77, status="completed", service_id=5)]
+    # the guarded transition returns the updated row in the same round trip
+    enroll_repo.transition = AsyncMock(return_value=SimpleNamespace(
+        id=10, user_id=77, status="completed", service_id=5))
 
     payment_usecase = SimpleNamespace(
         process_payout_for_completed_enroll=AsyncMock(
@@ -106,11 +106,13 @@ async def test_confirm_enroll_by_client_triggers_payment_usecase(monkeypatch):
         service_date_repository=SimpleNamespace(),
         payment_repository=SimpleNamespace(),
         payment_usecase=payment_usecase,
+        deadline_repository=SimpleNamespace(track=AsyncMock()),
     )
 
     updated = await booking.confirm_enroll_by_client(enroll_id=10, client_id=77)
 
     assert updated.status == "completed"
+    enroll_repo.transition.assert_awaited_once_with(10, "completed", user_id=77)
     payment_usecase.process_payout_for_completed_enroll.assert_awaited_once_with(
         10)
 
@@ -0,0 +1,48 @@
+import pytest
+
+
+def test_pool_settings_follow_process_role(monkeypatch):
+    from server.common.db.pool import POOL_PROFILES, pool_settings
+
+    assert pool_settings('worker') == POOL_PROFILES['worker']
+    assert pool_settings('unknown') == POOL_PROFILES['api']
+
+    monkeypatch.setenv('DB_POOL_SIZE', '7')
+    assert pool_settings('bot') == {**POOL_PROFILES['bot'], 'pool_size': 7}
+
+
+@pytest.mark.asyncio
+async def test_pool_counts_waits_and_timeouts_by_route(tmp_path):
+    from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from server.common.db.pool import InstrumentedQueuePool, request_scope
+
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1, max_overflow=0, pool_timeout=0.05)
+    pool = engine.pool
+    try:
+        async with engine.connect():
+            assert pool.saturated()
+
+            token = request_scope.set({
+                'method': 'GET', 'path': '/api/v1/services/15',
+                'path_params': {'service_id': 15}})
+            try:
+                with pytest.raises(PoolTimeoutError):
+                    async with engine.connect():
+                        pass
+            finally:
+                request_scope.reset(token)
+
+        snapshot = pool.snapshot()
+        assert snapshot['capacity'] == 1 and snapshot['checked_out'] == 0
+        assert snapshot['checkouts'] == 1
+        assert sum(snapshot['wait_ms'].values()) == 1
+        assert snapshot['timeouts_by_route'] == {'GET /api/v1/services/{service_id}': 1}
+        # the recent timeout keeps it degraded after the connection came back
+        assert snapshot['saturated']
+    finally:
+        await engine.dispose()
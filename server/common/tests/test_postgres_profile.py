@@ -0,0 +1,87 @@
+from os import getenv
+
+import pytest
+
+# postgres database the tests may drop and recreate the schema in,
+# the postgres fixture is in conftest
+TEST_PG_URL = getenv('TEST_PG_URL')
+needs_postgres = pytest.mark.skipif(
+    not TEST_PG_URL, reason='TEST_PG_URL is not set')
+
+
+def test_asyncpg_statement_caches_off_behind_pgbouncer(monkeypatch):
+    from server.common.db import pool
+
+    connect_args = pool.asyncpg_connect_args('worker')
+    assert connect_args['statement_cache_size'] == pool.DB_STATEMENT_CACHE_SIZE
+    assert connect_args['server_settings'] == {
+        'application_name': 'mstv2-worker', 'jit': 'off'}
+
+    monkeypatch.setattr(pool, 'DB_PGBOUNCER', True)
+    connect_args = pool.asyncpg_connect_args('worker')
+    assert connect_args['statement_cache_size'] == 0
+    assert connect_args['prepared_statement_cache_size'] == 0
+    assert connect_args['prepared_statement_name_func']() != \
+        connect_args['prepared_statement_name_func']()
+
+
+@needs_postgres
+@pytest.mark.asyncio
+async def test_drainers_claim_disjoint_deadlines_without_waiting(postgres):
+    import asyncio
+    from datetime import date, datetime, timedelta, timezone
+
+    from server.common.db import (
+        EnrollDeadline,
+        ScheduleTemplate,
+        Service,
+        ServiceDate,
+        ServiceEnroll,
+        User
+    )
+    from server.enrolls.repositories.deadline_repository import EnrollDeadlineRepository
+
+    now = datetime.now(timezone.utc)
+    async with postgres.Session() as session:
+        user = User(name='master', password='-', email='master@example.com')
+        session.add(user)
+        await session.flush()
+        service = Service(title='haircut', description='-', price=1500, user_id=user.id)
+        session.add(service)
+        await session.flush()
+        session.add(ScheduleTemplate(
+            day='monday', hours_work={'10:00': 'available'},
+            user_id=user.id, service_id=service.id))
+        service_date = ServiceDate(service_id=service.id, date=date.today())
+        session.add(service_date)
+        await session.flush()
+        enrolls = [
+            ServiceEnroll(slot_time=f'{hour:02}:00', status='pending', price=1500,
+                          user_id=user.id, service_id=service.id,
+                          service_date_id=service_date.id)
+            for hour in range(10)
+        ]
+        session.add_all(enrolls)
+        await session.flush()
+        session.add_all(
+            EnrollDeadline(enroll_id=enroll.id, action='auto_cancel',
+                           due_at=now - timedelta(minutes=index))
+            for index, enroll in enumerate(enrolls)
+        )
+        await session.commit()
+
+    async with postgres.Session() as first, postgres.Session() as second:
+        claimed = await EnrollDeadlineRepository(first).claim_due(now, 4)
+        # the first drainer keeps its rows locked, the second one must not queue behind it
+        other = await asyncio.wait_for(
+            EnrollDeadlineRepository(second).claim_due(now, 10), timeout=5)
+        assert len(claimed) == 4 and len(other) == 6
+        assert not {row[0] for row in claimed} & {row[0] for row in other}
+        await second.rollback()
+        await first.rollback()
+
+    async with postgres.Session() as session:
+        template = await session.scalar(
+            ScheduleTemplate.__table__.select().with_only_columns(
+                ScheduleTemplate.hours_work))
+        assert template == {'10:00': 'available'}
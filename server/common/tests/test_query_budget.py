@@ -0,0 +1,105 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_create_service_tags_fit_the_query_budget(database, query_budget):
+    from sqlalchemy import select
+
+    from server.common.db import Service, Tag, User
+    from server.services.repositories import ServiceRepository
+    from server.services.schemas import CreateServiceModel
+    from server.services.usecases.service_usecase import ServiceUseCase
+    from server.tags.repositories import TagRepository
+
+    async with database.Session() as session:
+        master = User(name='master', password='-', email='master@example.com')
+        session.add(master)
+        await session.flush()
+        session.add(Tag(title='haircut', user_id=master.id))
+        await session.commit()
+
+    tag_titles = [f'tag {i}' for i in range(20)]
+    async with database.Session() as session:
+        with query_budget(max_queries=5, max_repeats=2):
+            service = await ServiceUseCase(
+                session,
+                ServiceRepository(session),
+                TagRepository(session)
+            ).create_service(
+                master.id,
+                CreateServiceModel(title='haircut', description='-', price=1500,
+                                   photo='', certificate=''),
+                existing_tags=['haircut', ' haircut '],
+                custom_tags=tag_titles
+            )
+
+    async with database.Session() as session:
+        titles = (await session.scalars(
+            select(Tag.title).order_by(Tag.id))).all()
+        loaded = await session.get(Service, service.id)
+        await session.refresh(loaded, ['tag_connections'])
+
+    assert titles == ['haircut', *tag_titles]
+    assert len(loaded.tag_connections) == 21
+
+
+@pytest.mark.asyncio
+async def test_create_service_with_blank_tags_only(database):
+    from sqlalchemy import func, select
+
+    from server.common.db import Service, ServiceTagConnection, Tag, User
+    from server.services.repositories import ServiceRepository
+    from server.services.schemas import CreateServiceModel
+    from server.services.usecases.service_usecase import ServiceUseCase
+    from server.tags.repositories import TagRepository
+
+    async with database.Session() as session:
+        master = User(name='master', password='-', email='master@example.com')
+        session.add(master)
+        await session.commit()
+
+    async with database.Session() as session:
+        # the router sends custom_tags='[""]' as ['']
+        service = await ServiceUseCase(
+            session,
+            ServiceRepository(session),
+            TagRepository(session)
+        ).create_service(
+            master.id,
+            CreateServiceModel(title='haircut', description='-', price=1500,
+                               photo='', certificate=''),
+            existing_tags=[' '],
+            custom_tags=['']
+        )
+
+    assert isinstance(service, Service)
+    async with database.Session() as session:
+        assert await session.scalar(select(func.count()).select_from(Tag)) == 0
+        assert await session.scalar(
+            select(func.count()).select_from(ServiceTagConnection)) == 0
+
+
+@pytest.mark.asyncio
+async def test_middleware_reports_queries_per_request(database):
+    from fastapi import Depends, FastAPI
+    from httpx import ASGITransport, AsyncClient
+    from sqlalchemy import select
+
+    from server.common.db import User
+    from server.common.utils.query_budget import QueryBudgetMiddleware
+
+    app = FastAPI()
+    app.add_middleware(QueryBudgetMiddleware)
+
+    @app.get('/users/{count}')
+    async def users(count: int, session=Depends(database.session)):
+        for user_id in range(count):
+            await session.scalar(select(User).where(User.id == user_id))
+        return {}
+
+    async with AsyncClient(transport=ASGITransport(app=app),
+                           base_url='http://test') as client:
+        response = await client.get('/users/3')
+
+    assert response.headers['X-DB-Queries'] == '3'
+    assert response.headers['Server-Timing'].startswith('db;dur=')
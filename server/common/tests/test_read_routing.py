@@ -0,0 +1,49 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_until_the_client_writes(tmp_path):
+    from fastapi import Depends, FastAPI
+    from httpx import ASGITransport, AsyncClient
+    from sqlalchemy import func, select
+
+    from server.common.db import Base, DataBaseConfiguration, User
+    from server.common.utils.read_routing import READ_PIN_COOKIE, ReadYourWritesMiddleware
+
+    # a second sqlite file stands in for the replica, it never sees the writes
+    db = DataBaseConfiguration(
+        f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}",
+        read_url=f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")
+    await db.up()
+    async with db.read_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware)
+
+    @app.post('/users')
+    async def create_user(session=Depends(db.session)):
+        session.add(User(name='client', password='-', email='client@example.com'))
+        await session.commit()
+        return {'status': 'created'}
+
+    @app.get('/users')
+    async def count_users(session=Depends(db.read_session)):
+        return {'users': await session.scalar(select(func.count(User.id)))}
+
+    async with AsyncClient(transport=ASGITransport(app=app),
+                           base_url='http://test') as client:
+        assert (await client.get('/users')).json() == {'users': 0}
+        assert READ_PIN_COOKIE not in client.cookies
+
+        created = await client.post('/users')
+        assert READ_PIN_COOKIE in created.cookies
+
+        # pinned to the primary, the write is visible right away
+        assert (await client.get('/users')).json() == {'users': 1}
+
+        client.cookies.clear()
+        assert (await client.get('/users')).json() == {'users': 0}
+
+    await db.engine.dispose()
+    await db.read_engine.dispose()
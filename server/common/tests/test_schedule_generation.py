@@ -0,0 +1,54 @@
+import pytest
+
+
+async def _generate(database) -> dict:
+    from server.dates.repositories import ServiceDateRepository
+    from server.dates.usecases.service_date_usecase import DatesInteractionTemplates
+    from server.scheduletemplates.repositories import ScheduleTemplateRepository
+
+    async with database.Session() as session:
+        return await DatesInteractionTemplates(
+            session,
+            ServiceDateRepository(session),
+            ScheduleTemplateRepository(session)
+        ).generate_schedule()
+
+
+@pytest.mark.asyncio
+async def test_schedule_generation_is_idempotent(database):
+    from sqlalchemy import func, select
+
+    from server.common.db import ScheduleTemplate, Service, ServiceDate, ServiceSlot, User
+    from server.common.db.models.date import hours_mask
+
+    async with database.Session() as session:
+        master = User(name='master', password='-', email='master@example.com')
+        session.add(master)
+        await session.flush()
+
+        service = Service(title='haircut', description='-',
+                          price=1500, user_id=master.id)
+        session.add(service)
+        await session.flush()
+
+        hours_work = {'10:00': 'available', '11:00': 'break'}
+        session.add_all([
+            ScheduleTemplate(day=day, hours_work=hours_work, is_active=is_active,
+                             user_id=master.id, service_id=service.id)
+            for day, is_active in (
+                ('monday', True), ('monday', True),
+                ('tuesday', True), ('friday', False))
+        ])
+        await session.commit()
+
+    assert await _generate(database) == {
+        'status': 'created', 'created': 2, 'skipped': 1, 'failed': 0}
+    assert await _generate(database) == {
+        'status': 'created', 'created': 0, 'skipped': 3, 'failed': 0}
+
+    async with database.Session() as session:
+        free_masks = (await session.scalars(select(ServiceDate.free_mask))).all()
+        slots = await session.scalar(select(func.count(ServiceSlot.id)))
+
+    assert free_masks == [hours_mask([10])] * 2
+    assert slots == 4
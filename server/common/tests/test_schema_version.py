@@ -0,0 +1,62 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_startup_check_compares_alembic_version_with_head(tmp_path, caplog):
+    from sqlalchemy import text
+
+    from server.common.db import DataBaseConfiguration
+    from server.common.utils.schema_version import (
+        SchemaVersionError,
+        alembic_heads,
+        ensure_schema
+    )
+
+    db = DataBaseConfiguration(f"sqlite+aiosqlite:///{tmp_path / 'schema.db'}")
+    try:
+        # tables from before the migrations, nothing says which revision
+        async with db.engine.begin() as conn:
+            await conn.execute(text('CREATE TABLE users (id INTEGER PRIMARY KEY)'))
+
+        with pytest.raises(SchemaVersionError, match='no revision'):
+            await ensure_schema(db, 'strict')
+
+        assert await ensure_schema(db, 'warn') == frozenset()
+        assert 'alembic upgrade head' in caplog.text
+
+        [head] = alembic_heads()
+        async with db.engine.begin() as conn:
+            await conn.execute(text(
+                'CREATE TABLE alembic_version (version_num VARCHAR(32) PRIMARY KEY)'))
+            await conn.execute(text('INSERT INTO alembic_version VALUES (:head)'),
+                               {'head': head})
+
+        assert await ensure_schema(db, 'strict') == {head}
+
+        with pytest.raises(SchemaVersionError, match='DB_SCHEMA_MODE'):
+            await ensure_schema(db, 'drop')
+    finally:
+        await db.engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_empty_database_is_created_and_stamped_at_head(tmp_path):
+    from sqlalchemy import inspect, text
+
+    from server.common.db import DataBaseConfiguration
+    from server.common.utils.schema_version import alembic_heads, ensure_schema
+
+    db = DataBaseConfiguration(f"sqlite+aiosqlite:///{tmp_path / 'empty.db'}")
+    try:
+        # the first migration indexes a table no migration creates
+        assert await ensure_schema(db, 'strict') == alembic_heads()
+
+        async with db.engine.connect() as conn:
+            tables = await conn.run_sync(lambda sync: inspect(sync).get_table_names())
+            assert {'service_enrolls', 'services_search'} <= set(tables)
+            assert set(await conn.scalars(text('SELECT version_num FROM alembic_version'))) \
+                == alembic_heads()
+
+        assert await ensure_schema(db, 'strict') == alembic_heads()
+    finally:
+        await db.engine.dispose()
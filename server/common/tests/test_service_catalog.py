@@ -0,0 +1,173 @@
+import pytest
+
+
+async def seed_catalog(database):
+    from server.common.db import Service, ServiceTagConnection, Tag, User
+
+    async with database.Session() as session:
+        masters = [User(name=f'master {i}', password='-', email=f'master{i}@example.com')
+                   for i in range(3)]
+        session.add_all(masters)
+        await session.flush()
+        tags = [Tag(title=title, user_id=masters[0].id) for title in ('hair', 'nails', 'beard')]
+        session.add_all(tags)
+        await session.flush()
+
+        services = []
+        for i in range(45):
+            service = Service(title=f'service {i}', description='-', photo='', certificate='',
+                              # repeated prices, the id breaks the ties
+                              price=(i * 7) % 10 * 100, user_id=masters[i % 3].id)
+            session.add(service)
+            await session.flush()
+            service_tags = [tag for n, tag in enumerate(tags) if i % (n + 2) == 0]
+            session.add_all(ServiceTagConnection(service_id=service.id, tag_id=tag.id)
+                            for tag in service_tags)
+            services.append((service.id, service.price, service.user_id,
+                             {tag.title for tag in service_tags}))
+        await session.commit()
+    return services, [master.id for master in masters]
+
+
+async def walk(database, **filters):
+    from server.services.repositories import ServiceRepository
+    from server.services.schemas import ServiceCatalogQuery
+
+    ids, cursor, pages = [], None, 0
+    while True:
+        async with database.Session() as session:
+            cards, cursor = await ServiceRepository(session).get_catalog_cards(
+                ServiceCatalogQuery(limit=7, cursor=cursor, **filters))
+        ids += [card['id'] for card in cards]
+        pages += 1
+        if cursor is None:
+            return ids, pages
+
+
+@pytest.mark.asyncio
+async def test_pages_follow_the_sort_and_the_filters(database):
+    services, masters = await seed_catalog(database)
+
+    ids, pages = await walk(database)
+    assert ids == sorted((service[0] for service in services), reverse=True)
+    assert pages == 7
+
+    ids, _ = await walk(database, sort='price_asc')
+    assert ids == [service[0] for service in sorted(services, key=lambda s: (s[1], s[0]))]
+
+    ids, _ = await walk(database, sort='price_desc', price_min=200, price_max=600,
+                        master_id=masters[1])
+    assert ids == [
+        service[0] for service in sorted(services, key=lambda s: (s[1], s[0]), reverse=True)
+        if 200 <= service[1] <= 600 and service[2] == masters[1]]
+
+    ids, _ = await walk(database, tags=['hair', 'nails'])
+    assert ids == sorted((service[0] for service in services if service[3] & {'hair', 'nails'}),
+                         reverse=True)
+
+    ids, _ = await walk(database, tags=['hair', 'nails'], tags_mode='all')
+    assert ids == sorted((service[0] for service in services if {'hair', 'nails'} <= service[3]),
+                         reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_broken_and_foreign_cursors_are_rejected(database):
+    from server.services.repositories import ServiceRepository
+    from server.services.schemas import ServiceCatalogQuery
+
+    await seed_catalog(database)
+    async with database.Session() as session:
+        repository = ServiceRepository(session)
+        _, cursor = await repository.get_catalog_cards(ServiceCatalogQuery(limit=5))
+
+        assert await repository.get_catalog_cards(
+            ServiceCatalogQuery(sort='price_asc', cursor=cursor)) is None
+        assert await repository.get_catalog_cards(ServiceCatalogQuery(cursor='not a cursor')) is None
+        assert await repository.get_catalog_cards(ServiceCatalogQuery(cursor=cursor)) is not None
+
+
+@pytest.mark.asyncio
+async def test_catalog_endpoint_reads_the_filters_from_the_query(database):
+    from fastapi import FastAPI
+    from httpx import ASGITransport, AsyncClient
+
+    from server.services.repositories import ServiceRepository, get_service_read_repository
+    from server.services.routers import service_app
+
+    services, _ = await seed_catalog(database)
+
+    app = FastAPI()
+    app.include_router(service_app)
+
+    async def repository():
+        async with database.Session() as session:
+            yield ServiceRepository(session)
+
+    app.dependency_overrides[get_service_read_repository] = repository
+    async with AsyncClient(transport=ASGITransport(app=app), base_url='http://test') as client:
+        response = await client.get('/services/', params={
+            'tags': ['hair', 'beard'], 'tags_mode': 'all', 'sort': 'price_asc', 'limit': 2})
+        assert response.status_code == 200
+        page = response.json()
+        expected = [service[0] for service in sorted(services, key=lambda s: (s[1], s[0]))
+                    if {'hair', 'beard'} <= service[3]]
+        assert [item['id'] for item in page['items']] == expected[:2]
+        assert page['next_cursor']
+
+        response = await client.get('/services/', params={'cursor': 'broken'})
+        assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_pages_are_read_from_the_indexes(database):
+    from sqlalchemy import text
+
+    await seed_catalog(database)
+    async with database.engine.connect() as conn:
+        plans = {}
+        for name, sql in {
+            'price': 'SELECT id FROM services WHERE (price, id) > (300, 10) ORDER BY price, id LIMIT 8',
+            'master price': 'SELECT id FROM services WHERE user_id = 1 AND (price, id) < (300, 10) '
+                            'ORDER BY price DESC, id DESC LIMIT 8',
+            'tag': 'SELECT service_id FROM services_tag_connections WHERE tag_id IN (1, 2)',
+        }.items():
+            plans[name] = ' '.join(row[-1] for row in await conn.execute(
+                text(f'EXPLAIN QUERY PLAN {sql}')))
+
+    assert 'ix_services_price_id' in plans['price']
+    assert 'ix_services_user_id_price_id' in plans['master price']
+    assert 'COVERING INDEX ix_services_tag_connections_tag_id_service_id' in plans['tag']
+    assert 'TEMP B-TREE' not in plans['price'] + plans['master price']
+
+
+@pytest.mark.asyncio
+async def test_cards_are_the_page_in_three_queries(database, query_budget):
+    from server.common.db import MediaVariant, Service, select
+    from server.services.repositories import ServiceRepository
+    from server.services.schemas import ServiceCardResponse, ServiceCatalogQuery
+
+    services, _ = await seed_catalog(database)
+    async with database.Session() as session:
+        service = await session.scalar(select(Service).order_by(Service.id.desc()))
+        service.photo, service.photo_hash = '/api/v1/media/original.jpg', 'a' * 64
+        session.add(MediaVariant(source_hash='a' * 64, variant='thumb', format='webp',
+                                 url='/api/v1/media/thumb.webp', width=320, height=240, size=900))
+        await session.commit()
+
+    query = ServiceCatalogQuery(sort='price_desc', tags=['hair'], limit=10)
+    async with database.Session() as session:
+        with query_budget(max_queries=3):
+            cards, cursor = await ServiceRepository(session).get_catalog_cards(query)
+
+    expected = sorted((service for service in services if 'hair' in service[3]),
+                      key=lambda s: (s[1], s[0]), reverse=True)[:10]
+    assert cursor is not None
+    assert [card['id'] for card in cards] == [service[0] for service in expected]
+    for card, service in zip(cards, expected):
+        assert ServiceCardResponse.model_validate(card)
+        assert {tag['title'] for tag in card['tags']} == service[3]
+
+    async with database.Session() as session:
+        cards, _ = await ServiceRepository(session).get_catalog_cards(ServiceCatalogQuery(limit=1))
+    assert cards[0]['thumbnail'] == '/api/v1/media/thumb.webp'
+    assert 'description' not in cards[0]
@@ -0,0 +1,63 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_detail_returns_window_dates_with_effective_slots(database):
+    from server.common.db import Service, ServiceDate, ServiceEnroll, User
+    from server.services.repositories import ServiceRepository
+    from server.services.schemas import DetailServiceResponse
+
+    today = date.today()
+    async with database.Session() as session:
+        master, client = (
+            User(name=name, password='-', email=f'{name}@example.com')
+            for name in ('master', 'client')
+        )
+        session.add_all([master, client])
+        await session.flush()
+
+        service = Service(title='haircut', description='-', photo='',
+                          certificate='', price=1500, user_id=master.id)
+        session.add(service)
+        await session.flush()
+
+        in_window, *outside = (
+            ServiceDate(date=today + timedelta(days=shift),
+                        slots={'14:00': 'available', '15:00': 'booked',
+                               '16:00': 'break'},
+                        service_id=service.id)
+            for shift in (1, -1, 30)
+        )
+        session.add_all([in_window, *outside])
+        await session.flush()
+
+        session.add_all([
+            ServiceEnroll(slot_time=slot_time, status=status, price=1500,
+                          user_id=client.id, service_id=service.id,
+                          service_date_id=in_window.id,
+                          created_at=datetime.now(timezone.utc))
+            for slot_time, status in (('14:00', 'confirmed'), ('15:00', 'waiting_payment'))
+        ])
+        await session.commit()
+
+    async with database.Session() as session:
+        repository = ServiceRepository(session)
+        detail = await repository.get_detail_by_service_id(
+            service.id, today, today + timedelta(days=14))
+
+        assert [date_obj.id for date_obj in detail.dates] == [in_window.id]
+        assert detail.dates[0].slots == {
+            '14:00': 'booked', '15:00': 'available', '16:00': 'break'}
+        assert detail.users_enroll == []
+        assert not session.dirty
+        assert DetailServiceResponse.model_validate(
+            detail).model_dump(mode='json')['dates'][0]['date'] == (
+            today + timedelta(days=1)).strftime('%d-%m-%Y')
+
+        detail = await repository.get_detail_by_service_id(
+            service.id, today, today + timedelta(days=14),
+            enrolls_limit=1, enrolls_offset=1)
+        assert len(detail.users_enroll) == 1
+        assert detail.users_enroll[0].user.id == client.id
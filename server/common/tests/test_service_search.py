@@ -0,0 +1,236 @@
+import random
+
+import pytest
+
+from .test_postgres_profile import needs_postgres
+
+# enough filler for the common terms to match thousands, the timing
+# over 100k services is benchmarks/service_search.py
+SEARCH_ROWS = 5_000
+CHUNK = 5_000
+
+TITLE_WORDS = ['Стрижка', 'Маникюр', 'Педикюр', 'Массаж', 'Окрашивание',
+               'Укладка', 'Брови', 'Ресницы', 'Депиляция', 'Макияж']
+DESCRIPTION_WORDS = ['мастер', 'салон', 'уход', 'волосы', 'ногти', 'гель',
+                     'спина', 'кожа', 'лицо', 'запись', 'опыт', 'дизайн']
+
+
+async def seed_search(db, rows: int = 0) -> dict:
+    '''
+    A few services the assertions are about, then rows of filler
+    built from the same words, so the common terms match thousands
+    '''
+    from sqlalchemy import insert
+
+    from server.common.db import Service, ServiceTagConnection, Tag, User, select
+    from server.services.repositories import ServiceSearchRepository
+
+    rng = random.Random(25)
+    async with db.Session() as session:
+        master = User(name='master', password='-', email='master@example.com')
+        session.add(master)
+        await session.flush()
+
+        ids = {}
+        for name, title, description in (
+            ('beard', 'Стрижка бороды опасной бритвой', 'Горячее полотенце'),
+            ('barber', 'Барбершоп', 'Оформление бороды и усов'),
+            ('tagged', 'Мужской зал', '-'),
+            ('tree', 'Плетение ёлочка', 'Косы на выпускной'),
+        ):
+            ids[name] = await session.scalar(
+                insert(Service).returning(Service.id),
+                {'title': title, 'description': description, 'price': 1500,
+                 'user_id': master.id})
+
+        tag = await session.scalar(
+            insert(Tag).returning(Tag.id), {'title': 'борода', 'user_id': master.id})
+        await session.execute(
+            insert(ServiceTagConnection), {'service_id': ids['tagged'], 'tag_id': tag})
+
+        for start in range(0, rows, CHUNK):
+            await session.execute(insert(Service), [
+                {'title': f'{rng.choice(TITLE_WORDS)} {rng.choice(TITLE_WORDS).lower()}',
+                 'description': ' '.join(rng.choices(DESCRIPTION_WORDS, k=12)),
+                 'price': 500 + i % 40 * 100, 'user_id': master.id}
+                for i in range(start, min(start + CHUNK, rows))
+            ])
+
+        filler_tags = (await session.execute(
+            insert(Tag).returning(Tag.id),
+            [{'title': word.lower(), 'user_id': master.id} for word in TITLE_WORDS]
+        )).scalars().all()
+        # every tenth filler service gets a tag
+        filler = (await session.scalars(
+            select(Service.id).where(Service.id > ids['tree']).where(Service.id % 10 == 0)
+        )).all()
+        for start in range(0, len(filler), CHUNK):
+            await session.execute(insert(ServiceTagConnection), [
+                {'service_id': service_id, 'tag_id': rng.choice(filler_tags)}
+                for service_id in filler[start:start + CHUNK]
+            ])
+
+        # bulk inserts bypass the usecase, postgres is indexed the way
+        # a backfill would do it, sqlite triggers have done it already
+        await ServiceSearchRepository(session).reindex()
+        await session.commit()
+    return ids
+
+
+async def search(db, query: str, limit: int = 20) -> list[int]:
+    from server.services.repositories import ServiceSearchRepository
+
+    async with db.ReadSession() as session:
+        return await ServiceSearchRepository(session).search(query, limit)
+
+
+def test_search_terms_fold_and_cap_the_query():
+    from server.services.repositories.search_repository import (
+        SEARCH_MAX_TERMS,
+        _sqlite_prefix,
+        search_terms
+    )
+
+    assert search_terms('  Ёлочка, и ЁЖИК!  ') == ['елочка', 'ежик']
+    assert search_terms('"*" OR NEAR()') == ['or', 'near']
+    assert len(search_terms(' '.join(f'слово{i}' for i in range(20)))) == SEARCH_MAX_TERMS
+    # fts5 syntax never reaches the MATCH unquoted
+    assert _sqlite_prefix('or') == '"or"*'
+    assert _sqlite_prefix('стрижку') == '"стриж"*'
+    assert _sqlite_prefix('маникюра') == '"маникю"*'
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_title_then_tags_then_description(database):
+    ids = await seed_search(database)
+
+    assert await search(database, 'бороды') == [ids['beard'], ids['tagged'], ids['barber']]
+    # every term must match
+    assert await search(database, 'стрижку бороды') == [ids['beard']]
+    # inflected and cut short words, ё and е are the same letter
+    assert await search(database, 'бородой') == [ids['beard'], ids['tagged'], ids['barber']]
+    assert await search(database, 'барбер') == [ids['barber']]
+    assert await search(database, 'елочка') == [ids['tree']]
+    assert await search(database, 'ЁЛОЧКУ') == [ids['tree']]
+    assert await search(database, 'а и') == []
+
+
+async def assert_usecase_changes_reach_the_index(db) -> None:
+    from server.services.repositories import ServiceRepository, ServiceSearchRepository
+    from server.services.schemas import CreateServiceModel, PatchServiceModel
+    from server.services.usecases import ServiceUseCase
+    from server.tags.repositories import TagRepository
+
+    ids = await seed_search(db)
+
+    def usecase(session):
+        return ServiceUseCase(
+            session,
+            ServiceRepository(session),
+            TagRepository(session),
+            ServiceSearchRepository(session)
+        )
+
+    async with db.Session() as session:
+        service = await usecase(session).create_service(
+            1,
+            CreateServiceModel(title='Окрашивание', description='-', price=3000,
+                               photo='', certificate=''),
+            existing_tags=['борода'],
+            custom_tags=['омбре']
+        )
+    assert await search(db, 'омбре') == [service.id]
+    assert service.id in await search(db, 'борода')
+
+    async with db.Session() as session:
+        await usecase(session).update_service(
+            1, service.id, PatchServiceModel(title='Тонирование'))
+    assert await search(db, 'окрашивание') == []
+    assert await search(db, 'тонирование омбре') == [service.id]
+
+    async with db.Session() as session:
+        assert await usecase(session).delete_service(1, service.id) is True
+        assert await usecase(session).delete_service(1, ids['beard']) is True
+    assert await search(db, 'тонирование') == []
+    assert await search(db, 'бороды') == [ids['tagged'], ids['barber']]
+
+
+@pytest.mark.asyncio
+async def test_usecase_changes_reach_the_index(database):
+    await assert_usecase_changes_reach_the_index(database)
+
+
+@needs_postgres
+@pytest.mark.asyncio
+async def test_usecase_changes_reach_the_index_postgres(postgres):
+    await assert_usecase_changes_reach_the_index(postgres)
+
+
+@pytest.mark.asyncio
+async def test_search_endpoint_returns_cards_in_rank_order(database):
+    from fastapi import Depends, FastAPI
+    from httpx import ASGITransport, AsyncClient
+
+    from server.services.repositories import (
+        ServiceRepository,
+        ServiceSearchRepository,
+        get_service_read_repository,
+        get_service_search_read_repository
+    )
+    from server.services.routers import service_app
+
+    ids = await seed_search(database)
+
+    app = FastAPI()
+    app.include_router(service_app)
+
+    async def session():
+        async with database.ReadSession() as session:
+            yield session
+
+    async def search_repository(session=Depends(session)):
+        return ServiceSearchRepository(session)
+
+    async def service_repository(session=Depends(session)):
+        return ServiceRepository(session)
+
+    app.dependency_overrides[get_service_search_read_repository] = search_repository
+    app.dependency_overrides[get_service_read_repository] = service_repository
+    async with AsyncClient(transport=ASGITransport(app=app), base_url='http://test') as client:
+        response = await client.get('/services/search', params={'q': 'бороды', 'limit': 2})
+        assert response.status_code == 200
+        cards = response.json()
+        assert [card['id'] for card in cards] == [ids['beard'], ids['tagged']]
+        assert cards[1]['tags'] == [{'id': 1, 'title': 'борода'}]
+        assert set(cards[0]) == {'id', 'title', 'price', 'user_id', 'thumbnail', 'tags'}
+
+        response = await client.get('/services/search', params={'q': 'б'})
+        assert response.status_code == 422
+
+
+async def assert_title_matches_come_first(db, ids: dict) -> None:
+    from server.common.db import Service, select
+
+    assert (await search(db, 'стрижку бороды'))[0] == ids['beard']
+    assert (await search(db, 'бороды'))[:3] == [ids['beard'], ids['tagged'], ids['barber']]
+    # a common word matches thousands, the title matches come first
+    top = await search(db, 'маникюр')
+    assert len(top) == 20
+
+    async with db.ReadSession() as session:
+        titles = dict((await session.execute(
+            select(Service.id, Service.title).where(Service.id.in_(top)))).all())
+    assert all('маникюр' in titles[service_id].lower() for service_id in top)
+
+
+@pytest.mark.asyncio
+async def test_common_terms_rank_title_matches_first_sqlite(database):
+    ids = await seed_search(database, SEARCH_ROWS)
+    await assert_title_matches_come_first(database, ids)
+
+
+@needs_postgres
+@pytest.mark.asyncio
+async def test_common_terms_rank_title_matches_first_postgres(postgres):
+    ids = await seed_search(postgres, SEARCH_ROWS)
+    await assert_title_matches_come_first(postgres, ids)
@@ -0,0 +1,182 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+
+async def _seed(database, clients: int):
+    from server.common.db import Service, ServiceDate, User
+
+    async with database.Session() as session:
+        users = [
+            User(name=f'user-{i}', password='-', email=f'user-{i}@example.com')
+            for i in range(clients + 1)
+        ]
+        session.add_all(users)
+        await session.flush()
+
+        service = Service(title='haircut', description='-',
+                          price=1500, user_id=users[0].id)
+        session.add(service)
+        await session.flush()
+
+        service_date = ServiceDate(
+            date=date.today() + timedelta(days=1),
+            slots={'14:00': 'available', '15:00': 'break'},
+            service_id=service.id
+        )
+        session.add(service_date)
+        await session.commit()
+
+        return [user.id for user in users[1:]], service.id, service_date.id
+
+
+async def _book(database, user_id: int, service_id: int, service_date_id: int, slot_time: str):
+    from server.dates.repositories import ServiceDateRepository
+    from server.enrolls.repositories import EnrollRepository
+    from server.enrolls.schemas import CreateEnrollModel
+    from server.enrolls.usecases.booking_usecase import BookingUseCase
+    from server.payments.repositories import PaymentRepository
+
+    async with database.Session() as session:
+        booking = BookingUseCase(
+            session,
+            EnrollRepository(session),
+            ServiceDateRepository(session),
+            PaymentRepository(session)
+        )
+        return await booking.create_book(user_id, CreateEnrollModel(
+            service_id=service_id,
+            service_date_id=service_date_id,
+            slot_time=slot_time,
+            price=1
+        ))
+
+
+@pytest.mark.asyncio
+async def test_parallel_bookings_of_one_slot_have_single_winner(database):
+    from server.common.db import ServiceEnroll
+
+    users, service_id, service_date_id = await _seed(database, clients=20)
+
+    results = await asyncio.gather(*[
+        _book(database, user_id, service_id, service_date_id, '14:00')
+        for user_id in users
+    ])
+
+    winners = [r for r in results if isinstance(r, ServiceEnroll)]
+    assert len(winners) == 1
+    assert winners[0].price == 1500
+    assert winners[0].status == 'waiting_payment'
+    assert all(r['detail'] == 'slot already booked'
+               for r in results if isinstance(r, dict))
+
+
+@pytest.mark.asyncio
+async def test_lost_claim_reports_reason(database):
+    users, service_id, service_date_id = await _seed(database, clients=1)
+
+    result = await _book(database, users[0], service_id, service_date_id, '15:00')
+    assert result == {'status': 'failed creating enroll',
+                      'detail': 'slot not available'}
+
+    result = await _book(database, users[0], service_id, service_date_id, '16:00')
+    assert result['detail'] == 'slot not found'
+
+
+async def _slot(database, service_date_id: int, slot_time: str):
+    from server.common.db import ServiceSlot, select
+
+    async with database.Session() as session:
+        return await session.scalar(
+            select(ServiceSlot).where(
+                ServiceSlot.service_date_id == service_date_id,
+                ServiceSlot.slot_time == slot_time))
+
+
+@pytest.mark.asyncio
+async def test_expired_hold_slot_is_booked_again_by_another_user(database):
+    from server.common.db import ServiceEnroll
+    from server.dates.repositories import ServiceDateRepository
+    from server.enrolls.repositories import EnrollRepository
+    from server.enrolls.usecases.booking_usecase import BookingUseCase
+    from server.payments.repositories import PaymentRepository
+
+    users, service_id, service_date_id = await _seed(database, clients=2)
+    first = await _book(database, users[0], service_id, service_date_id, '14:00')
+
+    async with database.Session() as session:
+        result = await BookingUseCase(
+            session,
+            EnrollRepository(session),
+            ServiceDateRepository(session),
+            PaymentRepository(session)
+        ).expire_held_enrolls([first.id])
+    assert result['status'] == 'success'
+
+    second = await _book(database, users[1], service_id, service_date_id, '14:00')
+    assert isinstance(second, ServiceEnroll)
+    assert second.id != first.id
+    assert (second.user_id, second.status) == (users[1], 'waiting_payment')
+
+    # one holder at a time, the expired enroll keeps its history
+    third = await _book(database, users[0], service_id, service_date_id, '14:00')
+    assert third == {'status': 'failed creating enroll', 'detail': 'slot already booked'}
+
+    async with database.Session() as session:
+        assert (await session.get(ServiceEnroll, first.id)).status == 'expired'
+    assert (await _slot(database, service_date_id, '14:00')).enroll_id == second.id
+
+
+@pytest.mark.asyncio
+async def test_cancelled_slot_is_booked_as_a_new_enroll(database):
+    from server.common.db import ServiceEnroll
+
+    users, service_id, service_date_id = await _seed(database, clients=2)
+    first = await _book(database, users[0], service_id, service_date_id, '14:00')
+
+    async with database.Session() as session:
+        enroll = await session.get(ServiceEnroll, first.id)
+        enroll.status = 'cancelled'
+        await session.commit()
+
+    again = await _book(database, users[0], service_id, service_date_id, '14:00')
+    assert again.id != first.id
+    assert again.status == 'waiting_payment'
+
+    stranger = await _book(database, users[1], service_id, service_date_id, '14:00')
+    assert stranger == {'status': 'failed creating enroll', 'detail': 'slot already booked'}
+    assert (await _slot(database, service_date_id, '14:00')).enroll_id == again.id
+
+#demo hold mvp confirm
+
+@pytest.mark.asyncio
+async def test_payment_books_the_held_slot(database, monkeypatch):
+    from unittest.mock import AsyncMock
+
+    from server.common.db import ServiceDate
+    from server.payments.repositories import PaymentRepository
+    from server.payments.schemas import CreatePaymentModel
+    from server.payments.usecases import payment_usecase
+    from server.payments.usecases.payment_usecase import PaymentUseCase
+
+    users, service_id, service_date_id = await _seed(database, clients=1)
+    enroll = await _book(database, users[0], service_id, service_date_id, '14:00')
+    # unpaid, the slot still counts as free
+    assert (await _slot(database, service_date_id, '14:00')).status == 'available'
+
+    monkeypatch.setattr(payment_usecase, 'DEMO_PAYMENTS_ENABLED', False)
+    monkeypatch.setattr(payment_usecase, 'yookassa_aggregate_amount', AsyncMock(
+        return_value={'seller_amount': 1400, 'platform_amount': 100}))
+    monkeypatch.setattr(payment_usecase, 'yookassa_create_payment_with_deal', AsyncMock(
+        return_value={'payment': {'id': 'pay_1', 'status': 'pending'}, 'deal': {}}))
+
+    async with database.Session() as session:
+        result = await PaymentUseCase(session, PaymentRepository(session)).create_payment(
+            users[0], CreatePaymentModel(enroll_id=enroll.id), 'http://test')
+    assert result['status'] == 'success'
+
+    slot = await _slot(database, service_date_id, '14:00')
+    assert (slot.status, slot.enroll_id) == ('booked', enroll.id)
+    async with database.Session() as session:
+        assert (await session.get(ServiceDate, service_date_id)).free_mask == 0
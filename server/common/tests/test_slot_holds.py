@@ -0,0 +1,111 @@
+from datetime import date, timedelta
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_expired_hold_returns_slot_without_redis(database):
+    from sqlalchemy import select
+
+    from server.common.db import Service, ServiceDate, ServiceEnroll, ServiceSlot, User
+    from server.common.utils.slot_holds import SlotHolds
+    from server.dates.repositories import ServiceDateRepository
+    from server.enrolls.repositories import EnrollRepository
+    from server.enrolls.schemas import CreateEnrollModel
+    from server.enrolls.usecases.booking_usecase import BookingUseCase
+    from server.payments.repositories import PaymentRepository
+
+    # nothing listens there, holds must fail open
+    holds = SlotHolds('redis://127.0.0.1:1/0')
+
+    async with database.Session() as session:
+        master, client = (
+            User(name=name, password='-', email=f'{name}@example.com')
+            for name in ('master', 'client')
+        )
+        session.add_all([master, client])
+        await session.flush()
+
+        service = Service(title='haircut', description='-',
+                          price=1500, user_id=master.id)
+        session.add(service)
+        await session.flush()
+
+        service_date = ServiceDate(
+            date=date.today() + timedelta(days=1), service_id=service.id,
+            slots={'10:00': 'available'})
+        session.add(service_date)
+        await session.commit()
+
+    def usecase(session):
+        return BookingUseCase(
+            session,
+            EnrollRepository(session),
+            ServiceDateRepository(session),
+            PaymentRepository(session),
+            holds=holds
+        )
+
+    async with database.Session() as session:
+        enroll = await usecase(session).create_book(client.id, CreateEnrollModel(
+            service_id=service.id,
+            service_date_id=service_date.id,
+            slot_time='10:00',
+            price=1
+        ))
+        assert not isinstance(enroll, dict), enroll
+
+    async with database.Session() as session:
+        assert await holds.held([(service_date.id, '10:00')]) == set()
+        result = await usecase(session).expire_held_enrolls([enroll.id])
+        assert result['expired_ids'] == [enroll.id]
+
+    async with database.Session() as session:
+        status = await session.scalar(
+            select(ServiceEnroll.status).where(ServiceEnroll.id == enroll.id))
+        slot = (await session.execute(
+            select(ServiceSlot.status, ServiceSlot.enroll_id)
+            .where(ServiceSlot.service_date_id == service_date.id))).one()
+        again = await usecase(session).expire_held_enrolls([enroll.id])
+
+    assert status == 'expired'
+    assert tuple(slot) == ('available', None)
+    assert again['expired_count'] == 0
+    await holds.close()
+
+
+@pytest.mark.asyncio
+async def test_drainer_forgets_claimed_holds_only_after_the_expire(monkeypatch):
+    import asyncio
+
+    from server.enrolls.usecases import booking_usecase
+
+    class Holds:
+        def __init__(self):
+            self.claims = [[1, 2], [3]]
+            self.forgotten = []
+
+        async def claim_due(self):
+            return self.claims.pop(0) if self.claims else []
+
+        async def forget(self, enroll_ids):
+            self.forgotten.extend(enroll_ids)
+
+    results = [{'status': 'failed', 'detail': 'database is locked'},
+               {'status': 'success', 'expired_count': 1}]
+
+    async def expire_held_enrolls(enroll_ids, holds):
+        return results.pop(0)
+
+    monkeypatch.setattr(booking_usecase, 'expire_held_enrolls', expire_held_enrolls)
+    monkeypatch.setattr(booking_usecase, 'HOLD_DRAIN_INTERVAL_SECONDS', 0)
+
+    holds = Holds()
+    drainer = asyncio.create_task(booking_usecase.run_hold_drainer(holds))
+    while results:
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    drainer.cancel()
+
+    # the failed batch stays claimed in redis and comes due again
+    assert holds.forgotten == [3]
@@ -0,0 +1,39 @@
+import pytest
+
+
+def test_fingerprint_strips_literals():
+    from server.common.utils.slow_queries import fingerprint
+
+    assert fingerprint(
+        "SELECT * FROM users WHERE id = 42 AND name = 'o''neil'"
+    ) == fingerprint(
+        "SELECT *  FROM users\n WHERE id = 7 AND name = 'anna'"
+    ) == 'SELECT * FROM users WHERE id = ? AND name = ?'
+    assert fingerprint('SELECT t1.id FROM t1 WHERE t1.id IN (?, ?, ?)') == \
+        'SELECT t1.id FROM t1 WHERE t1.id IN (?)'
+
+
+@pytest.mark.asyncio
+async def test_recorder_keeps_percentiles_and_plan_of_slow_reads(database):
+    from sqlalchemy import select
+
+    from server.common.db import User
+    from server.common.utils import slow_query_recorder
+
+    slow_query_recorder.reset()
+    slow_query_recorder.slow_ms = 0
+    try:
+        async with database.Session() as session:
+            for user_id in range(1, 21):
+                await session.execute(select(User).where(User.id == user_id))
+    finally:
+        slow_query_recorder.slow_ms = 200
+
+    [users] = [
+        summary for summary in slow_query_recorder.top(50, 'calls')
+        if 'FROM users' in summary['fingerprint']
+    ]
+    assert users['calls'] == 20
+    assert 0 <= users['p50_ms'] <= users['p95_ms'] <= users['max_ms']
+    assert any('users' in line for line in users['plan'])
+    slow_query_recorder.reset()
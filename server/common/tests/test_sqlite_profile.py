@@ -0,0 +1,159 @@
+import asyncio
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_connections_get_the_wal_profile(database):
+    from sqlalchemy import text
+
+    from server.common.db.sqlite_writer import SQLITE_BUSY_TIMEOUT_MS
+
+    async with database.engine.connect() as conn:
+        assert await conn.scalar(text('PRAGMA journal_mode')) == 'wal'
+        assert await conn.scalar(text('PRAGMA synchronous')) == 1  # NORMAL
+        assert await conn.scalar(text('PRAGMA busy_timeout')) == SQLITE_BUSY_TIMEOUT_MS
+        assert await conn.scalar(text('PRAGMA foreign_keys')) == 1
+
+
+@pytest.mark.asyncio
+async def test_queued_writes_share_commits_and_fail_alone(database):
+    from sqlalchemy import event, func, select
+
+    from server.common.db import User
+
+    commits = []
+    event.listen(database.engine.sync_engine, 'commit', lambda conn: commits.append(1))
+
+    async def create(session, name):
+        if name == 'user-13':
+            raise ValueError('rejected')
+        user = User(name=name, password='-', email=f'{name}@example.com')
+        session.add(user)
+        await session.flush()
+        return user.id
+
+    results = await asyncio.gather(
+        *(database.write(lambda session, i=i: create(session, f'user-{i}'))
+          for i in range(50)),
+        return_exceptions=True)
+
+    assert [i for i, result in enumerate(results) if isinstance(result, Exception)] == [13]
+    assert len({result for result in results if isinstance(result, int)}) == 49
+    assert len(commits) < 49
+
+    async with database.Session() as session:
+        assert await session.scalar(select(func.count(User.id))) == 49
+
+
+@pytest.mark.asyncio
+async def test_session_writes_take_turns(database):
+    from server.common.db import User
+
+    active = []
+
+    async def write(i):
+        async with database.Session() as session:
+            session.add(User(name=f'user-{i}', password='-', email=f'user-{i}@example.com'))
+            await session.flush()
+            active.append(i)
+            # the write transaction stays open across an await
+            await asyncio.sleep(0.01)
+            assert active == [i]
+            active.remove(i)
+            await session.commit()
+
+    await asyncio.gather(*(write(i) for i in range(20)))
+    assert not database.write_queue.held()
+    assert not database.write_queue.locked()
+
+
+def test_writer_slot_is_per_event_loop_and_owned(tmp_path):
+    from server.common.db import DataBaseConfiguration
+
+    db = DataBaseConfiguration(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    queue = db.write_queue
+    tokens = []
+
+    async def abandon():
+        # a celery task whose loop ends while it holds the slot
+        tokens.append(await queue.acquire())
+
+    async def next_task():
+        token = await asyncio.wait_for(queue.acquire(), 1)
+        # the token of the dead loop does not free the slot of this one
+        with pytest.raises(RuntimeError):
+            queue.release(tokens[0])
+        with pytest.raises(RuntimeError):
+            queue.release(object())
+        queue.release(token)
+        assert not queue.locked()
+        await db.engine.dispose()
+
+    asyncio.run(abandon())
+    asyncio.run(next_task())
+
+
+@pytest.mark.asyncio
+async def test_rejected_enroll_calls_yookassa_outside_the_writer(database, monkeypatch):
+    from datetime import date, timedelta
+
+    from sqlalchemy import select
+
+    from server.common.db import Payment, Service, ServiceDate, ServiceEnroll, ServiceSlot, User
+    from server.dates.repositories import ServiceDateRepository
+    from server.enrolls.repositories import EnrollRepository
+    from server.enrolls.usecases import booking_usecase
+    from server.payments.repositories import PaymentRepository
+
+    async with database.Session() as session:
+        master, client = (
+            User(name=name, password='-', email=f'{name}@example.com')
+            for name in ('master', 'client')
+        )
+        session.add_all([master, client])
+        await session.flush()
+        service = Service(title='haircut', description='-', price=1500, user_id=master.id)
+        session.add(service)
+        await session.flush()
+        service_date = ServiceDate(
+            date=date.today() + timedelta(days=1), service_id=service.id,
+            slots={'10:00': 'booked'})
+        session.add(service_date)
+        await session.flush()
+        enroll = ServiceEnroll(slot_time='10:00', status='pending', price=1500,
+                               user_id=client.id, service_id=service.id,
+                               service_date_id=service_date.id)
+        session.add(enroll)
+        await session.flush()
+        session.add(Payment(enroll_id=enroll.id, yookassa_payment_id='pay-1',
+                            amount=1500, status='processing'))
+        await session.commit()
+
+    calls = []
+
+    async def provider_call(payment_id):
+        # a slow provider must not keep every other write of the process waiting
+        calls.append(database.write_queue.locked())
+        return {'status': 'waiting_for_capture'}
+
+    monkeypatch.setattr(booking_usecase, 'yookassa_get_payment', provider_call)
+    monkeypatch.setattr(booking_usecase, 'yookassa_cancel_payment', provider_call)
+
+    async with database.Session() as session:
+        result = await booking_usecase.BookingUseCase(
+            session,
+            EnrollRepository(session),
+            ServiceDateRepository(session),
+            PaymentRepository(session)
+        ).change_enroll_status(enroll.id, master.id, 'reject')
+        assert result.status == 'cancelled'
+
+    async with database.Session() as session:
+        payment_status = await session.scalar(select(Payment.status))
+        slot = await session.scalar(select(ServiceSlot.status))
+
+    assert calls == [False, False]
+    assert payment_status == 'canceled'
+    assert slot == 'available'
+    assert not database.write_queue.locked()
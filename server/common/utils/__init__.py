@@ -12,7 +12,7 @@ from .jwtconfig import (
     CookieManager,
 )
 
-from .file_processor import process_to_base64
+from .media_store import MediaStore, StoredMedia, media_store
 
 from .email_config import (
     EmailVerfifcation,
@@ -21,6 +21,18 @@ from .email_config import (
 
 from .rate_limiter_config import RateLimitMiddleware, lifespan
 
+from .read_routing import ReadYourWritesMiddleware
+
+from .query_budget import QueryBudgetMiddleware
+
+from .pool_metrics import PoolMetricsMiddleware
+
+from .slow_queries import SlowQueryRecorder, slow_query_recorder
+
+from .schema_version import SchemaVersionError, ensure_schema
+
 from .turnstile import verify_turnstile
 
-__all__ = ["logger", "process_to_base64"]
+from .slot_holds import SlotHolds, slot_holds
+
+__all__ = ["logger", "media_store"]
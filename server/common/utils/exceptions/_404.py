@@ -44,4 +44,11 @@ class NotFoundException404:
             detail='enroll not found'
         )
 
+    @staticmethod
+    async def file_not_found():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='file not found'
+        )
+
 #demo hold mvp confirm
\ No newline at end of file
@@ -0,0 +1,77 @@
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import List
+
+from PIL import Image, ImageOps
+
+# variant -> (box, mode), crop fills the box exactly, fit keeps the aspect
+# ratio inside it and never upscales
+IMAGE_VARIANTS = {
+    'thumb': ((320, 240), 'crop'),
+    'medium': ((1024, 1024), 'fit'),
+}
+# webp for the browsers that take it, jpeg as the fallback
+IMAGE_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+
+# what a file that is not a usable image raises, truncated and unknown ones included
+IMAGE_ERRORS = (OSError, ValueError, Image.DecompressionBombError)
+
+
+@dataclass(frozen=True)
+class RenderedVariant:
+    variant: str
+    format: str
+    data: bytes
+    width: int
+    height: int
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    # jpeg has no alpha, transparent pixels go white instead of black
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def render_variants(path: Path) -> List[RenderedVariant]:
+    '''
+    Every variant in every format of the image at path. Metadata is not
+    copied, the same file gives the same bytes, so the variants get the
+    same names in the media store on every run
+    '''
+    rendered = []
+    with Image.open(path) as source:
+        # jpeg decodes at a fraction of the size straight away
+        source.draft('RGB', IMAGE_VARIANTS['medium'][0])
+        # first frame of an animation, turned the way the camera was held
+        image = ImageOps.exif_transpose(source)
+        image.load()
+
+    for variant, (box, mode) in IMAGE_VARIANTS.items():
+        if mode == 'crop':
+            resized = ImageOps.fit(image, box, Image.Resampling.LANCZOS)
+        else:
+            resized = image.copy()
+            resized.thumbnail(box, Image.Resampling.LANCZOS)
+
+        for extension, options in IMAGE_FORMATS.items():
+            converted = _flatten(resized) if extension == 'jpg' else (
+                resized if resized.mode in ('RGB', 'RGBA') else resized.convert('RGBA'))
+            buffer = BytesIO()
+            converted.save(buffer, **options)
+            rendered.append(RenderedVariant(
+                variant=variant,
+                format=extension,
+                data=buffer.getvalue(),
+                width=converted.width,
+                height=converted.height
+            ))
+    return rendered
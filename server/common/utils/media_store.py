@@ -0,0 +1,142 @@
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+from io import BytesIO
+from os import getenv
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import BinaryIO, Optional
+
+from dotenv import load_dotenv
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+load_dotenv()
+
+MEDIA_ROOT = getenv('MEDIA_ROOT', 'media')
+MEDIA_URL = getenv('MEDIA_URL', '/api/v1/media')
+MEDIA_MAX_SIZE_MB = int(getenv('MEDIA_MAX_SIZE_MB', '4'))
+MEDIA_CHUNK_SIZE = 1024 * 1024
+
+# raster images only, the type comes from the first bytes and not from the client
+MEDIA_TYPES = {
+    'jpg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+}
+
+MEDIA_NAME = re.compile(r'^[0-9a-f]{64}\.[a-z]+$')
+
+
+def sniff_extension(head: bytes) -> Optional[str]:
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+@dataclass(frozen=True)
+class StoredMedia:
+    digest: str
+    name: str
+    url: str
+    size: int
+    content_type: str
+
+
+class MediaStore:
+    '''
+    Content addressed files on disk.
+    A file is named by the sha256 of its bytes, {root}/ab/cd/{sha256}.{ext},
+    so the same image uploaded twice is stored once and a name never
+    changes its content, which lets clients cache it forever
+    '''
+    def __init__(
+        self,
+        root: str = MEDIA_ROOT,
+        url_prefix: str = MEDIA_URL,
+        max_size_mb: int = MEDIA_MAX_SIZE_MB
+    ) -> None:
+        self.root = Path(root)
+        self.url_prefix = url_prefix.rstrip('/')
+        self.max_bytes = max_size_mb * 1024 * 1024
+
+    def path(self, name: str) -> Path:
+        return self.root / name[:2] / name[2:4] / name
+
+    def url(self, name: str) -> str:
+        return f'{self.url_prefix}/{name}'
+
+    def digest_of(self, url: str) -> Optional[str]:
+        '''sha256 of a url of this store, None for any other url'''
+        prefix, _, name = url.rpartition('/')
+        if prefix != self.url_prefix or not MEDIA_NAME.match(name):
+            return None
+        return name.partition('.')[0]
+
+    async def save_upload(self, file: UploadFile) -> Optional[StoredMedia]:
+        '''
+        Copies the upload chunk by chunk into the store, None when it
+        is not an image or is larger than the cap
+        '''
+        if file.size is not None and file.size > self.max_bytes:
+            return None
+        await file.seek(0)
+        return await run_in_threadpool(self._save_stream, file.file)
+
+    def save_bytes(self, data: bytes) -> Optional[StoredMedia]:
+        if len(data) > self.max_bytes:
+            return None
+        return self._save_stream(BytesIO(data))
+
+    def _save_stream(self, stream: BinaryIO) -> Optional[StoredMedia]:
+        head = stream.read(MEDIA_CHUNK_SIZE)
+        extension = sniff_extension(head)
+        if extension is None:
+            return None
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        digest, size = hashlib.sha256(), 0
+        # next to the final place, os.replace stays on one filesystem
+        with NamedTemporaryFile(dir=self.root, prefix='.upload-', delete=False) as tmp:
+            try:
+                chunk = head
+                while chunk:
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        tmp.close()
+                        os.unlink(tmp.name)
+                        return None
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    chunk = stream.read(MEDIA_CHUNK_SIZE)
+            except BaseException:
+                tmp.close()
+                os.unlink(tmp.name)
+                raise
+
+        name = f'{digest.hexdigest()}.{extension}'
+        path = self.path(name)
+        if path.exists():
+            os.unlink(tmp.name)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp.name, path)
+
+        return StoredMedia(
+            digest=digest.hexdigest(),
+            name=name,
+            url=self.url(name),
+            size=size,
+            content_type=MEDIA_TYPES[extension]
+        )
+
+
+media_store = MediaStore()
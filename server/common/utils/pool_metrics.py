@@ -0,0 +1,18 @@
+from typing import Callable
+
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from ..db import request_scope
+
+
+class PoolMetricsMiddleware(BaseHTTPMiddleware):
+    '''
+    Lets the pool attribute a checkout timeout to the route that hit it
+    '''
+    async def dispatch(self, request: Request, call_next: Callable):
+        token = request_scope.set(request.scope)
+        try:
+            return await call_next(request)
+        finally:
+            request_scope.reset(token)
@@ -0,0 +1,113 @@
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from os import getenv
+from time import perf_counter
+from typing import Callable, Iterator, List
+
+from dotenv import load_dotenv
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from .logger import logger
+
+load_dotenv()
+
+# statements one request may run before it is logged
+QUERY_BUDGET = int(getenv('DB_QUERY_BUDGET', '20'))
+# runs of one normalized statement that look like an N+1 loop
+QUERY_REPEAT_LIMIT = int(getenv('DB_QUERY_REPEAT_LIMIT', '5'))
+
+_PLACEHOLDER = r'(?:\?|%s|\$\d+|:\w+)'
+# IN (?, ?, ?) and multi-row VALUES collapse, so the list size does not split a statement
+_PLACEHOLDER_LIST = re.compile(
+    rf'\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)')
+_NUMBERED = re.compile(r'\$\d+')
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_statement(statement: str) -> str:
+    statement = _NUMBERED.sub('?', statement)
+    statement = _PLACEHOLDER_LIST.sub('(?)', statement)
+    return _SPACES.sub(' ', statement).strip()
+
+
+class QueryStats:
+    '''
+    Statements run inside one collect_queries block, a request or a test
+    '''
+    __slots__ = ('count', 'seconds', 'statements')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+
+    @property
+    def milliseconds(self) -> float:
+        return self.seconds * 1000
+
+    def repeated(self, limit: int) -> List[tuple[str, int]]:
+        return [
+            (statement, runs) for statement, runs in self.statements.most_common()
+            if runs > limit
+        ]
+
+
+_query_stats: ContextVar[QueryStats | None] = ContextVar('query_stats', default=None)
+
+
+@contextmanager
+def collect_queries() -> Iterator[QueryStats]:
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    if _query_stats.get() is not None:
+        conn.info.setdefault('query_started', []).append(perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _finish_query(conn, cursor, statement, parameters, context, executemany):
+    stats = _query_stats.get()
+    started = conn.info.get('query_started')
+    if stats is None or not started:
+        return
+
+    stats.seconds += perf_counter() - started.pop()
+    stats.count += 1
+    stats.statements[normalize_statement(statement)] += 1
+
+
+class QueryBudgetMiddleware(BaseHTTPMiddleware):
+    '''
+    Counts statements and database time of every request,
+    sends them as X-DB-Queries / Server-Timing and logs requests
+    over QUERY_BUDGET or repeating a statement more than QUERY_REPEAT_LIMIT times
+    '''
+    async def dispatch(self, request: Request, call_next: Callable):
+        with collect_queries() as stats:
+            response = await call_next(request)
+
+        response.headers['X-DB-Queries'] = str(stats.count)
+        response.headers['Server-Timing'] = (
+            f'db;dur={stats.milliseconds:.1f};desc="{stats.count} queries"')
+
+        endpoint = f'{request.method} {request.url.path}'
+        if stats.count > QUERY_BUDGET:
+            logger.warning(
+                f'{endpoint} ran {stats.count} queries, budget is {QUERY_BUDGET}')
+        for statement, runs in stats.repeated(QUERY_REPEAT_LIMIT):
+            logger.warning(
+                f'{endpoint} ran the same statement {runs} times: {statement[:200]}')
+
+        return response
@@ -1,3 +1,4 @@
+import asyncio
 from os import getenv
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator, Callable
@@ -13,6 +14,8 @@ from redis.asyncio import Redis
 load_dotenv()
 
 from ..db import db_config
+from .schema_version import ensure_schema
+from .slot_holds import slot_holds
 
 
 REDIS_URL = getenv('REDIS_BACKEND', 'redis://localhost:6379/0')
@@ -105,12 +108,17 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
 
 @asynccontextmanager
 async def lifespan(app) -> AsyncGenerator:
-    # Initialize database
-    await db_config.up()
+    # Check the schema is migrated (create_all only with DB_SCHEMA_MODE=create)
+    await ensure_schema(db_config)
     # Initialize rate limiter
     await init_rate_limiter()
+    # Return slots of expired payment holds
+    from ...enrolls.usecases.booking_usecase import run_hold_drainer
+    hold_drainer = asyncio.create_task(run_hold_drainer(slot_holds))
     yield
     # Cleanup
+    hold_drainer.cancel()
+    await slot_holds.close()
     await close_rate_limiter()
 
 #demo hold mvp confirm
\ No newline at end of file
@@ -0,0 +1,42 @@
+from os import getenv
+from typing import Callable
+
+from dotenv import load_dotenv
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from ..db import ReadRouting, read_routing
+
+load_dotenv()
+
+READ_PIN_COOKIE = 'db_pin'
+# how long a client reads from the primary after a write, covers replica lag
+READ_PIN_SECONDS = int(getenv('DB_READ_PIN_SECONDS', '5'))
+
+
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    '''
+    Gives every request its ReadRouting. A request that wrote to the primary
+    sets a short lived cookie, the next requests of that client carry it
+    and read from the primary until the replica caught up
+    '''
+    async def dispatch(self, request: Request, call_next: Callable):
+        routing = ReadRouting(pinned=READ_PIN_COOKIE in request.cookies)
+        token = read_routing.set(routing)
+        try:
+            response = await call_next(request)
+        finally:
+            read_routing.reset(token)
+
+        if routing.wrote:
+            response.set_cookie(
+                key=READ_PIN_COOKIE,
+                value='1',
+                httponly=True,
+                secure=False,
+                samesite='lax',
+                max_age=READ_PIN_SECONDS,
+                path='/',
+            )
+
+        return response
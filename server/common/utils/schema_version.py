@@ -0,0 +1,113 @@
+import asyncio
+from functools import lru_cache
+from os import getenv
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from dotenv import load_dotenv
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import DBAPIError
+
+from ..db import Base, db_config
+from .logger import logger
+
+load_dotenv()
+
+# strict - refuse to start on a schema behind the migrations
+# warn - log it and start anyway
+# create - create_all, for local development and tests only
+SCHEMA_MODES = ('strict', 'warn', 'create')
+DB_SCHEMA_MODE = getenv('DB_SCHEMA_MODE', 'warn')
+ALEMBIC_INI = Path(__file__).resolve().parents[3] / 'alembic.ini'
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+@lru_cache
+def alembic_heads() -> frozenset[str]:
+    # reads the revision files only, env.py and the database are not touched
+    return frozenset(_script().get_heads())
+
+
+def _script() -> ScriptDirectory:
+    return ScriptDirectory.from_config(Config(str(ALEMBIC_INI)))
+
+
+async def database_revisions(engine) -> frozenset[str]:
+    try:
+        async with engine.connect() as conn:
+            rows = await conn.scalars(text('SELECT version_num FROM alembic_version'))
+            return frozenset(rows.all())
+    except DBAPIError:
+        # never migrated, there is no alembic_version table
+        return frozenset()
+
+
+async def bootstrap_schema(db) -> bool:
+    '''
+    The migrations start from a schema made by create_all and cannot
+    build an empty database: it gets create_all and is stamped at head.
+    A database with tables and no alembic_version is left alone
+    '''
+    def build(conn) -> bool:
+        if inspect(conn).get_table_names():
+            return False
+        Base.metadata.create_all(conn)
+        MigrationContext.configure(conn).stamp(_script(), 'head')
+        return True
+
+    async with db.engine.begin() as conn:
+        return await conn.run_sync(build)
+
+
+async def ensure_schema(db, mode: str = DB_SCHEMA_MODE) -> frozenset[str]:
+    '''
+    One query at startup instead of create_all reflecting every table:
+    compares alembic_version with the head of the migrations
+    '''
+    if mode not in SCHEMA_MODES:
+        raise SchemaVersionError(
+            f'DB_SCHEMA_MODE is {mode!r}, expected one of {", ".join(SCHEMA_MODES)}')
+
+    if mode == 'create':
+        await db.up()
+        return frozenset()
+
+    heads = alembic_heads()
+    revisions = await database_revisions(db.engine)
+    if revisions == heads:
+        return revisions
+    if not revisions and await bootstrap_schema(db):
+        logger.info(f'empty database, created the tables at {", ".join(sorted(heads))}')
+        return heads
+
+    message = (
+        f'database schema is at {", ".join(sorted(revisions)) or "no revision"}, '
+        f'migrations head is {", ".join(sorted(heads))}, run `alembic upgrade head`')
+    if mode == 'strict':
+        raise SchemaVersionError(message)
+
+    logger.warning(message)
+    return revisions
+
+
+async def _bootstrap() -> bool:
+    try:
+        return await bootstrap_schema(db_config)
+    finally:
+        await db_config.engine.dispose()
+
+
+def migrate() -> None:
+    '''
+    `alembic upgrade head` for the container: an empty database is
+    created and stamped first, a migrated one is upgraded
+    '''
+    if asyncio.run(_bootstrap()):
+        return
+    command.upgrade(Config(str(ALEMBIC_INI)), 'head')
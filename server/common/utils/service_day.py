@@ -0,0 +1,23 @@
+from datetime import date, datetime
+from typing import Annotated, Any
+
+from pydantic import BeforeValidator, PlainSerializer
+
+
+def _parse_service_day(value: Any) -> Any:
+    # clients send dd-mm-YYYY, YYYY-mm-dd is accepted as well
+    if isinstance(value, str):
+        for fmt in ('%d-%m-%Y', '%Y-%m-%d'):
+            try:
+                return datetime.strptime(value, fmt).date()
+            except ValueError:
+                continue
+    return value
+
+
+# a day of a service in the API, dd-mm-YYYY both ways
+ServiceDay = Annotated[
+    date,
+    BeforeValidator(_parse_service_day),
+    PlainSerializer(lambda value: value.strftime('%d-%m-%Y'), return_type=str)
+]
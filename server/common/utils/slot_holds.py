@@ -0,0 +1,157 @@
+from os import getenv
+from time import time
+from typing import Iterable, List
+
+from dotenv import load_dotenv
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .logger import logger
+
+load_dotenv()
+
+REDIS_URL = getenv('REDIS_BACKEND', 'redis://localhost:6379/0')
+HOLD_TTL_SECONDS = int(getenv('PENDING_ENROLL_TIMEOUT_MINUTES', '15')) * 60
+HOLD_DRAIN_BATCH = 500
+HOLD_DRAIN_INTERVAL_SECONDS = 1
+HOLD_DRAIN_RETRY_SECONDS = 30
+
+# claims the due members of the timer in one step, so two drainers never share one:
+# they move a lease ahead instead of leaving the timer, the drainer removes them
+# once the database has expired the enrolls, after a failure they come due again
+_CLAIM_DUE = '''
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, member in ipairs(due) do
+    redis.call('ZADD', KEYS[1], 'XX', ARGV[1] + ARGV[3], member)
+end
+return due
+'''
+
+
+class SlotHolds:
+    '''
+    Payment holds of booked slots in redis.
+    hold:{service_date_id}:{slot_time} keeps the enroll id and expires with the hold,
+    holds:deadlines is the timer (enroll id scored by its deadline)
+    the drainer uses to return expired holds to the database.
+    Redis errors never fail a booking, the database stays the source of truth
+    '''
+    DEADLINES_KEY = 'holds:deadlines'
+
+    def __init__(self, url: str, ttl_seconds: int = HOLD_TTL_SECONDS) -> None:
+        self._url = url
+        self._ttl_seconds = ttl_seconds
+        self._redis: Redis | None = None
+
+    @property
+    def redis(self) -> Redis:
+        if self._redis is None:
+            self._redis = Redis.from_url(self._url, decode_responses=True)
+        return self._redis
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    @staticmethod
+    def _key(service_date_id: int, slot_time: str) -> str:
+        return f'hold:{service_date_id}:{slot_time}'
+
+    async def place(
+        self,
+        enroll_id: int,
+        service_date_id: int,
+        slot_time: str
+    ) -> bool:
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.set(self._key(service_date_id, slot_time),
+                         enroll_id, ex=self._ttl_seconds)
+                pipe.zadd(self.DEADLINES_KEY,
+                          {str(enroll_id): time() + self._ttl_seconds})
+                await pipe.execute()
+            return True
+        except RedisError as e:
+            logger.warning(f'failed placing hold of enroll {enroll_id}: {str(e)}')
+            return False
+
+    async def release(
+        self,
+        enroll_id: int,
+        service_date_id: int,
+        slot_time: str
+    ) -> None:
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.delete(self._key(service_date_id, slot_time))
+                pipe.zrem(self.DEADLINES_KEY, str(enroll_id))
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f'failed releasing hold of enroll {enroll_id}: {str(e)}')
+
+    async def held(
+        self,
+        date_slots: Iterable[tuple[int, str]]
+    ) -> set[tuple[int, str]]:
+        date_slots = list(date_slots)
+        if not date_slots:
+            return set()
+
+        try:
+            values = await self.redis.mget(
+                [self._key(*date_slot) for date_slot in date_slots])
+        except RedisError as e:
+            logger.warning(f'failed reading holds: {str(e)}')
+            return set()
+
+        return {
+            date_slot for date_slot, value in zip(date_slots, values)
+            if value is not None
+        }
+
+    async def claim_due(
+        self,
+        limit: int = HOLD_DRAIN_BATCH,
+        lease_seconds: int = HOLD_DRAIN_RETRY_SECONDS
+    ) -> List[int] | None:
+        # None tells the drainer that redis is unavailable
+        try:
+            due = await self.redis.eval(
+                _CLAIM_DUE, 1, self.DEADLINES_KEY, time(), limit, lease_seconds)
+        except RedisError as e:
+            logger.warning(f'failed reading hold deadlines: {str(e)}')
+            return None
+
+        return [int(enroll_id) for enroll_id in due]
+
+    async def forget(self, enroll_ids: Iterable[int]) -> None:
+        '''Drops claimed deadlines once the database is done with them'''
+        enroll_ids = [str(enroll_id) for enroll_id in enroll_ids]
+        if not enroll_ids:
+            return
+
+        try:
+            await self.redis.zrem(self.DEADLINES_KEY, *enroll_ids)
+        except RedisError as e:
+            # the lease runs out and the next drain finds nothing to expire
+            logger.warning(f'failed dropping hold deadlines: {str(e)}')
+
+    async def hide_held_slots(self, dates: Iterable) -> None:
+        '''
+        Shows a slot held by an unpaid enroll as booked.
+        Response only, the slot rows do not become dirty
+        '''
+        candidates = {
+            (slot.service_date_id, slot.slot_time): slot
+            for date_obj in dates
+            for slot in date_obj.slot_rows
+            if slot.status == 'available' and slot.enroll_id is not None
+        }
+
+        for date_slot in await self.held(candidates):
+            set_committed_value(candidates[date_slot], 'status', 'booked')
+
+
+slot_holds = SlotHolds(REDIS_URL)
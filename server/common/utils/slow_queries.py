@@ -0,0 +1,153 @@
+import random
+import re
+from collections import deque
+from os import getenv
+from time import perf_counter
+from typing import Dict, List
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .logger import logger
+from .query_budget import normalize_statement
+
+load_dotenv()
+
+# statements slower than this get their plan captured
+SLOW_QUERY_MS = float(getenv('DB_SLOW_QUERY_MS', '200'))
+# share of statements written to the log, replaces echo=True
+ECHO_SAMPLE_RATE = float(getenv('DB_ECHO_SAMPLE_RATE', '0'))
+# timings kept per fingerprint for the percentiles
+SAMPLES_PER_FINGERPRINT = 1000
+MAX_FINGERPRINTS = 2000
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+}
+
+
+def fingerprint(statement: str) -> str:
+    '''
+    Statement without literals, equal for every run of the same query
+    '''
+    statement = _STRING.sub('?', statement)
+    statement = _NUMBER.sub('?', statement)
+    return normalize_statement(statement)
+
+
+def _percentile(ordered: List[float], share: float) -> float:
+    return ordered[min(int(len(ordered) * share), len(ordered) - 1)]
+
+
+class QueryTimings:
+    __slots__ = ('calls', 'total_ms', 'max_ms', 'samples', 'plan')
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.samples: deque = deque(maxlen=SAMPLES_PER_FINGERPRINT)
+        self.plan: List[str] | None = None
+
+    def add(self, elapsed_ms: float) -> None:
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.samples.append(elapsed_ms)
+
+    def summary(self, statement: str) -> dict:
+        ordered = sorted(self.samples)
+        return {
+            'fingerprint': statement,
+            'calls': self.calls,
+            'total_ms': round(self.total_ms, 2),
+            'p50_ms': round(_percentile(ordered, 0.5), 2),
+            'p95_ms': round(_percentile(ordered, 0.95), 2),
+            'max_ms': round(self.max_ms, 2),
+            'plan': self.plan,
+        }
+
+
+class SlowQueryRecorder:
+    '''
+    In-memory timings of every statement of this process by fingerprint,
+    with the plan of the first run slower than slow_ms
+    '''
+    ORDERINGS = ('p95_ms', 'p50_ms', 'max_ms', 'total_ms', 'calls')
+
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS) -> None:
+        self.slow_ms = slow_ms
+        self._timings: Dict[str, QueryTimings] = {}
+
+    def record(
+        self,
+        conn,
+        statement: str,
+        parameters,
+        executemany: bool,
+        elapsed_ms: float
+    ) -> None:
+        key = fingerprint(statement)
+        timings = self._timings.get(key)
+        if timings is None:
+            if len(self._timings) >= MAX_FINGERPRINTS:
+                return
+            timings = self._timings[key] = QueryTimings()
+        timings.add(elapsed_ms)
+
+        if elapsed_ms >= self.slow_ms and timings.plan is None and not executemany:
+            timings.plan = self._explain(conn, statement, parameters)
+            logger.warning(f'slow query {elapsed_ms:.1f} ms: {key[:200]}')
+
+    @staticmethod
+    def _explain(conn, statement: str, parameters) -> List[str] | None:
+        # plans of reads only, EXPLAIN must never break the caller's transaction
+        prefix = _EXPLAIN_PREFIXES.get(conn.dialect.name)
+        if prefix is None or not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return None
+
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return [str(row[-1]) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.warning(f'failed explaining slow query: {str(e)}')
+            return None
+        finally:
+            cursor.close()
+
+    def top(self, limit: int = 20, order_by: str = 'p95_ms') -> List[dict]:
+        summaries = [
+            timings.summary(statement)
+            for statement, timings in list(self._timings.items())
+        ]
+        summaries.sort(key=lambda summary: summary[order_by], reverse=True)
+        return summaries[:limit]
+
+    def reset(self) -> None:
+        self._timings.clear()
+
+
+slow_query_recorder = SlowQueryRecorder()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_timing(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('slow_query_started', []).append(perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _record_timing(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('slow_query_started')
+    if not started:
+        return
+    elapsed_ms = (perf_counter() - started.pop()) * 1000
+
+    if ECHO_SAMPLE_RATE and random.random() < ECHO_SAMPLE_RATE:
+        logger.info(f'sql {elapsed_ms:.1f} ms: {statement} {parameters!r:.200}')
+
+    slow_query_recorder.record(conn, statement, parameters, executemany, elapsed_ms)
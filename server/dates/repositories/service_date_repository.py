@@ -1,7 +1,11 @@
+from datetime import date
 from tempfile import template
 from typing import List
 
 from fastapi import Depends
+from sqlalchemy import Integer, cast, func, literal, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import SQLAlchemyError
 
 from ...common.db import (
@@ -12,14 +16,32 @@ from ...common.db import (
     select,
     selectinload,
     Service,
-    ServiceDate
+    ServiceDate,
+    ServiceSlot,
+    ScheduleTemplate
 )
+from ...common.db.models.date import availability_mask, resolve_service_dates
 
 from ..schemas import (
     CreateServiceDate
 )
 
 
+def _free_mask_expression():
+    # OR of the bits of every free slot, a slot held by an enroll is not free
+    hour_bit = literal(1).op('<<')(
+        cast(func.substr(ServiceSlot.slot_time, 1, 2), Integer))
+
+    return (
+        select(func.coalesce(func.sum(hour_bit), 0))
+        .where(
+            ServiceSlot.service_date_id == ServiceDate.id,
+            ServiceSlot.status == 'available',
+            ServiceSlot.enroll_id.is_(None))
+        .scalar_subquery()
+    )
+
+
 class ServiceDateRepository:
     def __init__(
             self,
@@ -67,6 +89,281 @@ class ServiceDateRepository:
         await self._session.flush()
         return new_date
 
+    async def create_dates_bulk(
+        self,
+        dates_data: List[CreateServiceDate]
+    ) -> int:
+        '''
+        Inserts the dates with their slots in two statements.
+        A date that already exists for the service and day is skipped,
+        returns how many dates were created
+        '''
+        if not dates_data:
+            return 0
+
+        dialect = self._session.get_bind().dialect.name
+        insert = sqlite_insert if dialect == 'sqlite' else pg_insert
+
+        slots_by_day = {
+            (date_data.service_id, date_data.date): date_data.slots
+            for date_data in dates_data
+        }
+        # core inserts on the tables, executemany keeps the statement cached
+        created = (await self._session.execute(
+            insert(ServiceDate.__table__)
+            .on_conflict_do_nothing(index_elements=['service_id', 'date'])
+            .returning(ServiceDate.id, ServiceDate.service_id, ServiceDate.date),
+            [
+                {
+                    'service_id': service_id,
+                    'date': day,
+                    'expired': False,
+                    'free_mask': availability_mask(slots),
+                }
+                for (service_id, day), slots in slots_by_day.items()
+            ]
+        )).all()
+
+        slot_rows = [
+            {
+                'service_date_id': service_date_id,
+                'slot_time': slot_time,
+                'status': status,
+                'enroll_id': None,
+            }
+            for service_date_id, service_id, day in created
+            for slot_time, status in slots_by_day[(service_id, day)].items()
+        ]
+        if slot_rows:
+            await self._session.execute(insert(ServiceSlot.__table__), slot_rows)
+
+        return len(created)
+
+    async def get_between(
+        self,
+        service_id: int,
+        date_from: date,
+        date_to: date
+    ) -> List[ServiceDate]:
+
+        dates = await self._session.scalars(
+            select(ServiceDate)
+            .where(
+                ServiceDate.service_id == service_id,
+                ServiceDate.date.between(date_from, date_to))
+            .order_by(ServiceDate.date)
+        )
+
+        return dates.all()
+
+    async def materialize_date(
+        self,
+        service_id: int,
+        day: date
+    ) -> int | None:
+        '''
+        Id of the service date for the day, a day that only exists
+        in the templates is written now (on booking or manual edit).
+        Returns None when the day has neither a date nor a template
+        '''
+        service_date_id = await self._session.scalar(
+            select(ServiceDate.id)
+            .where(
+                ServiceDate.service_id == service_id,
+                ServiceDate.date == day)
+        )
+        if service_date_id:
+            return service_date_id
+
+        templates = (await self._session.scalars(
+            select(ScheduleTemplate)
+            .where(
+                ScheduleTemplate.service_id == service_id,
+                ScheduleTemplate.day == day.strftime('%A').lower(),
+                ScheduleTemplate.is_active.is_(True))
+        )).all()
+
+        resolved = resolve_service_dates(service_id, [], templates, day, day)
+        if not resolved:
+            return None
+
+        # a parallel booking may have written the day first, then reuse its row
+        await self.create_dates_bulk([CreateServiceDate(
+            date=day,
+            slots=resolved[0].slots,
+            service_id=service_id
+        )])
+        return await self._session.scalar(
+            select(ServiceDate.id)
+            .where(
+                ServiceDate.service_id == service_id,
+                ServiceDate.date == day)
+        )
+
+    async def get_slot(
+        self,
+        service_date_id: int,
+        slot_time: str
+    ) -> ServiceSlot | None:
+
+        slot = await self._session.scalar(
+            select(ServiceSlot)
+            .where(
+                ServiceSlot.service_date_id == service_date_id,
+                ServiceSlot.slot_time == slot_time)
+        )
+
+        return slot
+
+    async def set_slot_status(
+        self,
+        service_date_id: int,
+        slot_time: str,
+        status: str,
+        expected_status: str | None = None,
+        enroll_id: int | None = None,
+        expected_enroll_id: int | None = None
+    ) -> bool:
+        '''
+        Updates a single slot row.
+        With expected_status / expected_enroll_id the update is guarded by
+        the current slot state and returns False if another writer changed it first
+        '''
+        stmt = (
+            update(ServiceSlot)
+            .where(
+                ServiceSlot.service_date_id == service_date_id,
+                ServiceSlot.slot_time == slot_time)
+            .values(status=status, enroll_id=enroll_id)
+            .execution_options(synchronize_session=False)
+        )
+
+        if expected_status is not None:
+            stmt = stmt.where(ServiceSlot.status == expected_status)
+        if expected_enroll_id is not None:
+            stmt = stmt.where(ServiceSlot.enroll_id == expected_enroll_id)
+
+        result = await self._session.execute(stmt)
+        if not result.rowcount:
+            return False
+
+        await self.refresh_free_mask([service_date_id])
+        return True
+
+    async def refresh_free_mask(
+        self,
+        service_date_ids: List[int]
+    ) -> None:
+        '''
+        Recomputes the availability bitmap of the given dates from their slot rows,
+        called by every slot write so the index never drifts
+        '''
+        if not service_date_ids:
+            return
+
+        await self._session.execute(
+            update(ServiceDate)
+            .where(ServiceDate.id.in_(set(service_date_ids)))
+            .values(free_mask=_free_mask_expression())
+            .execution_options(synchronize_session=False)
+        )
+
+    async def release_slots(
+        self,
+        date_slots: List[tuple[int, str]]
+    ) -> int:
+        '''
+        Returns the given (service_date_id, slot_time) pairs
+        to 'available' with one UPDATE
+        '''
+        if not date_slots:
+            return 0
+
+        result = await self._session.execute(
+            update(ServiceSlot)
+            .where(
+                tuple_(ServiceSlot.service_date_id, ServiceSlot.slot_time)
+                .in_(date_slots))
+            .values(status='available', enroll_id=None)
+            .execution_options(synchronize_session=False)
+        )
+        await self.refresh_free_mask(
+            [service_date_id for service_date_id, _ in date_slots])
+        return result.rowcount
+
+    async def mark_dates_break(
+        self,
+        service_date_ids: List[int]
+    ) -> int:
+
+        if not service_date_ids:
+            return 0
+
+        result = await self._session.execute(
+            update(ServiceSlot)
+            .where(
+                ServiceSlot.service_date_id.in_(service_date_ids),
+                ServiceSlot.status != 'break')
+            .values(status='break')
+            .execution_options(synchronize_session=False)
+        )
+        await self._session.execute(
+            update(ServiceDate)
+            .where(ServiceDate.id.in_(service_date_ids))
+            .values(free_mask=0)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    async def count_past_dates(
+        self,
+        today: date
+    ) -> int:
+
+        count = await self._session.scalar(
+            select(func.count(ServiceDate.id))
+            .where(
+                ServiceDate.expired.is_(False),
+                ServiceDate.date < today)
+        )
+
+        return count or 0
+
+    async def expire_past_dates(
+        self,
+        today: date
+    ) -> List[int]:
+        '''
+        Set-based expiry: closes the slots of every date before today
+        and flags those dates, dates expired earlier are never touched again
+        '''
+        fresh_past_dates = (
+            select(ServiceDate.id)
+            .where(
+                ServiceDate.expired.is_(False),
+                ServiceDate.date < today)
+        )
+
+        await self._session.execute(
+            update(ServiceSlot)
+            .where(
+                ServiceSlot.service_date_id.in_(fresh_past_dates),
+                ServiceSlot.status != 'break')
+            .values(status='break')
+            .execution_options(synchronize_session=False)
+        )
+        expired_ids = await self._session.scalars(
+            update(ServiceDate)
+            .where(
+                ServiceDate.expired.is_(False),
+                ServiceDate.date < today)
+            .values(expired=True, free_mask=0)
+            .returning(ServiceDate.id)
+            .execution_options(synchronize_session=False)
+        )
+
+        return list(expired_ids.all())
+
 
 service_date_repository_exemplar = ServiceDateRepository(db_config.session)
 
@@ -1,15 +1,24 @@
+from datetime import date, timedelta
 from typing import List
 
 from fastapi import APIRouter, Query, Depends, status
 
-from ..schemas import CreateServiceDate, ServiceDateResponse
+from ..schemas import CreateServiceDate, ServiceDateResponse, ResolvedServiceDateResponse
 from ..repositories import ServiceDateRepository, get_service_date_repository
-from ..usecases import get_service_date_use_case, ServiceDateUseCase
+from ..usecases import (
+    get_service_date_use_case,
+    ServiceDateUseCase,
+    get_dates_interaction_templates,
+    DatesInteractionTemplates
+)
 
 from ...common.utils import JWTManager, Exceptions400
 
 service_date_app = APIRouter(prefix='/dates', tags=['Service Dates'])
 
+RESOLVE_WINDOW_DAYS = 14
+RESOLVE_MAX_WINDOW_DAYS = 92
+
 
 @service_date_app.post('/',
                     status_code=status.HTTP_201_CREATED,
@@ -44,4 +53,29 @@ async def get_all_dates(
     dates = await service_date_repo.get_all()
     return dates
 
+
+@service_date_app.get('/service/{service_id}',
+                    response_model=List[ResolvedServiceDateResponse],
+                    summary='get service availability',
+                    description='endpoint for getting the service dates of the window, days without a date are resolved from the schedule templates')
+async def resolve_service_dates(
+    service_id: int,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    dates_interaction: DatesInteractionTemplates = Depends(
+        get_dates_interaction_templates)
+):
+    date_from = date_from or date.today()
+    date_to = date_to or date_from + timedelta(days=RESOLVE_WINDOW_DAYS)
+
+    if date_from > date_to:
+        await Exceptions400.creating_error('date_from must not be later than date_to')
+    if (date_to - date_from).days > RESOLVE_MAX_WINDOW_DAYS:
+        await Exceptions400.creating_error(
+            f'date window is limited to {RESOLVE_MAX_WINDOW_DAYS} days')
+
+    dates = await dates_interaction.resolve_dates(
+        service_id, date_from, date_to)
+    return dates
+
 #demo hold mvp confirm
\ No newline at end of file
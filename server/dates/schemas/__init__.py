@@ -1 +1 @@
-from .service_date import CreateServiceDate, ServiceDateResponse
\ No newline at end of file
+from .service_date import CreateServiceDate, ServiceDateResponse, ResolvedServiceDateResponse
\ No newline at end of file
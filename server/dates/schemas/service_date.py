@@ -1,8 +1,10 @@
-from datetime import datetime
-from typing import Any, List, Literal, Dict
+from datetime import date, datetime
+from typing import Annotated, Any, List, Literal, Dict
 
 from pydantic import BaseModel
 
+from ...common.utils.service_day import ServiceDay
+
 TimeSlot = Literal[
     '01:00', '02:00', '03:00', '04:00', '05:00', '06:00',
     '07:00', '08:00', '09:00', '10:00', '11:00', '12:00',
@@ -14,14 +16,25 @@ Status = Literal["available", "booked", "break", "unavailable"]
 
 
 class CreateServiceDate(BaseModel):
-    date: str  # format dd-mm-YYYY
+    date: ServiceDay  # format dd-mm-YYYY
     slots: Dict[TimeSlot, Status]
     service_id: int
 
 
 class ServiceDateResponse(BaseModel):
-    date: str
+    date: ServiceDay
+    slots: Dict[TimeSlot, Status]
+    service_id: int
+
+
+class ResolvedServiceDateResponse(BaseModel):
+    # None for a day resolved from the templates and not materialized yet
+    id: int | None
+    date: ServiceDay
     slots: Dict[TimeSlot, Status]
     service_id: int
 
+    class Config:
+        from_attributes = True
+
 #demo hold mvp confirm
\ No newline at end of file
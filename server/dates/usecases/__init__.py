@@ -3,4 +3,6 @@ from .service_date_usecase import (
     get_service_date_use_case,
     service_date_usecase_exemplar,
     dates_interaction_templates_exemplar,
+    DatesInteractionTemplates,
+    get_dates_interaction_templates,
 )
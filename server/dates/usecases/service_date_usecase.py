@@ -4,6 +4,7 @@ from typing import List, Dict
 
 from dotenv.main import logger
 from fastapi import Depends
+from pydantic import ValidationError
 from sqlalchemy import update
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import session
@@ -19,6 +20,8 @@ from ...common.db import (
     ServiceDate,
     ScheduleTemplate
 )
+from ...common.db.models.date import resolve_service_dates
+from ...common.utils.slot_holds import slot_holds
 
 from ...scheduletemplates.repositories import (
     get_schedule_template_repository,
@@ -34,6 +37,9 @@ from ..repositories import (
 
 from ..schemas import CreateServiceDate
 
+# dates per insert statement, one commit per chunk
+SCHEDULE_CHUNK_SIZE = 1000
+
 
 class ServiceDateUseCase:
     def __init__(
@@ -74,50 +80,21 @@ class ServiceDateUseCase:
 
     async def _check_date_exipire(self, date_obj: ServiceDate):
         if isinstance(date_obj, ServiceDate):
-            if isinstance(date_obj.date, str):
-                try:
-                    service_date = datetime.strptime(
-                        date_obj.date, "%d-%m-%Y").date()
-                except ValueError:
-                    try:
-                        service_date = datetime.strptime(
-                            date_obj.date, "%Y-%m-%d").date()
-                    except ValueError:
-                        return False
-                return service_date < date.today()
+            return date_obj.expired or date_obj.date < date.today()
 
         return False
 
     async def expire_all_dates_slots(self) -> dict:
         try:
-            all_dates = await self._service_date_repo.get_all()
-            expired_dates = []
-
-            for date_obj in all_dates:
-                if await self._check_date_exipire(date_obj):
-                    updated_slots = {
-                        time: 'break' for time in date_obj.slots.keys()
-                    }
-                    expired_dates.append({
-                        'id': date_obj.id,
-                        'slots': updated_slots
-                    })
-
-            if expired_dates:
-                for expired_date in expired_dates:
-                    stmt = (
-                        update(ServiceDate)
-                        .where(ServiceDate.id == expired_date['id'])
-                        .values(slots=expired_date['slots'])
-                    )
-                    await self._session.execute(stmt)
-
-                await self._session.commit()
+            expired_ids = await self._service_date_repo.expire_past_dates(
+                date.today())
+            await self._session.commit()
 
+            if expired_ids:
                 return {
                     'status': 'success',
-                    'expired_dates_count': len(expired_dates),
-                    'expired_ids': [d['id'] for d in expired_dates]
+                    'expired_dates_count': len(expired_ids),
+                    'expired_ids': expired_ids
                 }
 
             return {
@@ -133,18 +110,11 @@ class ServiceDateUseCase:
             return {'status': 'failed', 'detail': str(e)}
 
     async def check_all_dates_slots_at_expire(self):
-        dates = await self._service_date_repo.get_all()
-        date_meta = {}
-        expired_count = 0
-
-        for date_obj in dates:
-            if await self._check_date_exipire(date_obj):
-                expired_count += 1
-                date_meta['expire'] = str(date_obj.service_id)
+        expired_count = await self._service_date_repo.count_past_dates(
+            date.today())
 
         return {
             'expired_count': expired_count,
-            'meta': date_meta
         }
 
 
@@ -160,13 +130,12 @@ class DatesInteractionTemplates:
         self._service_date_repository = service_date_repository
         self._schedule_template_respository = schedule_template_repository
 
-    def _get_week_dates(self, start_date: datetime) -> Dict[str, str]:
+    def _get_week_dates(self, start_date: datetime) -> Dict[str, date]:
         week_dates = {}
         for i in range(7):
             current_date = start_date + timedelta(days=i)
             day_name = current_date.strftime("%A").lower()
-            date_str = current_date.strftime("%d-%m-%Y")
-            week_dates[day_name] = date_str
+            week_dates[day_name] = current_date.date()
         return week_dates
 
     def _get_next_sunday(self) -> datetime:
@@ -175,58 +144,73 @@ class DatesInteractionTemplates:
         next_sunday = today + timedelta(days=days_until_sunday)
         return datetime.combine(next_sunday, datetime.min.time())
 
-    async def generate_schedule(self):
-        templates = await self._schedule_template_respository.get_all()
+    async def resolve_dates(
+        self,
+        service_id: int,
+        date_from: date,
+        date_to: date
+    ) -> List[ServiceDate]:
+        '''
+        Availability of the service for the window, computed on read
+        from the materialized dates and the active templates
+        '''
+        dates = await self._service_date_repository.get_between(
+            service_id, date_from, date_to)
+        templates = await self._schedule_template_respository.get_all_by_service_id(
+            service_id)
+        await slot_holds.hide_held_slots(dates)
+
+        return resolve_service_dates(
+            service_id, dates, templates, date_from, date_to)
+
+    async def generate_schedule(self) -> dict:
+        templates = await self._schedule_template_respository.get_active_hours()
 
         next_sunday = self._get_next_sunday()
         week_dates = self._get_week_dates(next_sunday)
 
-        completed_templates = []
+        planned_dates = {}
+        skipped = 0
         failed = 0
 
-        for template in templates:
-            if not template.is_active:
+        for service_id, day, hours_work in templates:
+            target_date = week_dates.get(day)
+            if (service_id, target_date) in planned_dates:
+                # the first template of the day wins
+                skipped += 1
                 continue
 
             try:
-                new_date = await self._create_date_with_template(
-                    template,
-                    week_dates.get(template.day)
+                planned_dates[(service_id, target_date)] = CreateServiceDate(
+                    date=target_date,
+                    slots=hours_work,
+                    service_id=service_id
                 )
+            except ValidationError as e:
+                failed += 1
+                logger.error(
+                    'error', f'invalid template for service {service_id}, detail: {str(e)}')
+
+        planned_dates = list(planned_dates.values())
+        created = 0
+
+        for start in range(0, len(planned_dates), SCHEDULE_CHUNK_SIZE):
+            chunk = planned_dates[start:start + SCHEDULE_CHUNK_SIZE]
+            try:
+                chunk_created = await self._service_date_repository.create_dates_bulk(
+                    chunk)
                 await self._session.commit()
-                completed_templates.append(new_date)
             except SQLAlchemyError as e:
                 await self._session.rollback()
-                failed += 1
+                failed += len(chunk)
                 logger.error(
-                    'error', f'failed creating date with template, detail: {str(e)}')
+                    'error', f'failed creating dates chunk, detail: {str(e)}')
                 continue
 
-        return {'status': 'created', 'success': len(completed_templates), 'failed': failed}
+            created += chunk_created
+            skipped += len(chunk) - chunk_created
 
-    async def _create_date_with_template(
-        self,
-        template: ScheduleTemplate,
-        target_date: str
-    ):
-
-        date_model = CreateServiceDate(
-            date=target_date,
-            slots=template.hours_work,
-            service_id=template.service_id
-        )
-
-        try:
-            new_date = await self._service_date_repository.create_date(
-                date_model
-            )
-            await self._session.commit()
-            return new_date
-        except SQLAlchemyError as e:
-            await self._session.rollback()
-            logger.error(
-                'error', f'failed creating service date, detail: {str(e)}')
-            return None
+        return {'status': 'created', 'created': created, 'skipped': skipped, 'failed': failed}
 
 
 service_date_usecase_exemplar: ServiceDateUseCase = ServiceDateUseCase(
@@ -251,4 +235,18 @@ def get_service_date_use_case(
         service_date_repository
     )
 
+
+def get_dates_interaction_templates(
+    session: AsyncSession = Depends(db_config.session),
+    service_date_repository: ServiceDateRepository = Depends(
+        get_service_date_repository),
+    schedule_template_repository: ScheduleTemplateRepository = Depends(
+        get_schedule_template_repository)
+) -> DatesInteractionTemplates:
+    return DatesInteractionTemplates(
+        session,
+        service_date_repository,
+        schedule_template_repository
+    )
+
 #demo hold mvp confirm
\ No newline at end of file
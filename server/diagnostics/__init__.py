@@ -0,0 +1 @@
+from .routers import diagnostics_app
@@ -0,0 +1 @@
+from .diagnostics import diagnostics_app
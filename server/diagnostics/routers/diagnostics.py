@@ -0,0 +1,40 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, Query, status
+
+from ..schemas import SlowQueryResponse, SlowQueryOrdering
+
+from ...common.db import db_config
+from ...common.utils import (
+    JWTManager,
+    slow_query_recorder
+)
+
+diagnostics_app = APIRouter(prefix='/diagnostics', tags=['Diagnostics'])
+
+
+@diagnostics_app.get(
+    '/slow-queries',
+    response_model=List[SlowQueryResponse],
+    status_code=status.HTTP_200_OK,
+    summary='Top slow queries',
+    description='Statements of this process by fingerprint with p50/p95/max and the plan of slow runs (admin only)'
+)
+async def get_slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    order_by: SlowQueryOrdering = 'p95_ms',
+    user: dict = Depends(JWTManager.admin_required)
+):
+    return slow_query_recorder.top(limit, order_by)
+
+
+@diagnostics_app.get(
+    '/pool',
+    status_code=status.HTTP_200_OK,
+    summary='Connection pool metrics',
+    description='Checked out connections, checkout wait histogram and timeouts by route of this process (admin only)'
+)
+async def get_pool_status(
+    user: dict = Depends(JWTManager.admin_required)
+):
+    return db_config.pool_status()
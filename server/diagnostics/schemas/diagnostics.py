@@ -0,0 +1,14 @@
+from typing import List, Literal
+from pydantic import BaseModel
+
+SlowQueryOrdering = Literal['p95_ms', 'p50_ms', 'max_ms', 'total_ms', 'calls']
+
+
+class SlowQueryResponse(BaseModel):
+    fingerprint: str
+    calls: int
+    total_ms: float
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+    plan: List[str] | None = None
@@ -61,15 +61,11 @@ class DisputeRepository:
         return dispute
 
     async def get_all(self, wait_arbitr: bool = True) -> List[Dispute]:
+        stmt = select(Dispute)
         if wait_arbitr:
-            disputes = await self._session.scalars(
-                select(Dispute)
-                .where(Dispute.disput_status == 'wait_for_arbitr')
-            )
+            stmt = stmt.where(Dispute.disput_status == 'wait_for_arbitr')
 
-        disputes = await self._session.scalars(
-            select(Dispute)
-        )
+        disputes = await self._session.scalars(stmt)
 
         return disputes
 
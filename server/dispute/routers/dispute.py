@@ -33,7 +33,7 @@ dispute_app = APIRouter(prefix='/disputes', tags=['Disputes'])
 async def get_all_disputes(
     dispute_repository: DisputeRepository = Depends(get_dispute_repository)
 ):
-    disputes = await dispute_repository.get_all()
+    disputes = await dispute_repository.get_all(wait_arbitr=False)
     disputes_list = list(disputes.all()) if hasattr(
         disputes, 'all') else list(disputes)
     return [
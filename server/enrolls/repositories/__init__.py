@@ -1,4 +1,8 @@
 from .enroll_repository import (
     EnrollRepository,
     get_enroll_repository
-)
\ No newline at end of file
+)
+from .deadline_repository import (
+    EnrollDeadlineRepository,
+    get_enroll_deadline_repository
+)
@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta, timezone
+from os import getenv
+from typing import List
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ...common import db_config
+from ...common.db import EnrollDeadline
+
+# status an enroll waits in -> action taken when it waits too long
+STATUS_DEADLINES = {
+    'pending': 'auto_cancel',
+    'ready': 'auto_capture',
+}
+DEADLINE_DELAYS = {
+    'auto_cancel': timedelta(days=int(getenv('AUTO_CANCEL_PENDING_DAYS', '2'))),
+    'auto_capture': timedelta(days=int(getenv('AUTO_CAPTURE_READY_DAYS', '3'))),
+}
+# how long a claimed deadline stays with its drainer before it is due again
+DEADLINE_CLAIM_LEASE = timedelta(minutes=5)
+
+
+class EnrollDeadlineRepository:
+    def __init__(
+            self,
+            session: AsyncSession) -> None:
+
+        self._session = session
+
+    async def arm(
+        self,
+        enroll_id: int,
+        action: str,
+        due_at: datetime
+    ) -> None:
+        dialect = self._session.get_bind().dialect.name
+        insert = sqlite_insert if dialect == 'sqlite' else pg_insert
+
+        stmt = insert(EnrollDeadline).values(
+            enroll_id=enroll_id,
+            action=action,
+            due_at=due_at
+        )
+        await self._session.execute(stmt.on_conflict_do_update(
+            index_elements=['enroll_id'],
+            set_={'action': stmt.excluded.action, 'due_at': stmt.excluded.due_at}
+        ))
+
+    async def track(
+        self,
+        enroll_id: int,
+        status: str
+    ) -> None:
+        '''
+        Called on every status transition, arms the deadline of the new status
+        or drops the one left over from the previous status
+        '''
+        action = STATUS_DEADLINES.get(status)
+        if action is None:
+            await self.disarm(enroll_id)
+            return
+
+        await self.arm(
+            enroll_id,
+            action,
+            datetime.now(timezone.utc) + DEADLINE_DELAYS[action]
+        )
+
+    async def disarm(
+        self,
+        enroll_id: int,
+        action: str | None = None
+    ) -> None:
+        # with an action only that deadline, not one armed by a later transition
+        stmt = delete(EnrollDeadline).where(EnrollDeadline.enroll_id == enroll_id)
+        if action is not None:
+            stmt = stmt.where(EnrollDeadline.action == action)
+        await self._session.execute(stmt)
+
+    async def claim_due(
+        self,
+        now: datetime,
+        limit: int,
+        lease: timedelta = DEADLINE_CLAIM_LEASE
+    ) -> List[tuple[int, str, datetime]]:
+        '''
+        Claims up to limit due deadlines, oldest first, and returns
+        (enroll_id, action, due_at) with the due_at they had. A claim moves
+        the deadline lease ahead of now instead of deleting it: the caller
+        commits the claim on its own and disarms each deadline with its
+        action, a deadline whose action failed or never ran is due again
+        when the lease runs out.
+        On postgres concurrent drainers skip the rows another one has
+        locked instead of waiting for it, on sqlite the update only takes
+        the rows nobody has moved since the select
+        '''
+        due = (await self._session.execute(
+            select(
+                EnrollDeadline.id,
+                EnrollDeadline.enroll_id,
+                EnrollDeadline.action,
+                EnrollDeadline.due_at)
+            .where(EnrollDeadline.due_at <= now)
+            .order_by(EnrollDeadline.due_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )).all()
+        if not due:
+            return []
+
+        claimed = set(await self._session.scalars(
+            update(EnrollDeadline)
+            .where(
+                EnrollDeadline.id.in_([row.id for row in due]),
+                EnrollDeadline.due_at <= now)
+            .values(due_at=now + lease)
+            .returning(EnrollDeadline.id)
+        ))
+        return [
+            (row.enroll_id, row.action, row.due_at)
+            for row in due if row.id in claimed
+        ]
+
+def get_enroll_deadline_repository(
+    session: AsyncSession = Depends(db_config.session)
+) -> EnrollDeadlineRepository:
+    return EnrollDeadlineRepository(session)
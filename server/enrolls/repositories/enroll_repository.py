@@ -1,10 +1,20 @@
+from datetime import date, datetime, timezone
 from time import sleep
+from typing import List
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import and_, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import selectinload
 
-from server.common.db.models.service import Service
+from server.common.db.models.service import (
+    ENROLL_TRANSITIONS,
+    HOLDS_SLOT,
+    RELEASED_STATUSES,
+    STATUS_TIMESTAMPS,
+    Service
+)
 
 from ..schemas import (
     CreateEnrollModel
@@ -12,7 +22,9 @@ from ..schemas import (
 
 from ...common import db_config
 from ...common.db import (
+    ServiceDate,
     ServiceEnroll,
+    ServiceSlot,
     User
 )
 
@@ -108,7 +120,8 @@ class EnrollRepository:
             .where(
                 ServiceEnroll.service_date_id == service_date_id,
                 ServiceEnroll.user_id == user_id,
-                ServiceEnroll.slot_time == slot_time)
+                ServiceEnroll.slot_time == slot_time,
+                ServiceEnroll.status.not_in(RELEASED_STATUSES))
         )
 
         return enroll
@@ -127,6 +140,133 @@ class EnrollRepository:
         await self._session.flush()
         return new_enroll
 
+    async def claim_slot(
+        self,
+        user_id: int,
+        enroll_data: CreateEnrollModel
+    ) -> ServiceEnroll | None:
+        '''
+        Claims a slot with one guarded INSERT ... SELECT.
+        The row is produced only if the date belongs to the service,
+        is not expired and the slot is available; the unique index on
+        (service_date_id, slot_time) leaves a single winner between
+        concurrent writers. The index leaves out cancelled and expired
+        enrolls, a slot they gave back is booked as a new enroll with
+        its own payment. Returns None if the slot was lost
+        '''
+        dialect = self._session.get_bind().dialect.name
+        insert = sqlite_insert if dialect == 'sqlite' else pg_insert
+
+        guard = (
+            select(
+                literal(user_id),
+                literal(enroll_data.service_id),
+                literal(enroll_data.service_date_id),
+                literal(enroll_data.slot_time),
+                Service.price,
+                literal('waiting_payment'),
+                literal(datetime.now(timezone.utc))
+            )
+            .select_from(ServiceDate)
+            .join(Service, Service.id == ServiceDate.service_id)
+            .join(ServiceSlot, and_(
+                ServiceSlot.service_date_id == ServiceDate.id,
+                ServiceSlot.slot_time == enroll_data.slot_time))
+            .where(
+                ServiceDate.id == enroll_data.service_date_id,
+                Service.id == enroll_data.service_id,
+                ServiceSlot.status == 'available',
+                ServiceDate.expired.is_(False),
+                ServiceDate.date >= date.today())
+        )
+
+        stmt = insert(ServiceEnroll).from_select(
+            ['user_id', 'service_id', 'service_date_id',
+             'slot_time', 'price', 'status', 'created_at'],
+            guard
+        )
+        stmt = stmt.on_conflict_do_nothing(
+            index_elements=['service_date_id', 'slot_time'],
+            index_where=HOLDS_SLOT
+        ).returning(ServiceEnroll)
+
+        enroll = await self._session.scalar(stmt)
+        return enroll
+
+    async def expire_waiting(
+        self,
+        enroll_ids: List[int] | None = None,
+        created_before: datetime | None = None
+    ) -> List[tuple[int, int, str]]:
+        '''
+        Moves unpaid enrolls to expired with one UPDATE, either the given ids
+        or everything created before the cutoff. Enrolls paid or cancelled
+        in the meantime are left alone.
+        Returns (id, service_date_id, slot_time) of the expired enrolls
+        '''
+        stmt = (
+            update(ServiceEnroll)
+            .where(ServiceEnroll.status.in_(ENROLL_TRANSITIONS['expired']))
+            .values(status='expired', version=ServiceEnroll.version + 1)
+            .returning(
+                ServiceEnroll.id,
+                ServiceEnroll.service_date_id,
+                ServiceEnroll.slot_time)
+            .execution_options(synchronize_session=False)
+        )
+        if enroll_ids is not None:
+            stmt = stmt.where(ServiceEnroll.id.in_(enroll_ids))
+        if created_before is not None:
+            stmt = stmt.where(ServiceEnroll.created_at < created_before)
+
+        expired = await self._session.execute(stmt)
+        return [tuple(row) for row in expired.all()]
+
+    async def transition(
+        self,
+        enroll_id: int,
+        status: str,
+        user_id: int | None = None,
+        service_owner_id: int | None = None,
+        version: int | None = None,
+        from_statuses: tuple[str, ...] | None = None
+    ) -> ServiceEnroll | None:
+        '''
+        Moves the enroll to status with one guarded UPDATE ... RETURNING.
+        The row must be in a status ENROLL_TRANSITIONS allows to leave for status
+        (narrowed by from_statuses), belong to user_id / a service of
+        service_owner_id and still have version when those are given.
+        None means a guard failed or the race was lost
+        '''
+        allowed = [
+            from_status for from_status in ENROLL_TRANSITIONS[status]
+            if from_statuses is None or from_status in from_statuses
+        ]
+        values = {'status': status, 'version': ServiceEnroll.version + 1}
+        if status in STATUS_TIMESTAMPS:
+            values[STATUS_TIMESTAMPS[status]] = datetime.now(timezone.utc)
+
+        stmt = (
+            update(ServiceEnroll)
+            .where(
+                ServiceEnroll.id == enroll_id,
+                ServiceEnroll.status.in_(allowed))
+            .values(**values)
+            .returning(ServiceEnroll)
+        )
+        if user_id is not None:
+            stmt = stmt.where(ServiceEnroll.user_id == user_id)
+        if service_owner_id is not None:
+            stmt = stmt.where(ServiceEnroll.service_id.in_(
+                select(Service.id).where(Service.user_id == service_owner_id)))
+        if version is not None:
+            stmt = stmt.where(ServiceEnroll.version == version)
+
+        return await self._session.scalar(
+            stmt,
+            execution_options={'populate_existing': True}
+        )
+
 
 def get_enroll_repository(
     session: AsyncSession = Depends(db_config.session)
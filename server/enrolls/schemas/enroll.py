@@ -1,7 +1,9 @@
 from datetime import datetime
 from typing import Any, List, Literal, Dict
 
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
+
+from ...common.utils.service_day import ServiceDay
 
 EnrollStatus = Literal['pending', 'confirmed',
                        'completed', 'cancelled', 'expired', 'ready', 'waiting_payment']
@@ -9,10 +11,18 @@ EnrollStatus = Literal['pending', 'confirmed',
 
 class CreateEnrollModel(BaseModel):
     service_id: int
-    service_date_id: int
+    # a day resolved from the templates has no id yet, then date is sent
+    service_date_id: int | None = None
+    date: ServiceDay | None = None  # format dd-mm-YYYY
     slot_time: str
     price: int
 
+    @model_validator(mode='after')
+    def check_date_given(self):
+        if self.service_date_id is None and self.date is None:
+            raise ValueError('service_date_id or date is required')
+        return self
+
 
 class SimpleEnrollUserResponse(BaseModel):
     id: int
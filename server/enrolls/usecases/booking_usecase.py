@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime, date, timedelta, timezone
 from typing import List
 import re
@@ -10,7 +11,8 @@ from sqlalchemy.orm import session
 
 from ..repositories import (
     get_enroll_repository,
-    EnrollRepository
+    EnrollRepository,
+    EnrollDeadlineRepository
 )
 
 from ..schemas import CreateEnrollModel
@@ -41,6 +43,12 @@ from ...common.utils.yookassa import (
 )
 from ...common.utils.logger import logger
 from ...common.utils.email_config import email_verfification_obj
+from ...common.utils.slot_holds import (
+    HOLD_DRAIN_INTERVAL_SECONDS,
+    HOLD_DRAIN_RETRY_SECONDS,
+    SlotHolds,
+    slot_holds
+)
 
 
 class BookingUseCase:
@@ -50,13 +58,18 @@ class BookingUseCase:
             enroll_repository: EnrollRepository,
             service_date_repository: ServiceDateRepository,
             payment_repository: PaymentRepository,
-            payment_usecase: PaymentUseCase = None) -> None:
+            payment_usecase: PaymentUseCase = None,
+            holds: SlotHolds = slot_holds,
+            deadline_repository: EnrollDeadlineRepository = None) -> None:
 
         self._session = session
         self._enroll_repository = enroll_repository
         self._service_date_repository = service_date_repository
         self._payment_repository = payment_repository
         self._payment_usecase = payment_usecase
+        self._holds = holds
+        self._deadline_repository = deadline_repository or EnrollDeadlineRepository(
+            session)
         self._slot_time_pattern = re.compile(r"^(?:[01]\d|2[0-3]):[0-5]\d$")
 
     def _is_valid_slot_time_format(self, slot_time: str) -> bool:
@@ -70,16 +83,12 @@ class BookingUseCase:
         if not self._is_valid_slot_time_format(slot_time):
             return False
 
-        service_date = await self._service_date_repository.get_by_id(service_date_id)
-        if not service_date:
-            return False
-
-        if slot_time not in service_date.slots:
+        slot = await self._service_date_repository.get_slot(service_date_id, slot_time)
+        if not slot or slot.status != 'available':
             return False
 
-        slot_status = service_date.slots.get(slot_time)
-
-        if slot_status != 'available':
+        service_date = await self._service_date_repository.get_by_id(service_date_id)
+        if not service_date:
             return False
 
         if await self._check_date_expire(service_date):
@@ -109,77 +118,92 @@ class BookingUseCase:
             not await self._check_user_booking(user_id, service_date_id, slot_time)
         )
 
+    async def _explain_lost_claim(
+        self,
+        user_id: int,
+        enroll_data: CreateEnrollModel
+    ) -> dict:
+        date_row = await self._service_date_repository.get_by_id(
+            enroll_data.service_date_id)
+        if not date_row:
+            return {'status': 'failed creating enroll', 'detail': 'date not found'}
+
+        slot = await self._service_date_repository.get_slot(
+            enroll_data.service_date_id, enroll_data.slot_time)
+        if not slot:
+            return {'status': 'failed creating enroll', 'detail': 'slot not found'}
+
+        service = await self._session.scalar(
+            select(Service).where(Service.id == enroll_data.service_id)
+        )
+        if not service:
+            return {'status': 'failed creating enroll', 'detail': 'service not found'}
+        if service.id != date_row.service_id:
+            return {'status': 'failed creating enroll', 'detail': 'date does not belong to service'}
+
+        if await self._check_date_expire(date_row):
+            return {'status': 'failed creating enroll', 'detail': 'date expired'}
+
+        if slot.status != 'available':
+            return {'status': 'failed creating enroll', 'detail': 'slot not available'}
+
+        if await self._check_user_booking(user_id, enroll_data.service_date_id, enroll_data.slot_time):
+            return {'status': 'failed creating enroll', 'detail': 'user already booked this slot'}
+
+        return {'status': 'failed creating enroll', 'detail': 'slot already booked'}
+
     async def create_book(
         self,
         user_id: int,
         enroll_data: CreateEnrollModel
     ):
+        '''
+        Claims the slot with a single guarded write, the winner gets the enroll.
+        Checks only run again after a lost claim to explain the failure
+        '''
         try:
             if not self._is_valid_slot_time_format(enroll_data.slot_time):
                 return {'status': 'failed creating enroll', 'detail': 'invalid slot time'}
 
             async with self._session.begin():
-                date_row = await self._session.scalar(
-                    select(ServiceDate)
-                    .where(ServiceDate.id == enroll_data.service_date_id)
-                    .with_for_update()
+                if enroll_data.service_date_id is None:
+                    # first booking of a day that only exists in the templates
+                    service_date_id = await self._service_date_repository.materialize_date(
+                        enroll_data.service_id, enroll_data.date)
+                    if not service_date_id:
+                        return {'status': 'failed creating enroll', 'detail': 'date not found'}
+                    enroll_data = enroll_data.model_copy(
+                        update={'service_date_id': service_date_id})
+
+                booked_enroll = await self._enroll_repository.claim_slot(
+                    user_id,
+                    enroll_data
                 )
-                if not date_row:
-                    return {'status': 'failed creating enroll', 'detail': 'date not found'}
-
-                if enroll_data.slot_time not in date_row.slots:
-                    return {'status': 'failed creating enroll', 'detail': 'slot not found'}
 
-                service = await self._session.scalar(
-                    select(Service).where(Service.id == enroll_data.service_id)
+                if not booked_enroll:
+                    return await self._explain_lost_claim(user_id, enroll_data)
+
+                # waiting_payment keeps the slot available until the payment,
+                # but the slot row always points to the enroll holding it
+                await self._service_date_repository.set_slot_status(
+                    enroll_data.service_date_id,
+                    enroll_data.slot_time,
+                    'available' if booked_enroll.status == 'waiting_payment' else 'booked',
+                    expected_status='available',
+                    enroll_id=booked_enroll.id
                 )
-                if not service:
-                    return {'status': 'failed creating enroll', 'detail': 'service not found'}
-                if service.id != date_row.service_id:
-                    return {'status': 'failed creating enroll', 'detail': 'date does not belong to service'}
-                slot_price = service.price
-
-                if await self._check_date_expire(date_row):
-                    return {'status': 'failed creating enroll', 'detail': 'date expired'}
-
-                slot_status = date_row.slots.get(enroll_data.slot_time)
-                if slot_status != 'available':
-                    return {'status': 'failed creating enroll', 'detail': 'slot not available'}
-
-                existing = await self._enroll_repository.get_by_slot_service_date_user_id(
-                    enroll_data.service_date_id, user_id, enroll_data.slot_time
+                await self._deadline_repository.track(
+                    booked_enroll.id, booked_enroll.status)
+
+            # the hold returns the slot when the payment does not come in time
+            if booked_enroll.status == 'waiting_payment':
+                await self._holds.place(
+                    booked_enroll.id,
+                    booked_enroll.service_date_id,
+                    booked_enroll.slot_time
                 )
 
-                booked_enroll = None
-
-                if existing and existing.status == 'cancelled':
-                    booked_enroll = await self._session.merge(ServiceEnroll(
-                        id=existing.id,
-                        status='pending',
-                        price=slot_price
-                    ))
-                elif existing:
-                    return {'status': 'failed creating enroll', 'detail': 'user already booked this slot'}
-                else:
-                    booked_enroll = ServiceEnroll(
-                        user_id=user_id,
-                        service_id=enroll_data.service_id,
-                        service_date_id=enroll_data.service_date_id,
-                        slot_time=enroll_data.slot_time,
-                        price=slot_price
-                    )
-                    self._session.add(booked_enroll)
-                    await self._session.flush()
-
-                if booked_enroll.status != 'waiting_payment':
-                    new_slots = date_row.slots.copy()
-                    new_slots[enroll_data.slot_time] = 'booked'
-                    await self._session.merge(
-                        ServiceDate(
-                            id=enroll_data.service_date_id,
-                            slots=new_slots))
-
-                return booked_enroll
+            return booked_enroll
 
         except IntegrityError:
             await self._session.rollback()
@@ -195,57 +219,74 @@ class BookingUseCase:
             enroll_id: int,
             user_id: int
     ):
-        exiting = await self._enroll_repository.get_by_enroll_user_id(
+        exiting = await self._enroll_repository.transition(
             enroll_id,
-            user_id
+            'cancelled',
+            user_id=user_id
         )
 
         if not exiting:
-            return {'status': 'failed canceling enroll', 'detail': 'enroll not found'}
+            lost = await self._enroll_repository.get_by_enroll_user_id(
+                enroll_id,
+                user_id
+            )
+            if not lost:
+                return {'status': 'failed canceling enroll', 'detail': 'enroll not found'}
+            if lost.status == 'cancelled':
+                return {'status': 'failed canceling enroll', 'detail': 'status alredy canceling'}
+            return {
+                'status': 'failed canceling enroll',
+                'detail': f'enroll status is {lost.status}, it can not be cancelled'
+            }
 
-        if exiting.status == 'cancelled':
-            return {'status': 'failed canceling enroll', 'detail': 'status alredy canceling'}
+        await self._service_date_repository.set_slot_status(
+            exiting.service_date_id, exiting.slot_time, 'available')
+        await self._deadline_repository.track(enroll_id, 'cancelled')
+        await self._session.commit()
+        await self._holds.release(
+            enroll_id, exiting.service_date_id, exiting.slot_time)
+        return exiting
 
-        if exiting:
-            date = await self._service_date_repository.get_by_id(exiting.service_date_id)
+    async def _check_date_expire(self, date_obj: ServiceDate) -> bool:
+        return date_obj.expired or date_obj.date < date.today()
 
-            new_slots = date.slots.copy()
-            new_slots[exiting.slot_time] = 'available'
-            await self._session.merge(ServiceEnroll(id=enroll_id, status='cancelled'))
-            await self._session.merge(ServiceDate(id=exiting.service_date_id, slots=new_slots))
-            await self._session.commit()
-            return exiting
+    async def check_date_for_final_dates(self) -> list:
+        expired_ids = await self._service_date_repository.expire_past_dates(
+            date.today())
+        await self._session.commit()
+        return expired_ids
+
+    async def _explain_lost_transition(
+        self,
+        enroll_id: int,
+        status_detail: str,
+        user_id: int | None = None,
+        service_owner_id: int | None = None
+    ) -> dict:
+        '''
+        Runs only after a transition matched nothing, tells which guard failed.
+        status_detail gets the current status of the enroll
+        '''
+        enroll = await self._enroll_repository.get_by_id(enroll_id)
 
-        return {'status': 'failed canceling enroll', 'detail': 'date not found'}
+        if not enroll:
+            return {'status': 'failed', 'detail': 'enroll not found'}
 
-    async def _check_date_expire(self, date_obj: ServiceDate) -> bool:
-        if isinstance(date_obj.date, str):
-            try:
-                service_date = datetime.strptime(
-                    date_obj.date, "%d-%m-%Y").date()
-            except ValueError:
-                try:
-                    service_date = datetime.strptime(
-                        date_obj.date, "%Y-%m-%d").date()
-                except ValueError:
-                    return False
-            return service_date < date.today()
-        return False
-
-    async def _mark_status_break(self, date_obj: ServiceDate):
-        update_date = {time: 'break' for time in date_obj.slots}
-        await self._session.merge(ServiceDate(id=date_obj.id, slots=update_date))
-        await self._session.commit()
-        return update_date
+        if user_id is not None and enroll.user_id != user_id:
+            return {'status': 'failed', 'detail': 'permission denied'}
 
-    async def check_date_for_final_dates(self) -> list:
-        update_list = []
-        dates = await self._service_date_repository.get_all()
-        for date in dates:
-            if await self._check_date_expire(date):
-                update_list.append(await self._mark_status_break(date))
+        if service_owner_id is not None:
+            service = await self._session.scalar(
+                select(Service).where(Service.id == enroll.service_id)
+            )
 
-        return update_list
+            if not service:
+                return {'status': 'failed', 'detail': 'service not found'}
+
+            if service.user_id != service_owner_id:
+                return {'status': 'failed', 'detail': 'permission denied'}
+
+        return {'status': 'failed', 'detail': status_detail.format(status=enroll.status)}
 
     async def change_enroll_status(
         self,
@@ -255,126 +296,150 @@ class BookingUseCase:
         reason: str | None = None
     ):
 
-        enroll = await self._enroll_repository.get_by_id(enroll_id)
+        if action == 'accept':
+            new_status = 'confirmed'
+        elif action == 'reject':
+            new_status = 'cancelled'
+        else:
+            return {'status': 'failed', 'detail': f'invalid action: {action}. Use "accept" or "reject"'}
 
-        if not enroll:
-            return {'status': 'failed', 'detail': 'enroll not found'}
+        try:
+            # the master only decides on pending enrolls
+            enroll = await self._enroll_repository.transition(
+                enroll_id,
+                new_status,
+                service_owner_id=service_owner_id,
+                from_statuses=('pending',)
+            )
 
-        service = await self._session.scalar(
-            select(Service).where(Service.id == enroll.service_id)
-        )
+            if not enroll:
+                return await self._explain_lost_transition(
+                    enroll_id,
+                    'enroll status is {status}, only pending can be changed',
+                    service_owner_id=service_owner_id
+                )
 
-        if not service:
-            return {'status': 'failed', 'detail': 'service not found'}
+            if new_status == 'cancelled':
+                await self._service_date_repository.set_slot_status(
+                    enroll.service_date_id, enroll.slot_time, 'available')
 
-        if service.user_id != service_owner_id:
-            return {'status': 'failed', 'detail': 'permission denied'}
+            await self._deadline_repository.track(enroll_id, new_status)
+            await self._session.commit()
+        except SQLAlchemyError as e:
+            await self._session.rollback()
+            logger.error(
+                'error', f'failed changing enroll status, detail: {str(e)}')
+            return {'status': 'failed', 'detail': str(e)}
 
-        if enroll.status != 'pending':
-            return {'status': 'failed', 'detail': f'enroll status is {enroll.status}, only pending can be changed'}
+        # after the commit, the mail and yookassa calls must not hold the sqlite writer
+        if new_status == 'cancelled':
+            await self._reject_enroll(enroll, service_owner_id, reason)
+        return enroll
 
-        if action == 'accept':
-            new_status = 'confirmed'
-        elif action == 'reject':
-            new_status = 'cancelled'
+    async def _reject_enroll(
+        self,
+        enroll: ServiceEnroll,
+        service_owner_id: int,
+        reason: str | None
+    ) -> None:
+        '''
+        Side effects of a rejected and committed enroll: mail with
+        the reason and the money back to the client. The payment row
+        is written in its own short transaction after the yookassa calls
+        '''
+        enroll_id = enroll.id
 
-            # Send email to user with cancellation reason
-            if reason:
-                try:
-                    user = await self._session.scalar(
-                        select(User).where(User.id == enroll.user_id)
+        # Send email to user with cancellation reason
+        if reason:
+            try:
+                service = await self._session.scalar(
+                    select(Service).where(Service.id == enroll.service_id)
+                )
+                users = {
+                    user.id: user
+                    for user in await self._session.scalars(
+                        select(User).where(
+                            User.id.in_([enroll.user_id, service_owner_id]))
+                    )
+                }
+                user = users.get(enroll.user_id)
+                if user and user.email:
+                    master = users.get(service_owner_id)
+                    master_name = master.name if master else 'Мастер'
+
+                    email_verfification_obj.send_cancel_enroll_message(
+                        to_email=user.email,
+                        service_title=service.title,
+                        master_name=master_name,
+                        reason=reason
                     )
-                    if user and user.email:
-                        master = await self._session.scalar(
-                            select(User).where(User.id == service_owner_id)
+                    logger.info(
+                        f'Cancel email sent to {user.email} for enroll #{enroll_id}')
+            except Exception as e:
+                logger.error(f'Error sending cancel email: {str(e)}')
+
+        payment = await self._payment_repository.get_by_enroll_id(enroll_id)
+        if payment and payment.yookassa_payment_id:
+            try:
+                yookassa_payment = await yookassa_get_payment(payment.yookassa_payment_id)
+                yookassa_status = yookassa_payment.get('status')
+
+                if yookassa_status == 'succeeded':
+                    try:
+                        refund_result = await yookassa_create_refund(
+                            payment_id=payment.yookassa_payment_id,
+                            amount=payment.amount,
+                            description=f'Refund for canceled enroll #{enroll_id}'
                         )
-                        master_name = master.name if master else 'Мастер'
 
-                        email_verfification_obj.send_cancel_enroll_message(
-                            to_email=user.email,
-                            service_title=service.title,
-                            master_name=master_name,
-                            reason=reason
+                        await self._payment_repository.update_payment(
+                            payment_id=payment.id,
+                            yookassa_status='succeeded',
+                            status='canceled'
                         )
                         logger.info(
-                            f'Cancel email sent to {user.email} for enroll #{enroll_id}')
-                except Exception as e:
-                    logger.error(f'Error sending cancel email: {str(e)}')
-
-            date = await self._service_date_repository.get_by_id(enroll.service_date_id)
-            if date:
-                new_slots = date.slots.copy()
-                new_slots[enroll.slot_time] = 'available'
-                await self._session.merge(ServiceDate(id=enroll.service_date_id, slots=new_slots))
-
-            payment = await self._payment_repository.get_by_enroll_id(enroll_id)
-            if payment and payment.yookassa_payment_id:
-                try:
-                    yookassa_payment = await yookassa_get_payment(payment.yookassa_payment_id)
-                    yookassa_status = yookassa_payment.get('status')
-
-                    if yookassa_status == 'succeeded':
-                        try:
-                            refund_result = await yookassa_create_refund(
-                                payment_id=payment.yookassa_payment_id,
-                                amount=payment.amount,
-                                description=f'Refund for canceled enroll #{enroll_id}'
-                            )
-
-                            await self._payment_repository.update_payment(
-                                payment_id=payment.id,
-                                yookassa_status='succeeded',
-                                status='canceled'
-                            )
-                            logger.info(
-                                f'Refund created for payment {payment.yookassa_payment_id}, '
-                                f'refund_id: {refund_result.get("id")}'
-                            )
-                        except Exception as e:
-                            logger.error(
-                                f'Error creating refund for payment {payment.yookassa_payment_id}: {str(e)}'
-                            )
-
-                    elif yookassa_status == 'waiting_for_capture':
-                        try:
-                            cancel_result = await yookassa_cancel_payment(payment.yookassa_payment_id)
-                            await self._payment_repository.update_payment(
-                                payment_id=payment.id,
-                                yookassa_status=cancel_result.get(
-                                    'status', 'canceled'),
-                                status='canceled'
-                            )
-                            logger.info(
-                                f'Payment {payment.yookassa_payment_id} canceled')
-                        except Exception as e:
-                            logger.error(
-                                f'Error canceling payment {payment.yookassa_payment_id}: {str(e)}')
-
-                    else:
+                            f'Refund created for payment {payment.yookassa_payment_id}, '
+                            f'refund_id: {refund_result.get("id")}'
+                        )
+                    except Exception as e:
+                        logger.error(
+                            f'Error creating refund for payment {payment.yookassa_payment_id}: {str(e)}'
+                        )
+
+                elif yookassa_status == 'waiting_for_capture':
+                    try:
+                        cancel_result = await yookassa_cancel_payment(payment.yookassa_payment_id)
                         await self._payment_repository.update_payment(
                             payment_id=payment.id,
+                            yookassa_status=cancel_result.get(
+                                'status', 'canceled'),
                             status='canceled'
                         )
                         logger.info(
-                            f'Payment {payment.yookassa_payment_id} marked as canceled (status: {yookassa_status})')
+                            f'Payment {payment.yookassa_payment_id} canceled')
+                    except Exception as e:
+                        logger.error(
+                            f'Error canceling payment {payment.yookassa_payment_id}: {str(e)}')
 
-                except Exception as e:
-                    logger.error(
-                        f'Error processing refund for payment {payment.yookassa_payment_id}: {str(e)}'
+                else:
+                    await self._payment_repository.update_payment(
+                        payment_id=payment.id,
+                        status='canceled'
                     )
-        else:
-            return {'status': 'failed', 'detail': f'invalid action: {action}. Use "accept" or "reject"'}
+                    logger.info(
+                        f'Payment {payment.yookassa_payment_id} marked as canceled (status: {yookassa_status})')
+
+            except Exception as e:
+                logger.error(
+                    f'Error processing refund for payment {payment.yookassa_payment_id}: {str(e)}'
+                )
 
         try:
-            await self._session.merge(ServiceEnroll(id=enroll_id, status=new_status))
             await self._session.commit()
-            updated_enroll = await self._enroll_repository.get_by_id(enroll_id)
-            return updated_enroll
         except SQLAlchemyError as e:
             await self._session.rollback()
-            logger.error(
-                'error', f'failed changing enroll status, detail: {str(e)}')
-            return {'status': 'failed', 'detail': str(e)}
+            await self._session.refresh(enroll)
+            logger.error(f'Error saving the payment of canceled enroll #{enroll_id}: {str(e)}')
 
     async def mark_enroll_as_completed(
         self,
@@ -385,33 +450,23 @@ class BookingUseCase:
         The technician marks the service as completed.
         Chges the enrollment status to 'completed'
         '''
-        enroll = await self._enroll_repository.get_by_id(enroll_id)
-
-        if not enroll:
-            return {'status': 'failed', 'detail': 'enroll not found'}
-
-        service = await self._session.scalar(
-            select(Service).where(Service.id == enroll.service_id)
-        )
-
-        if not service:
-            return {'status': 'failed', 'detail': 'service not found'}
-
-        if service.user_id != master_id:
-            return {'status': 'failed', 'detail': 'permission denied'}
+        try:
+            enroll = await self._enroll_repository.transition(
+                enroll_id,
+                'ready',
+                service_owner_id=master_id
+            )
 
-        if enroll.status != 'confirmed':
-            return {
-                'status': 'failed',
-                'detail': f'enroll status is {enroll.status}, only confirmed enrolls can be marked as ready'
-            }
+            if not enroll:
+                return await self._explain_lost_transition(
+                    enroll_id,
+                    'enroll status is {status}, only confirmed enrolls can be marked as ready',
+                    service_owner_id=master_id
+                )
 
-        try:
-            await self._session.merge(ServiceEnroll(id=enroll_id, status='ready'))
+            await self._deadline_repository.track(enroll_id, 'ready')
             await self._session.commit()
-
-            updated_enroll = await self._enroll_repository.get_by_id(enroll_id)
-            return updated_enroll
+            return enroll
 
         except SQLAlchemyError as e:
             await self._session.rollback()
@@ -427,90 +482,50 @@ class BookingUseCase:
         The client confirms that the service has been completed.
         Changes the enrollment status to 'completed' and starts the orchestrator.
         '''
-        enroll = await self._enroll_repository.get_by_id(enroll_id)
-
-        if not enroll:
-            return {'status': 'failed', 'detail': 'enroll not found'}
-
-        if enroll.user_id != client_id:
-            return {'status': 'failed', 'detail': 'permission denied'}
+        try:
+            enroll = await self._enroll_repository.transition(
+                enroll_id,
+                'completed',
+                user_id=client_id
+            )
 
-        if enroll.status != 'ready':
-            return {
-                'status': 'failed',
-                'detail': f'enroll status is {enroll.status}, only ready enrolls can be confirmed by client'
-            }
+            if not enroll:
+                return await self._explain_lost_transition(
+                    enroll_id,
+                    'enroll status is {status}, only ready enrolls can be confirmed by client',
+                    user_id=client_id
+                )
 
-        try:
-            await self._session.merge(ServiceEnroll(id=enroll_id, status='completed'))
+            await self._deadline_repository.track(enroll_id, 'completed')
             await self._session.commit()
 
-            self._session.expire_all()
-
             if self._payment_usecase:
                 payout_result = await self._payment_usecase.process_payout_for_completed_enroll(enroll_id)
                 if payout_result.get('status') == 'error':
                     logger.error(
                         f'Failed to process payout for enroll {enroll_id}: {payout_result.get("detail")}')
 
-            updated_enroll = await self._enroll_repository.get_by_id(enroll_id)
-            return updated_enroll
+            return enroll
 
         except SQLAlchemyError as e:
             await self._session.rollback()
             logger.error(f'Failed to confirm enroll by client: {str(e)}')
             return {'status': 'failed', 'detail': str(e)}
 
-    async def expire_pending_enrolls(self, timeout_minutes: int = 15) -> dict:
+    async def _expire_waiting(
+        self,
+        enroll_ids: List[int] | None = None,
+        created_before: datetime | None = None
+    ) -> dict:
         try:
-            timeout_delta = timedelta(minutes=timeout_minutes)
-            cutoff_time = datetime.now(timezone.utc) - timeout_delta
-
-            pending_enrolls = await self._session.scalars(
-                select(ServiceEnroll)
-                .where(
-                    ServiceEnroll.status == 'waiting_payment',
-                    ServiceEnroll.created_at < cutoff_time
-                )
+            expired = await self._enroll_repository.expire_waiting(
+                enroll_ids=enroll_ids,
+                created_before=created_before
             )
-            enrolls_list = pending_enrolls.all()
-
-            if not enrolls_list:
-                return {
-                    'status': 'success',
-                    'expired_count': 0,
-                    'message': 'No pending enrolls to expire'
-                }
-
-            expired_count = 0
-            slots_to_update = {}  # {service_date_id: updated_slots_dict}
-
-            for enroll in enrolls_list:
-                enroll.status = 'expired'
-                expired_count += 1
-
-                if enroll.service_date_id not in slots_to_update:
-                    date_obj = await self._service_date_repository.get_by_id(enroll.service_date_id)
-                    if date_obj:
-                        slots_to_update[enroll.service_date_id] = date_obj.slots.copy(
-                        )
-
-                if enroll.service_date_id in slots_to_update:
-                    slots_to_update[enroll.service_date_id][enroll.slot_time] = 'available'
-
-            for service_date_id, updated_slots in slots_to_update.items():
-                await self._session.merge(
-                    ServiceDate(id=service_date_id, slots=updated_slots)
-                )
-
+            await self._service_date_repository.release_slots(
+                [(service_date_id, slot_time) for _, service_date_id, slot_time in expired])
             await self._session.commit()
 
-            return {
-                'status': 'success',
-                'expired_count': expired_count,
-                'expired_ids': [e.id for e in enrolls_list]
-            }
-
         except SQLAlchemyError as e:
             await self._session.rollback()
             logger.error(f'Failed to expire pending enrolls: {str(e)}')
@@ -519,6 +534,73 @@ class BookingUseCase:
                 'detail': str(e)
             }
 
+        for enroll_id, service_date_id, slot_time in expired:
+            await self._holds.release(enroll_id, service_date_id, slot_time)
+
+        if not expired:
+            return {
+                'status': 'success',
+                'expired_count': 0,
+                'message': 'No pending enrolls to expire'
+            }
+
+        return {
+            'status': 'success',
+            'expired_count': len(expired),
+            'expired_ids': [enroll_id for enroll_id, _, _ in expired]
+        }
+
+    async def expire_held_enrolls(self, enroll_ids: List[int]) -> dict:
+        '''
+        Expires the enrolls whose payment hold ran out, called by the hold drainer
+        '''
+        return await self._expire_waiting(enroll_ids=enroll_ids)
+
+    async def expire_pending_enrolls(self, timeout_minutes: int = 15) -> dict:
+        '''
+        Safety net for holds lost in redis, expires every unpaid enroll
+        older than the timeout
+        '''
+        cutoff_time = datetime.now(timezone.utc) - timedelta(minutes=timeout_minutes)
+        return await self._expire_waiting(created_before=cutoff_time)
+
+
+async def expire_held_enrolls(
+    enroll_ids: List[int],
+    holds: SlotHolds = slot_holds
+) -> dict:
+    async with db_config.Session() as session:
+        booking_usecase = BookingUseCase(
+            session,
+            EnrollRepository(session),
+            ServiceDateRepository(session),
+            PaymentRepository(session),
+            holds=holds
+        )
+        return await booking_usecase.expire_held_enrolls(enroll_ids)
+
+
+async def run_hold_drainer(holds: SlotHolds = slot_holds) -> None:
+    '''
+    Returns slots of expired payment holds right away,
+    runs for the lifetime of the api process
+    '''
+    while True:
+        delay = HOLD_DRAIN_INTERVAL_SECONDS
+        try:
+            enroll_ids = await holds.claim_due()
+            if enroll_ids is None:
+                delay = HOLD_DRAIN_RETRY_SECONDS
+            elif enroll_ids:
+                result = await expire_held_enrolls(enroll_ids, holds)
+                # paid or cancelled meanwhile, they are done as well;
+                # on a failure the claim runs out and they are drained again
+                if result['status'] == 'success':
+                    await holds.forget(enroll_ids)
+        except Exception as e:
+            logger.error(f'failed draining payment holds: {str(e)}')
+        await asyncio.sleep(delay)
+
 
 def get_booking_usecase(
     session: AsyncSession = Depends(db_config.session),
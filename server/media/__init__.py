@@ -0,0 +1 @@
+from .routers import media_app
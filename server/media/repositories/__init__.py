@@ -0,0 +1,4 @@
+from .media_variant_repository import (
+    MediaVariantRepository,
+    get_media_variant_repository
+)
@@ -0,0 +1,109 @@
+from typing import List
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ...common import db_config
+from ...common.db import MediaFailure, MediaVariant, Service
+
+
+class MediaVariantRepository:
+    def __init__(
+            self,
+            session: AsyncSession) -> None:
+
+        self._session = session
+
+    async def get_by_source_hash(
+        self,
+        source_hash: str
+    ) -> List[MediaVariant]:
+        variants = await self._session.scalars(
+            select(MediaVariant)
+            .where(MediaVariant.source_hash == source_hash)
+        )
+        return variants.all()
+
+    async def save(
+        self,
+        source_hash: str,
+        variant: str,
+        format: str,
+        url: str,
+        width: int,
+        height: int,
+        size: int
+    ) -> None:
+        '''A variant that is already there is left alone, two workers may render one file'''
+        dialect = self._session.get_bind().dialect.name
+        insert = sqlite_insert if dialect == 'sqlite' else pg_insert
+
+        await self._session.execute(
+            insert(MediaVariant).values(
+                source_hash=source_hash,
+                variant=variant,
+                format=format,
+                url=url,
+                width=width,
+                height=height,
+                size=size
+            ).on_conflict_do_nothing(
+                index_elements=['source_hash', 'variant', 'format'])
+        )
+
+    async def mark_failed(
+        self,
+        source_hash: str,
+        reason: str
+    ) -> None:
+        dialect = self._session.get_bind().dialect.name
+        insert = sqlite_insert if dialect == 'sqlite' else pg_insert
+
+        stmt = insert(MediaFailure).values(source_hash=source_hash, reason=reason)
+        await self._session.execute(stmt.on_conflict_do_update(
+            index_elements=['source_hash'],
+            set_={'reason': stmt.excluded.reason, 'failed_at': stmt.excluded.failed_at}
+        ))
+
+    async def clear_failed(
+        self,
+        source_hash: str
+    ) -> None:
+        await self._session.execute(
+            delete(MediaFailure)
+            .where(MediaFailure.source_hash == source_hash)
+        )
+
+    async def get_unprocessed_photos(
+        self,
+        limit: int
+    ) -> List[tuple[str, str]]:
+        '''
+        (photo_hash, photo url) of stored photos that have no variants
+        and have not failed, the latest services first so that new
+        uploads are never stuck behind old ones
+        '''
+        photos = await self._session.execute(
+            select(Service.photo_hash, Service.photo)
+            .where(
+                Service.photo_hash.is_not(None),
+                Service.photo_hash != '',
+                ~select(MediaVariant.id)
+                .where(MediaVariant.source_hash == Service.photo_hash)
+                .exists(),
+                ~select(MediaFailure.id)
+                .where(MediaFailure.source_hash == Service.photo_hash)
+                .exists())
+            .group_by(Service.photo_hash, Service.photo)
+            .order_by(func.max(Service.id).desc())
+            .limit(limit)
+        )
+        return [tuple(row) for row in photos.all()]
+
+def get_media_variant_repository(
+    session: AsyncSession = Depends(db_config.session)
+) -> MediaVariantRepository:
+    return MediaVariantRepository(session)
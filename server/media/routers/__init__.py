@@ -0,0 +1 @@
+from .media import media_app
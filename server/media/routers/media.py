@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Header, Response, status
+from fastapi.responses import FileResponse
+
+from ...common.utils import NotFoundException404, media_store
+from ...common.utils.media_store import MEDIA_NAME, MEDIA_TYPES
+
+media_app = APIRouter(prefix='/media', tags=['Media'])
+
+# a name is the hash of the content, a cached copy never goes stale
+MEDIA_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+@media_app.api_route(
+    '/{name}',
+    methods=['GET', 'HEAD'],
+    status_code=status.HTTP_200_OK,
+    summary='get media file',
+    description='endpoint for uploaded images, supports Range and If-None-Match'
+)
+async def get_media(
+    name: str,
+    if_none_match: str | None = Header(None)
+):
+    extension = name.rpartition('.')[2]
+    if not MEDIA_NAME.match(name) or extension not in MEDIA_TYPES:
+        await NotFoundException404.file_not_found()
+
+    path = media_store.path(name)
+    if not path.is_file():
+        await NotFoundException404.file_not_found()
+
+    headers = {
+        'ETag': f'"{name.partition(".")[0]}"',
+        'Cache-Control': MEDIA_CACHE_CONTROL,
+    }
+    if if_none_match and (
+        if_none_match.strip() == '*'
+        or headers['ETag'] in (tag.strip().removeprefix('W/') for tag in if_none_match.split(','))
+    ):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # starlette answers Range and If-Range with 206/416 and sets Content-Length
+    return FileResponse(path, media_type=MEDIA_TYPES[extension], headers=headers)
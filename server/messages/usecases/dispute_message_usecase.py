@@ -30,15 +30,15 @@ class DisputeMessageUseCase:
         chat_id: int
     ):
         try:
-            new_message = await self._dispute_message_repository.create_dispute_message(
-                content,
-                sender_id,
-                chat_id
+            # chat traffic is many tiny inserts, on sqlite the writer queue commits them together
+            return await db_config.write(
+                lambda session: DisputeMessageRepository(session).create_dispute_message(
+                    content,
+                    sender_id,
+                    chat_id
+                )
             )
-            await self._session.commit()
-            return new_message
         except SQLAlchemyError as e:
-            await self._session.rollback()
             logger.error(
                 'error', f'failed creating dispute message, detail: {str(e)}')
             return {'status': 'failed creating dispute message', 'detail': str(e)}
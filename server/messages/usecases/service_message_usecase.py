@@ -34,15 +34,15 @@ class ServiceMessageUseCase:
     ):
 
         try:
-            new_message = await self._service_message_repository.create_service_message(
-                content,
-                sender_id,
-                chat_id
+            # chat traffic is many tiny inserts, on sqlite the writer queue commits them together
+            return await db_config.write(
+                lambda session: ServiceMessageRepository(session).create_service_message(
+                    content,
+                    sender_id,
+                    chat_id
+                )
             )
-            await self._session.commit()
-            return new_message
         except SQLAlchemyError as e:
-            await self._session.rollback()
             logger.error('error', f'failed creating message, detail: {str(e)}')
             return {'status': 'failed creating message', 'detail': str(e)}
 
@@ -34,15 +34,15 @@ class SupportMessageUseCase:
     ):
 
         try:
-            new_message = await self._support_message_repository.create_support_message(
-                content,
-                sender_id,
-                chat_id
+            # chat traffic is many tiny inserts, on sqlite the writer queue commits them together
+            return await db_config.write(
+                lambda session: SupportMessageRepository(session).create_support_message(
+                    content,
+                    sender_id,
+                    chat_id
+                )
             )
-            await self._session.commit()
-            return new_message
         except SQLAlchemyError as e:
-            await self._session.rollback()
             logger.error(
                 'error', f'failed creating support message, detail: {str(e)}')
             return {'status': 'failed creating support message', 'detail': str(e)}
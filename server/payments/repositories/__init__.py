@@ -1,3 +1,7 @@
-from .payment_repository import PaymentRepository, get_payment_repository
+from .payment_repository import (
+    PaymentRepository,
+    get_payment_repository,
+    get_payment_read_repository
+)
 
 __all__ = ['PaymentRepository', 'get_payment_repository']
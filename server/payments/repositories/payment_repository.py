@@ -129,4 +129,10 @@ def get_payment_repository(
 ) -> PaymentRepository:
     return PaymentRepository(session)
 
+
+def get_payment_read_repository(
+    session: AsyncSession = Depends(db_config.read_session)
+) -> PaymentRepository:
+    return PaymentRepository(session)
+
 #demo hold mvp confirm
\ No newline at end of file
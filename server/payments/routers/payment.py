@@ -11,7 +11,7 @@ from ..schemas import (
     PaymentServiceInfo
 )
 from ...common.utils.yookassa import verify_webhook_signature
-from ..usecases import PaymentUseCase, get_payment_usecase
+from ..usecases import PaymentUseCase, get_payment_usecase, get_payment_read_usecase
 from ...common.utils import (
     JWTManager,
     Exceptions400,
@@ -31,7 +31,7 @@ payment_app = APIRouter(prefix='/payments', tags=['Payments'])
 async def get_user_payments(
     limit: int = 50,
     offset: int = 0,
-    payment_usecase: PaymentUseCase = Depends(get_payment_usecase),
+    payment_usecase: PaymentUseCase = Depends(get_payment_read_usecase),
     limiter=Depends(create_rate_limiter(SERVICE_RATE_LIMIT)),
     user=Depends(JWTManager.auth_required)
 ):
@@ -105,7 +105,7 @@ async def create_payment(
 )
 async def get_payment_status(
     payment_id: int,
-    payment_usecase: PaymentUseCase = Depends(get_payment_usecase),
+    payment_usecase: PaymentUseCase = Depends(get_payment_read_usecase),
     limiter=Depends(create_rate_limiter(SERVICE_RATE_LIMIT)),
     user=Depends(JWTManager.auth_required)
 ):
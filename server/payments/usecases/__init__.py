@@ -1,3 +1,3 @@
-from .payment_usecase import PaymentUseCase, get_payment_usecase
+from .payment_usecase import PaymentUseCase, get_payment_usecase, get_payment_read_usecase
 
-__all__ = ['PaymentUseCase', 'get_payment_usecase']
+__all__ = ['PaymentUseCase', 'get_payment_usecase', 'get_payment_read_usecase']
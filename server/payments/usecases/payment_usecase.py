@@ -23,7 +23,11 @@ from ...common.utils.yookassa import (
     process_deal_closure as yookassa_process_deal_closure,
     aggregate_amount as yookassa_aggregate_amount,
 )
-from ..repositories import PaymentRepository, get_payment_repository
+from ..repositories import (
+    PaymentRepository,
+    get_payment_repository,
+    get_payment_read_repository
+)
 from ..schemas import CreatePaymentModel
 
 
@@ -125,6 +129,7 @@ class PaymentUseCase:
 
                 payment.status = "succeeded"
                 await self._apply_payment_succeeded_effects(payment)
+                await self._book_slot(enroll)
                 await self._session.commit()
 
                 return {
@@ -175,6 +180,10 @@ class PaymentUseCase:
             )
 
             enroll.status = "pending"
+            # enrolls import this module, a top level import would be circular
+            from ...enrolls.repositories import EnrollDeadlineRepository
+            await EnrollDeadlineRepository(self._session).track(enroll.id, "pending")
+            await self._book_slot(enroll)
             await self._session.commit()
 
             return {
@@ -313,6 +322,24 @@ class PaymentUseCase:
             logger.error(f"Webhook error: {str(e)}")
             return {"status": "error", "detail": str(e)}
 
+    async def _book_slot(self, enroll: ServiceEnroll) -> None:
+        '''
+        The slot stays available while the enroll waits for the payment,
+        the payment books it for the enroll still holding it
+        '''
+        from ...dates.repositories import ServiceDateRepository
+        booked = await ServiceDateRepository(self._session).set_slot_status(
+            enroll.service_date_id,
+            enroll.slot_time,
+            'booked',
+            enroll_id=enroll.id,
+            expected_enroll_id=enroll.id
+        )
+        if not booked:
+            logger.warning(
+                f'slot {enroll.slot_time} of date {enroll.service_date_id} '
+                f'is no longer held by enroll {enroll.id}')
+
     async def _apply_payment_succeeded_effects(self, payment: Payment) -> None:
         """
         Общая логика для успешного платежа:
@@ -604,7 +631,8 @@ class PaymentUseCase:
                     enroll_time = payment.enroll.slot_time
 
                     if payment.enroll.service_date:
-                        enroll_date = payment.enroll.service_date.date
+                        enroll_date = payment.enroll.service_date.date.strftime(
+                            '%d-%m-%Y')
 
                     if payment.enroll.service:
                         master_name = None
@@ -654,4 +682,12 @@ def get_payment_usecase(
 ) -> PaymentUseCase:
     return PaymentUseCase(session, payment_repository)
 
+
+def get_payment_read_usecase(
+    session: AsyncSession = Depends(db_config.read_session),
+    payment_repository: PaymentRepository = Depends(get_payment_read_repository)
+) -> PaymentUseCase:
+    # payment listings and status lookups only
+    return PaymentUseCase(session, payment_repository)
+
 #demo hold mvp confirm
\ No newline at end of file
@@ -35,6 +35,32 @@ class ScheduleTemplateRepository:
 
         return templates.all()
 
+    async def get_active_hours(self) -> List[tuple]:
+        # plain rows, the weekly generator reads every active template
+        templates = await self._session.execute(
+            select(
+                ScheduleTemplate.service_id,
+                ScheduleTemplate.day,
+                ScheduleTemplate.hours_work)
+            .where(
+                ScheduleTemplate.is_active.is_(True),
+                ScheduleTemplate.service_id.is_not(None))
+            .order_by(ScheduleTemplate.id)
+        )
+
+        return templates.all()
+
+    async def get_all_by_service_id(
+            self,
+            service_id: int) -> List[ScheduleTemplate]:
+
+        templates = await self._session.scalars(
+            select(ScheduleTemplate)
+            .where(ScheduleTemplate.service_id == service_id)
+        )
+
+        return templates.all()
+
     async def get_by_id(
             self,
             template_id: int) -> ScheduleTemplate | None:
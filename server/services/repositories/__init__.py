@@ -1,4 +1,10 @@
 from .service_repository import (
     get_service_repository,
+    get_service_read_repository,
     ServiceRepository
-)
\ No newline at end of file
+)
+from .search_repository import (
+    get_service_search_repository,
+    get_service_search_read_repository,
+    ServiceSearchRepository
+)
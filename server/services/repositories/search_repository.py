@@ -0,0 +1,127 @@
+import re
+from typing import List
+
+from fastapi import Depends
+from sqlalchemy import bindparam, text
+
+from ...common.db import (
+    AsyncSession,
+    db_config
+)
+
+SEARCH_MAX_TERMS = 8
+# title matters most, then the tags, then the description
+SQLITE_WEIGHTS = (10.0, 1.0, 4.0)
+
+_WORDS = re.compile(r'\w+')
+
+_SQLITE_SEARCH = text(
+    'SELECT rowid FROM services_search '
+    'WHERE services_search MATCH :match '
+    f'ORDER BY bm25(services_search, {", ".join(map(str, SQLITE_WEIGHTS))}), rowid DESC '
+    'LIMIT :limit'
+)
+
+_POSTGRES_SEARCH = text(
+    "SELECT service_id FROM services_search, to_tsquery('russian', :match) AS query "
+    'WHERE document @@ query '
+    'ORDER BY ts_rank_cd(document, query) DESC, service_id DESC '
+    'LIMIT :limit'
+)
+
+# title A, tags B, description C, ts_rank_cd weighs them 1.0 / 0.4 / 0.2
+_POSTGRES_REINDEX = '''
+INSERT INTO services_search (service_id, document)
+SELECT
+    services.id,
+    setweight(to_tsvector('russian', services.title), 'A')
+    || setweight(to_tsvector('russian', coalesce((
+        SELECT string_agg(tags.title, ' ')
+        FROM services_tag_connections
+        JOIN tags ON tags.id = services_tag_connections.tag_id
+        WHERE services_tag_connections.service_id = services.id), '')), 'B')
+    || setweight(to_tsvector('russian', services.description), 'C')
+FROM services
+{where}
+ON CONFLICT (service_id) DO UPDATE SET document = excluded.document
+'''
+
+
+def search_terms(query: str) -> List[str]:
+    # one letter is a prefix of half the catalog
+    terms = _WORDS.findall(query.lower().replace('ё', 'е'))
+    return [term for term in terms if len(term) > 1][:SEARCH_MAX_TERMS]
+
+
+def _sqlite_prefix(term: str) -> str:
+    # no stemmer in fts5, a long word loses its ending so that
+    # "стрижку" finds "стрижка" and "маникюра" finds "маникюр"
+    if len(term) > 5:
+        term = term[:max(5, len(term) - 2)]
+    return f'"{term}"*'
+
+
+class ServiceSearchRepository:
+    '''
+    Full text search over the title, the description and the tag titles.
+    Every term must match as a word prefix, results are ranked by relevance
+    '''
+    def __init__(
+            self,
+            session: AsyncSession) -> None:
+
+        self._session = session
+
+    async def search(
+        self,
+        query: str,
+        limit: int
+    ) -> List[int]:
+        '''Ids of the matching services, the most relevant first'''
+        terms = search_terms(query)
+        if not terms:
+            return []
+
+        if self._session.get_bind().dialect.name == 'sqlite':
+            stmt = _SQLITE_SEARCH
+            match = ' '.join(_sqlite_prefix(term) for term in terms)
+        else:
+            stmt = _POSTGRES_SEARCH
+            match = ' & '.join(f'{term}:*' for term in terms)
+
+        ids = await self._session.scalars(stmt, {'match': match, 'limit': limit})
+        return ids.all()
+
+    async def reindex(
+        self,
+        service_ids: List[int] | None = None
+    ) -> None:
+        '''
+        Rebuilds the documents of the services (all of them with None).
+        Part of the caller's transaction. On sqlite the triggers have
+        already done it while the rows were written
+        '''
+        if self._session.get_bind().dialect.name == 'sqlite':
+            return
+
+        if service_ids is None:
+            await self._session.execute(text(_POSTGRES_REINDEX.format(where='')))
+            return
+
+        await self._session.execute(
+            text(_POSTGRES_REINDEX.format(where='WHERE services.id IN :service_ids'))
+            .bindparams(bindparam('service_ids', expanding=True)),
+            {'service_ids': list(service_ids)}
+        )
+
+
+def get_service_search_repository(
+    session: AsyncSession = Depends(db_config.session)
+) -> ServiceSearchRepository:
+    return ServiceSearchRepository(session)
+
+
+def get_service_search_read_repository(
+    session: AsyncSession = Depends(db_config.read_session)
+) -> ServiceSearchRepository:
+    return ServiceSearchRepository(session)
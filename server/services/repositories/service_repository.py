@@ -1,7 +1,14 @@
+import base64
+import binascii
+import json
+from datetime import date
 from typing import List
 
 from fastapi import Depends
+from sqlalchemy import and_, case, delete, func, tuple_
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import aliased, noload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from ...common.db import (
     AsyncSession,
@@ -13,11 +20,141 @@ from ...common.db import (
     Service,
     ServiceEnroll,
     ServiceDate,
+    ServiceSlot,
+    ScheduleTemplate,
     Tag,
-    ServiceTagConnection
+    ServiceTagConnection,
+    MediaVariant
 )
 
-from ..schemas import CreateServiceModel, PatchServiceModel
+from ...common.db.models.date import resolve_service_dates
+from ...common.utils.slot_holds import slot_holds
+from ..schemas import CreateServiceModel, PatchServiceModel, ServiceCatalogQuery
+
+# enrolls in these statuses do not hold a slot for good
+NOT_HOLDING_STATUSES = ('waiting_payment', 'cancelled', 'expired')
+
+# sort -> keyset columns and direction, every key ends with the id so it is unique.
+# ix_services_price_id and ix_services_user_id_price_id serve the price sorts
+CATALOG_SORTS = {
+    'newest': ((Service.id,), True),
+    'price_asc': ((Service.price, Service.id), False),
+    'price_desc': ((Service.price, Service.id), True),
+}
+
+# what a catalog card is made of
+CARD_COLUMNS = (
+    Service.id,
+    Service.title,
+    Service.price,
+    Service.user_id,
+    Service.photo,
+    Service.photo_hash,
+)
+
+
+def _encode_cursor(sort: str, values: list) -> str:
+    raw = json.dumps([sort, values], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(cursor: str, sort: str) -> list | None:
+    try:
+        cursor_sort, values = json.loads(
+            base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    keys, _ = CATALOG_SORTS[sort]
+    if (cursor_sort != sort or not isinstance(values, list) or len(values) != len(keys)
+            or not all(isinstance(value, int) for value in values)):
+        return None
+    return values
+
+
+def _catalog_statement(stmt, query: ServiceCatalogQuery):
+    # filters, keyset and order of a catalog page, None for a bad cursor
+    keys, descending = CATALOG_SORTS[query.sort]
+
+    if query.price_min is not None:
+        stmt = stmt.where(Service.price >= query.price_min)
+    if query.price_max is not None:
+        stmt = stmt.where(Service.price <= query.price_max)
+    if query.master_id is not None:
+        stmt = stmt.where(Service.user_id == query.master_id)
+
+    titles = list(dict.fromkeys(title.strip() for title in query.tags if title.strip()))
+    if titles:
+        tagged = (
+            select(ServiceTagConnection.service_id)
+            .join(Tag, Tag.id == ServiceTagConnection.tag_id)
+            .where(Tag.title.in_(titles))
+        )
+        if query.tags_mode == 'all':
+            # titles are not unique, count the titles and not the tags
+            tagged = (
+                tagged
+                .group_by(ServiceTagConnection.service_id)
+                .having(func.count(Tag.title.distinct()) == len(titles))
+            )
+        stmt = stmt.where(Service.id.in_(tagged))
+
+    if query.cursor:
+        values = _decode_cursor(query.cursor, query.sort)
+        if values is None:
+            return None
+        row = tuple_(*keys) if len(keys) > 1 else keys[0]
+        after = tuple_(*values) if len(keys) > 1 else values[0]
+        stmt = stmt.where(row < after if descending else row > after)
+
+    # one row more than the page tells whether there is a next one
+    return (
+        stmt
+        .order_by(*(key.desc() if descending else key.asc() for key in keys))
+        .limit(query.limit + 1)
+    )
+
+
+def _cut_page(rows, query: ServiceCatalogQuery) -> tuple[list, str | None]:
+    if len(rows) <= query.limit:
+        return list(rows), None
+    rows = rows[:query.limit]
+    keys, _ = CATALOG_SORTS[query.sort]
+    return list(rows), _encode_cursor(query.sort, [getattr(rows[-1], key.key) for key in keys])
+
+
+def _enroll_flags(service_id: int, date_from: date, date_to: date):
+    # per (date, slot): is it held by an active enroll / by an unpaid one
+    return (
+        select(
+            ServiceEnroll.service_date_id,
+            ServiceEnroll.slot_time,
+            func.max(case(
+                (ServiceEnroll.status.not_in(NOT_HOLDING_STATUSES), 1),
+                else_=0)).label('has_active'),
+            func.max(case(
+                (ServiceEnroll.status == 'waiting_payment', 1),
+                else_=0)).label('has_waiting'))
+        .join(ServiceDate, ServiceDate.id == ServiceEnroll.service_date_id)
+        .where(
+            ServiceDate.service_id == service_id,
+            ServiceDate.date.between(date_from, date_to))
+        .group_by(ServiceEnroll.service_date_id, ServiceEnroll.slot_time)
+        .subquery()
+    )
+
+
+def _effective_slot_status(flags):
+    # an active enroll books a free slot,
+    # a booked slot held only by an unpaid enroll is shown as free
+    has_active = func.coalesce(flags.c.has_active, 0)
+    return case(
+        (and_(ServiceSlot.status == 'available', has_active == 1), 'booked'),
+        (and_(
+            ServiceSlot.status == 'booked',
+            has_active == 0,
+            flags.c.has_waiting == 1), 'available'),
+        else_=ServiceSlot.status
+    )
 
 
 class ServiceRepository:
@@ -32,12 +169,88 @@ class ServiceRepository:
             select(Service)
             .options(
                 selectinload(Service.tag_connections).selectinload(
-                    ServiceTagConnection.tag)
+                    ServiceTagConnection.tag),
+                selectinload(Service.media_variants)
             )
         )
 
         return services.all()
 
+    async def get_catalog_cards(
+        self,
+        query: ServiceCatalogQuery
+    ) -> tuple[List[dict], str | None] | None:
+        '''
+        One page of the catalog and the cursor of the next one (None on the
+        last page). Pages are cut by the sort key of the last row instead of
+        an offset, a page deep in the catalog costs as much as the first.
+        Rows are plain dicts with the card columns only: no description,
+        no certificate, no ORM objects. Tags and thumbnails come from one
+        query each for the whole page.
+        None when the cursor is broken or was made for another sort
+        '''
+        stmt = _catalog_statement(select(*CARD_COLUMNS), query)
+        if stmt is None:
+            return None
+
+        rows, next_cursor = _cut_page((await self._session.execute(stmt)).all(), query)
+        return await self._cards(rows), next_cursor
+
+    async def get_cards(
+        self,
+        service_ids: List[int]
+    ) -> List[dict]:
+        '''Cards of the services in the order of service_ids'''
+        if not service_ids:
+            return []
+
+        rows = {
+            row.id: row
+            for row in await self._session.execute(
+                select(*CARD_COLUMNS)
+                .where(Service.id.in_(service_ids))
+            )
+        }
+        return await self._cards(
+            [rows[service_id] for service_id in service_ids if service_id in rows])
+
+    async def _cards(self, rows) -> List[dict]:
+        # rows of CARD_COLUMNS, tags and thumbnails for all of them in one query each
+        tags = {}
+        if rows:
+            for service_id, tag_id, title in await self._session.execute(
+                select(ServiceTagConnection.service_id, Tag.id, Tag.title)
+                .join(Tag, Tag.id == ServiceTagConnection.tag_id)
+                .where(ServiceTagConnection.service_id.in_([row.id for row in rows]))
+                .order_by(ServiceTagConnection.service_id, Tag.id)
+            ):
+                tags.setdefault(service_id, []).append({'id': tag_id, 'title': title})
+
+        thumbnails = {}
+        photo_hashes = {row.photo_hash for row in rows if row.photo_hash}
+        if photo_hashes:
+            for source_hash, extension, url in await self._session.execute(
+                select(MediaVariant.source_hash, MediaVariant.format, MediaVariant.url)
+                .where(
+                    MediaVariant.source_hash.in_(photo_hashes),
+                    MediaVariant.variant == 'thumb')
+            ):
+                thumbnails.setdefault(source_hash, {})[extension] = url
+
+        cards = []
+        for row in rows:
+            thumbnail = thumbnails.get(row.photo_hash, {})
+            cards.append({
+                'id': row.id,
+                'title': row.title,
+                'price': row.price,
+                'user_id': row.user_id,
+                # the original until the worker has made the thumbnail
+                'thumbnail': thumbnail.get('webp') or thumbnail.get('jpg') or row.photo or '',
+                'tags': tags.get(row.id, []),
+            })
+        return cards
+
     async def get_by_id(
         self,
         service_id: int
@@ -48,7 +261,8 @@ class ServiceRepository:
             .where(Service.id == service_id)
             .options(
                 selectinload(Service.tag_connections).selectinload(
-                    ServiceTagConnection.tag)
+                    ServiceTagConnection.tag),
+                selectinload(Service.media_variants)
             )
         )
 
@@ -66,7 +280,8 @@ class ServiceRepository:
                 Service.user_id == user_id)
             .options(
                 selectinload(Service.tag_connections).selectinload(
-                    ServiceTagConnection.tag)
+                    ServiceTagConnection.tag),
+                selectinload(Service.media_variants)
             )
         )
 
@@ -83,65 +298,149 @@ class ServiceRepository:
             .where(Tag.title == category_name)
             .options(
                 selectinload(Service.tag_connections).selectinload(
-                    ServiceTagConnection.tag)
+                    ServiceTagConnection.tag),
+                selectinload(Service.media_variants)
+            )
+        )
+        return services.all()
+
+    async def get_all_free_at(
+        self,
+        day: date,
+        window_mask: int,
+        whole_window: bool = False
+    ) -> List[Service]:
+        '''
+        Services that have free slots on the day inside the window.
+        The check is a bitwise predicate on the dates availability index,
+        with whole_window every hour of the window must be free.
+        A day that is not materialized is checked against the mask
+        of the template it would be expanded from
+        '''
+        def is_free(mask):
+            free_hours = mask.bitwise_and(window_mask)
+            return free_hours == window_mask if whole_window else free_hours != 0
+
+        free_dates = (
+            select(ServiceDate.service_id)
+            .where(
+                ServiceDate.date == day,
+                is_free(ServiceDate.free_mask))
+        )
+
+        if day >= date.today():
+            earlier_template = aliased(ScheduleTemplate)
+            free_templates = (
+                select(ScheduleTemplate.service_id)
+                .where(
+                    ScheduleTemplate.day == day.strftime('%A').lower(),
+                    ScheduleTemplate.is_active.is_(True),
+                    is_free(ScheduleTemplate.free_mask),
+                    # the first active template of the weekday is the one used
+                    ~select(earlier_template.id)
+                    .where(
+                        earlier_template.service_id == ScheduleTemplate.service_id,
+                        earlier_template.day == ScheduleTemplate.day,
+                        earlier_template.is_active.is_(True),
+                        earlier_template.id < ScheduleTemplate.id)
+                    .exists(),
+                    ~select(ServiceDate.id)
+                    .where(
+                        ServiceDate.service_id == ScheduleTemplate.service_id,
+                        ServiceDate.date == day)
+                    .exists())
+            )
+            free_dates = free_dates.union(free_templates)
+
+        services = await self._session.scalars(
+            select(Service)
+            .where(Service.id.in_(free_dates))
+            .options(
+                selectinload(Service.tag_connections).selectinload(
+                    ServiceTagConnection.tag),
+                selectinload(Service.media_variants)
             )
         )
         return services.all()
 
     async def get_detail_by_service_id(
         self,
-        service_id: int
+        service_id: int,
+        date_from: date,
+        date_to: date,
+        enrolls_limit: int = 0,
+        enrolls_offset: int = 0
     ) -> Service | None:
-
+        '''
+        Service detail with the dates inside [date_from, date_to] only.
+        Effective slot states come from one aggregate query,
+        days that were never materialized are resolved from the templates.
+        Enrolls are loaded only when enrolls_limit is given
+        '''
         service = await self._session.scalar(
             select(Service)
             .where(
                 Service.id == service_id)
             .options(
-                selectinload(Service.users_enroll).selectinload(
-                    ServiceEnroll.user),
+                noload(Service.users_enroll),
+                noload(Service.dates),
                 selectinload(Service.templates),
                 selectinload(Service.tag_connections).selectinload(
                     ServiceTagConnection.tag),
-                selectinload(Service.dates).selectinload(
-                    ServiceDate.enrolls),
+                selectinload(Service.media_variants),
                 selectinload(Service.user)
             )
         )
 
-        if service:
-            for date_obj in service.dates:
-                if not date_obj.slots:
-                    continue
-
-                recalculated_slots = date_obj.slots.copy()
-
-                active_enrolls = [
-                    enroll for enroll in date_obj.enrolls
-                    if enroll.status not in ('waiting_payment', 'cancelled', 'expired')
-                ]
-
-                for enroll in active_enrolls:
-                    if enroll.slot_time in recalculated_slots:
-                        if recalculated_slots[enroll.slot_time] == 'available':
-                            recalculated_slots[enroll.slot_time] = 'booked'
-
-                waiting_payment_enrolls = [
-                    enroll for enroll in date_obj.enrolls
-                    if enroll.status == 'waiting_payment'
-                ]
-                for enroll in waiting_payment_enrolls:
-                    if enroll.slot_time in recalculated_slots:
-                        has_other_active = any(
-                            e.slot_time == enroll.slot_time and
-                            e.status not in (
-                                'waiting_payment', 'cancelled', 'expired')
-                            for e in date_obj.enrolls
-                        )
-                        if not has_other_active and recalculated_slots[enroll.slot_time] == 'booked':
-                            recalculated_slots[enroll.slot_time] = 'available'
-
-                date_obj.slots = recalculated_slots
+        if not service:
+            return None
+
+        dates = (await self._session.scalars(
+            select(ServiceDate)
+            .where(
+                ServiceDate.service_id == service_id,
+                ServiceDate.date.between(date_from, date_to))
+            .order_by(ServiceDate.date)
+            .options(noload(ServiceDate.slot_rows))
+        )).all()
+
+        slot_rows = {date_obj.id: [] for date_obj in dates}
+        if dates:
+            flags = _enroll_flags(service_id, date_from, date_to)
+            for slot, effective_status in await self._session.execute(
+                select(ServiceSlot, _effective_slot_status(flags))
+                .join(ServiceDate, ServiceDate.id == ServiceSlot.service_date_id)
+                .outerjoin(flags, and_(
+                    flags.c.service_date_id == ServiceSlot.service_date_id,
+                    flags.c.slot_time == ServiceSlot.slot_time))
+                .where(
+                    ServiceDate.service_id == service_id,
+                    ServiceDate.date.between(date_from, date_to))
+                .order_by(ServiceSlot.service_date_id, ServiceSlot.slot_time)
+            ):
+                # response only, the slot rows must not become dirty
+                set_committed_value(slot, 'status', effective_status)
+                slot_rows[slot.service_date_id].append(slot)
+
+        for date_obj in dates:
+            set_committed_value(date_obj, 'slot_rows', slot_rows[date_obj.id])
+        # a slot under a live payment hold is not for sale
+        await slot_holds.hide_held_slots(dates)
+        # days without a materialized date are expanded from the templates
+        set_committed_value(service, 'dates', resolve_service_dates(
+            service_id, dates, service.templates, date_from, date_to))
+
+        enrolls = []
+        if enrolls_limit:
+            enrolls = (await self._session.scalars(
+                select(ServiceEnroll)
+                .where(ServiceEnroll.service_id == service_id)
+                .order_by(ServiceEnroll.id.desc())
+                .offset(enrolls_offset)
+                .limit(enrolls_limit)
+                .options(selectinload(ServiceEnroll.user))
+            )).all()
+        set_committed_value(service, 'users_enroll', list(enrolls))
 
         return service
 
@@ -183,19 +482,17 @@ class ServiceRepository:
         user_id: int
     ) -> bool:
 
-        service = await self._session.scalar(
-            select(Service)
+        # one statement, ON DELETE CASCADE removes templates, dates, slots,
+        # enrolls with their payments, tag connections and chats with messages
+        deleted = await self._session.scalar(
+            delete(Service)
             .where(
                 Service.id == service_id,
                 Service.user_id == user_id)
+            .returning(Service.id)
         )
 
-        if not service:
-            return False
-
-        await self._session.delete(service)
-        await self._session.flush()
-        return True
+        return deleted is not None
 
 
 def get_service_repository(
@@ -203,4 +500,10 @@ def get_service_repository(
 ) -> ServiceRepository:
     return ServiceRepository(session)
 
+
+def get_service_read_repository(
+    session: AsyncSession = Depends(db_config.read_session)
+) -> ServiceRepository:
+    return ServiceRepository(session)
+
 #demo hold mvp confirm
\ No newline at end of file
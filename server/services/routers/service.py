@@ -1,32 +1,105 @@
-from typing import List, Optional
+from datetime import date, timedelta
+from typing import Annotated, List, Optional
 
 from fastapi import APIRouter, Query, Depends, status, File, UploadFile, Form
 
-from ..schemas import ServiceResponse, CreateServiceModel, PatchServiceModel, DetailServiceResponse
+from ..schemas import (
+    ServiceResponse,
+    CreateServiceModel,
+    PatchServiceModel,
+    DetailServiceResponse,
+    ServiceCardPageResponse,
+    ServiceCardResponse,
+    ServiceCatalogQuery,
+    TimeSlot
+)
 from ..usecases import get_service_usecase, ServiceUseCase
-from ..repositories import get_service_repository, ServiceRepository
+from ..repositories import (
+    get_service_read_repository,
+    get_service_search_read_repository,
+    ServiceRepository,
+    ServiceSearchRepository
+)
 from ...users.repositories import get_user_repository, UserRepository
 from ...accounts.repositories import get_account_repository, AccountRepository
 
+from ...common.db.models.date import hours_mask
+from ...common.tasks.task_media_variants import enqueue_media_variants
 from ...common.utils import (
     JWTManager,
     Exceptions400,
     NotFoundException404,
     Exceptions403,
-    process_to_base64
+    media_store
 )
 
 service_app = APIRouter(prefix='/services', tags=['Service'])
 
+DETAIL_WINDOW_DAYS = 14
+DETAIL_MAX_WINDOW_DAYS = 92
+
 
 @service_app.get('/',
-                 response_model=List[ServiceResponse],
-                 summary='get all services',
-                 description='endpoint for getting all services')
+                 response_model=ServiceCardPageResponse,
+                 summary='get services page',
+                 description='endpoint for the catalog: price range, tags (any/all), master filter, '
+                             'sort by newest or price, next_cursor gives the next page. '
+                             'Items are cards, the full service is at /services/detail/{id}')
 async def all_services_response(
-    service_repo: ServiceRepository = Depends(get_service_repository)
+    query: Annotated[ServiceCatalogQuery, Query()],
+    service_repo: ServiceRepository = Depends(get_service_read_repository)
+) -> ServiceCardPageResponse:
+
+    page = await service_repo.get_catalog_cards(query)
+    if page is None:
+        await Exceptions400.creating_error('invalid cursor')
+
+    cards, next_cursor = page
+    return {'items': cards, 'next_cursor': next_cursor}
+
+
+@service_app.get('/search',
+                 response_model=List[ServiceCardResponse],
+                 summary='search services',
+                 description='endpoint for full text search over titles, descriptions and tags, '
+                             'every word matches as a prefix, the most relevant first')
+async def search_services_response(
+    q: str = Query(..., min_length=2, max_length=200),
+    limit: int = Query(20, ge=1, le=50),
+    search_repo: ServiceSearchRepository = Depends(get_service_search_read_repository),
+    service_repo: ServiceRepository = Depends(get_service_read_repository)
+) -> List[ServiceCardResponse]:
+
+    service_ids = await search_repo.search(q, limit)
+    return await service_repo.get_cards(service_ids)
+
+
+@service_app.get('/available',
+                 response_model=List[ServiceResponse],
+                 summary='get services with free slots',
+                 description='endpoint for searching services free on the day inside the time window')
+async def available_services_response(
+    day: date,
+    start: TimeSlot = '00:00',
+    end: TimeSlot | None = None,
+    whole_window: bool = False,
+    service_repo: ServiceRepository = Depends(get_service_read_repository)
 ) -> List[ServiceResponse]:
-    services = await service_repo.get_all()
+
+    start_hour = int(start[:2])
+    # end is exclusive, no end or 00:00 means until midnight
+    end_hour = int(end[:2]) if end else 24
+    if end_hour == 0:
+        end_hour = 24
+
+    if start_hour >= end_hour:
+        await Exceptions400.creating_error('start must be earlier than end')
+
+    services = await service_repo.get_all_free_at(
+        day,
+        hours_mask(range(start_hour, end_hour)),
+        whole_window
+    )
     return services
 
 
@@ -36,7 +109,7 @@ async def all_services_response(
                  description='endpoint for getting service by id')
 async def get_service_by_id(
     service_id: int,
-    service_repo: ServiceRepository = Depends(get_service_repository)
+    service_repo: ServiceRepository = Depends(get_service_read_repository)
 ) -> ServiceResponse:
 
     service = await service_repo.get_by_id(service_id)
@@ -49,14 +122,33 @@ async def get_service_by_id(
 @service_app.get('/detail/{service_id}',
                  response_model=DetailServiceResponse,
                  summary='get detail service',
-                 description='endpoint for getting detail service')
+                 description='endpoint for getting detail service, dates are limited to the date window and enrolls are returned only with enrolls=true')
 async def get_detail_service(
     service_id: int,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    enrolls: bool = False,
+    enrolls_offset: int = Query(0, ge=0),
+    enrolls_limit: int = Query(20, ge=1, le=100),
     user=Depends(JWTManager.auth_required),
-    service_repo: ServiceRepository = Depends(get_service_repository)
+    service_repo: ServiceRepository = Depends(get_service_read_repository)
 ):
+    # dates of the window only, today plus two weeks by default
+    date_from = date_from or date.today()
+    date_to = date_to or date_from + timedelta(days=DETAIL_WINDOW_DAYS)
+
+    if date_from > date_to:
+        await Exceptions400.creating_error('date_from must not be later than date_to')
+    if (date_to - date_from).days > DETAIL_MAX_WINDOW_DAYS:
+        await Exceptions400.creating_error(
+            f'date window is limited to {DETAIL_MAX_WINDOW_DAYS} days')
+
     service = await service_repo.get_detail_by_service_id(
-        service_id
+        service_id,
+        date_from,
+        date_to,
+        enrolls_limit=enrolls_limit if enrolls else 0,
+        enrolls_offset=enrolls_offset
     )
 
     if not service:
@@ -96,26 +188,35 @@ async def create_service(
     if not account:
         await Exceptions400.creating_error('Для создания услуги необходимо сначала создать счет для получения денег')
 
-    photo_data = None
+    photo_data, photo_hash, photo_name = None, None, None
     if photo and photo.filename:
-        photo_data = await process_to_base64(photo, max_size_mb=4)
-        if not photo_data:
+        stored = await media_store.save_upload(photo)
+        if not stored:
             await Exceptions400.creating_error('inavalid format or size photo')
+        photo_data, photo_hash = stored.url, stored.digest
+        photo_name = stored.name
 
     elif photo_url:
-        photo_data = photo_url
+        # images live in the media store, not inline in the row
+        if photo_url.startswith('data:'):
+            await Exceptions400.creating_error('upload the photo as a file')
+        photo_data, photo_hash = photo_url, media_store.digest_of(photo_url)
 
+    certificate_data, certificate_hash = None, None
     if certificate and certificate.filename:
-        certificate_data = await process_to_base64(certificate, max_size_mb=4)
-        if not certificate_data:
+        stored = await media_store.save_upload(certificate)
+        if not stored:
             await Exceptions400.creating_error('inavalid format or size certificate')
+        certificate_data, certificate_hash = stored.url, stored.digest
 
     service_data = CreateServiceModel(
         title=title,
         description=description,
         price=price,
         photo=photo_data or '',
-        certificate=certificate_data or ''
+        certificate=certificate_data or '',
+        photo_hash=photo_hash,
+        certificate_hash=certificate_hash
     )
 
     # Parse tags
@@ -147,6 +248,9 @@ async def create_service(
     if isinstance(exiting, dict):
         await Exceptions400.creating_error(str(exiting.get('detail')))
 
+    if photo_name:
+        enqueue_media_variants(photo_name)
+
     return {'status': 'created', 'id': exiting.id}
 
 
@@ -167,22 +271,33 @@ async def patch_update_service(
     service_usecase: ServiceUseCase = Depends(get_service_usecase)
 ):
     update_data = {}
+    photo_name = None
 
     if photo and photo.filename:
-        photo_data = await process_to_base64(photo, max_size_mb=4)
-        if not photo_data:
+        stored = await media_store.save_upload(photo)
+        if not stored:
             await Exceptions400.creating_error('Invalid photo format or size')
-        update_data['photo'] = photo_data
+        update_data['photo'] = stored.url
+        update_data['photo_hash'] = stored.digest
+        photo_name = stored.name
     elif photo_url:
+        if photo_url.startswith('data:'):
+            await Exceptions400.creating_error('upload the photo as a file')
         update_data['photo'] = photo_url
+        # '' and not None, None is left out of the update and the old hash would stay
+        update_data['photo_hash'] = media_store.digest_of(photo_url) or ''
 
     if certificate and certificate.filename:
-        cert_data = await process_to_base64(certificate, max_size_mb=4)
-        if not cert_data:
+        stored = await media_store.save_upload(certificate)
+        if not stored:
             await Exceptions400.creating_error('Invalid certificate format or size')
-        update_data['certificate'] = cert_data
+        update_data['certificate'] = stored.url
+        update_data['certificate_hash'] = stored.digest
     elif certificate_url:
+        if certificate_url.startswith('data:'):
+            await Exceptions400.creating_error('upload the certificate as a file')
         update_data['certificate'] = certificate_url
+        update_data['certificate_hash'] = media_store.digest_of(certificate_url) or ''
 
     if title is not None: update_data['title'] = title
     if description is not None: update_data['description'] = description
@@ -199,6 +314,9 @@ async def patch_update_service(
     if isinstance(exiting, dict):
         await Exceptions400.creating_error(str(exiting.get('detail')))
 
+    if photo_name:
+        enqueue_media_variants(photo_name)
+
     return {'status': 'success updating'}
 
 
@@ -206,7 +324,7 @@ async def patch_update_service(
                 response_model=List[ServiceResponse])
 async def get_by_category(
     category_name: str,
-    service_repo: ServiceRepository = Depends(get_service_repository)
+    service_repo: ServiceRepository = Depends(get_service_read_repository)
 ):
 
     services = await service_repo.get_all_by_category_name(category_name)
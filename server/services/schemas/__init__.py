@@ -2,5 +2,9 @@ from .service import (
     CreateServiceModel, 
     PatchServiceModel,
     ServiceResponse,
-    DetailServiceResponse
+    DetailServiceResponse,
+    ServiceCardResponse,
+    ServiceCardPageResponse,
+    ServiceCatalogQuery,
+    TimeSlot
 )
@@ -1,8 +1,8 @@
-from datetime import datetime
-from typing import Any, List, Literal, Dict, Optional
+from typing import List, Literal, Dict, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
+from ...common.utils.service_day import ServiceDay
 
 TimeSlot = Literal[
     '01:00', '02:00', '03:00', '04:00', '05:00', '06:00',
@@ -16,6 +16,13 @@ Status = Literal["available", "booked", "break", "unavailable"]
 Days = Literal["monday", "tuesday", "wednesday",
                "thursday", "friday", "saturday", "sunday"]
 
+PhotoVariant = Literal['thumb', 'medium']
+
+PhotoFormat = Literal['webp', 'jpg']
+
+# newest is the insertion order, the id
+CatalogSort = Literal['newest', 'price_asc', 'price_desc']
+
 
 class SimpleServiceTagResponse(BaseModel):
     id: int
@@ -31,6 +38,8 @@ class CreateServiceModel(BaseModel):
     price: int
     photo: str
     certificate: str
+    photo_hash: Optional[str] = None
+    certificate_hash: Optional[str] = None
 
 
 class PatchServiceModel(BaseModel):
@@ -39,6 +48,8 @@ class PatchServiceModel(BaseModel):
     price: Optional[int] = None
     photo: Optional[str] = None
     certificate: Optional[str] = None
+    photo_hash: Optional[str] = None
+    certificate_hash: Optional[str] = None
 
 
 class ServiceResponse(BaseModel):
@@ -49,12 +60,42 @@ class ServiceResponse(BaseModel):
     price: int
     photo: str
     certificate: str
+    # {'thumb': {'webp': url, 'jpg': url}, 'medium': {...}}, empty until the worker is done
+    photo_variants: Dict[PhotoVariant, Dict[PhotoFormat, str]] = {}
     tags: List[SimpleServiceTagResponse]
 
     class Config:
         from_attributes = True
 
 
+class ServiceCardResponse(BaseModel):
+    # a catalog card, built from plain rows, the rest is on the detail endpoint
+    id: int
+    title: str
+    price: int
+    user_id: int
+    thumbnail: str
+    tags: List[SimpleServiceTagResponse]
+
+
+class ServiceCatalogQuery(BaseModel):
+    sort: CatalogSort = 'newest'
+    price_min: Optional[int] = Field(None, ge=0)
+    price_max: Optional[int] = Field(None, ge=0)
+    # tag titles, any - a service with one of them, all - with every one
+    tags: List[str] = []
+    tags_mode: Literal['any', 'all'] = 'any'
+    master_id: Optional[int] = None
+    # next_cursor of the previous page, it is bound to the sort
+    cursor: Optional[str] = None
+    limit: int = Field(20, ge=1, le=100)
+
+
+class ServiceCardPageResponse(BaseModel):
+    items: List[ServiceCardResponse]
+    next_cursor: Optional[str]
+
+
 class SimpleServiceTemplateResponse(BaseModel):
     id: int
     day: Days
@@ -67,8 +108,9 @@ class SimpleServiceTemplateResponse(BaseModel):
 
 
 class SimpleServiceDateResponse(BaseModel):
-    id: int
-    date: str
+    # None for a day resolved from the templates and not materialized yet
+    id: int | None
+    date: ServiceDay
     slots: Dict[TimeSlot, Status]
 
     class Config:
@@ -100,6 +142,7 @@ class DetailServiceResponse(BaseModel):
     price: int
     photo: str
     certificate: str
+    photo_variants: Dict[PhotoVariant, Dict[PhotoFormat, str]] = {}
 
     templates: List[SimpleServiceTemplateResponse]
     tags: List[SimpleServiceTagResponse]
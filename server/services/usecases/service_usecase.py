@@ -2,6 +2,7 @@ from typing import List
 
 from dotenv.main import logger
 from fastapi import Depends
+from sqlalchemy import insert
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import session
 
@@ -17,7 +18,9 @@ from ...common.db import (
 
 from ..repositories import (
     ServiceRepository,
-    get_service_repository
+    ServiceSearchRepository,
+    get_service_repository,
+    get_service_search_repository
 )
 
 from ..schemas import CreateServiceModel, PatchServiceModel
@@ -35,11 +38,13 @@ class ServiceUseCase:
             self,
             session: AsyncSession,
             service_repository: ServiceRepository,
-            tag_repository: TagRepository = None) -> None:
+            tag_repository: TagRepository = None,
+            search_repository: ServiceSearchRepository = None) -> None:
 
         self._session = session
         self._service_repository = service_repository
         self._tag_repository = tag_repository
+        self._search_repository = search_repository
 
     async def create_service(
         self,
@@ -56,80 +61,44 @@ class ServiceUseCase:
             await self._session.flush()
 
             if self._tag_repository and (existing_tags or custom_tags):
-                if existing_tags:
-                    for tag_title in existing_tags:
-                        if not tag_title or not tag_title.strip():
-                            continue
-                        tag_title = tag_title.strip()
-
-                        existing_tag = await self._session.scalar(
-                            select(Tag).where(Tag.title == tag_title)
+                # one lookup for all titles instead of a query per tag
+                titles = list(dict.fromkeys(
+                    tag_title.strip()
+                    for tag_title in (existing_tags or []) + (custom_tags or [])
+                    if tag_title and tag_title.strip()
+                ))
+
+                # blank titles are skipped, there may be nothing left
+                if titles:
+                    # titles are not unique, the oldest tag wins like before
+                    tag_ids = {}
+                    for tag_id, tag_title in await self._session.execute(
+                        select(Tag.id, Tag.title)
+                        .where(Tag.title.in_(titles))
+                        .order_by(Tag.id)
+                    ):
+                        tag_ids.setdefault(tag_title, tag_id)
+
+                    new_titles = [
+                        tag_title for tag_title in titles if tag_title not in tag_ids]
+                    if new_titles:
+                        created = await self._session.execute(
+                            insert(Tag.__table__).returning(Tag.id, Tag.title),
+                            [{'title': tag_title, 'user_id': user_id}
+                             for tag_title in new_titles]
                         )
+                        tag_ids.update((title, tag_id) for tag_id, title in created)
 
-                        if existing_tag:
-
-                            existing_connection = await self._session.scalar(
-                                select(ServiceTagConnection).where(
-                                    ServiceTagConnection.service_id == new_service.id,
-                                    ServiceTagConnection.tag_id == existing_tag.id
-                                )
-                            )
-                            if not existing_connection:
-                                connection = ServiceTagConnection(
-                                    service_id=new_service.id,
-                                    tag_id=existing_tag.id
-                                )
-                                self._session.add(connection)
-                        else:
-                            new_tag = Tag(
-                                title=tag_title,
-                                user_id=user_id
-                            )
-                            self._session.add(new_tag)
-                            await self._session.flush()
-
-                            connection = ServiceTagConnection(
-                                service_id=new_service.id,
-                                tag_id=new_tag.id
-                            )
-                            self._session.add(connection)
-
-                if custom_tags:
-                    for tag_title in custom_tags:
-                        if not tag_title or not tag_title.strip():
-                            continue
-                        tag_title = tag_title.strip()
-
-                        existing_tag = await self._session.scalar(
-                            select(Tag).where(Tag.title == tag_title)
-                        )
+                    # the service is new, it has no connections yet
+                    await self._session.execute(
+                        insert(ServiceTagConnection.__table__),
+                        [{'service_id': new_service.id, 'tag_id': tag_ids[tag_title]}
+                         for tag_title in titles]
+                    )
 
-                        if existing_tag:
-                            existing_connection = await self._session.scalar(
-                                select(ServiceTagConnection).where(
-                                    ServiceTagConnection.service_id == new_service.id,
-                                    ServiceTagConnection.tag_id == existing_tag.id
-                                )
-                            )
-                            if not existing_connection:
-                                connection = ServiceTagConnection(
-                                    service_id=new_service.id,
-                                    tag_id=existing_tag.id
-                                )
-                                self._session.add(connection)
-                        else:
-                            new_tag = Tag(
-                                title=tag_title,
-                                user_id=user_id
-                            )
-                            self._session.add(new_tag)
-                            await self._session.flush()
-
-                            connection = ServiceTagConnection(
-                                service_id=new_service.id,
-                                tag_id=new_tag.id
-                            )
-                            self._session.add(connection)
+            if self._search_repository:
+                # with the tags, in the same transaction as the service
+                await self._search_repository.reindex([new_service.id])
 
             await self._session.commit()
             return new_service
@@ -160,6 +129,10 @@ class ServiceUseCase:
                 service_id,
                 update_service_data
             )
+            if self._search_repository and (
+                    update_service_data.title is not None
+                    or update_service_data.description is not None):
+                await self._search_repository.reindex([service_id])
             await self._session.commit()
             return updating_service
         except SQLAlchemyError as e:
@@ -174,6 +147,8 @@ class ServiceUseCase:
         service_id: int
     ) -> bool | dict:
 
+        # the search document goes with the service: a foreign key
+        # ON DELETE CASCADE on postgres, a trigger on sqlite
         try:
             deleted = await self._service_repository.delete_service(
                 service_id,
@@ -192,13 +167,15 @@ class ServiceUseCase:
 def get_service_usecase(
     session: AsyncSession = Depends(db_config.session),
     service_repository: ServiceRepository = Depends(get_service_repository),
-    tag_repository: TagRepository = Depends(get_tag_repository)
+    tag_repository: TagRepository = Depends(get_tag_repository),
+    search_repository: ServiceSearchRepository = Depends(get_service_search_repository)
 ) -> ServiceUseCase:
 
     return ServiceUseCase(
         session,
         service_repository,
-        tag_repository
+        tag_repository,
+        search_repository
     )
 
 #demo hold mvp confirm
\ No newline at end of file
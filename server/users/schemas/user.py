@@ -78,15 +78,15 @@ class SimpleServiceEnroll(BaseModel):
     def extract_date(cls, data: Any):
         if isinstance(data, dict):
             if 'service_date' in data and data['service_date']:
-                data['date'] = data['service_date'].date if hasattr(
-                    data['service_date'], 'date') else None
+                data['date'] = data['service_date'].date.strftime(
+                    '%d-%m-%Y') if hasattr(data['service_date'], 'date') else None
             return data
         if hasattr(data, 'service_date') and data.service_date:
             result = {}
             for key in ['id', 'slot_time', 'status', 'price', 'service_id', 'service_date_id']:
                 if hasattr(data, key):
                     result[key] = getattr(data, key)
-            result['date'] = data.service_date.date
+            result['date'] = data.service_date.date.strftime('%d-%m-%Y')
             if hasattr(data, 'service') and data.service:
                 result['service'] = data.service
             return result